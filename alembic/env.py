@@ -7,7 +7,10 @@ from src.database import SQL_ALCHEMY_DB_URL
 
 config = context.config
 
-if config.config_file_name is not None:
+# src.bootstrap runs migrations in-process with logging already configured
+if config.config_file_name is not None and config.attributes.get(
+  "configure_logger", True
+):
   fileConfig(config.config_file_name)
 
 from src.database import Base
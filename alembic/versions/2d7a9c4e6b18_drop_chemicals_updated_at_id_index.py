@@ -0,0 +1,28 @@
+"""Drop the chemicals (updated_at, id) index the snapshot no longer polls on
+
+Revision ID: 2d7a9c4e6b18
+Revises: 8c1f3a5d7e29
+Create Date: 2026-10-18 10:26:53.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7a9c4e6b18'
+down_revision: Union[str, Sequence[str], None] = '8c1f3a5d7e29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_chemicals_updated_at_id', table_name='chemicals')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chemicals_updated_at_id', 'chemicals', ['updated_at', 'id'], unique=False)
@@ -0,0 +1,135 @@
+"""Partition inventory_logs by month on timestamp
+
+Revision ID: 3a9e5c27d814
+Revises: e41c7a9f0b36
+Create Date: 2026-10-17 13:41:09.218367
+
+Rebuilds inventory_logs as a table range-partitioned by month and copies the
+existing rows over. The table is locked for the duration of the copy, so run
+it during a maintenance window on large databases.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9e5c27d814'
+down_revision: Union[str, Sequence[str], None] = 'e41c7a9f0b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _create_logs_table(**kwargs) -> None:
+    op.create_table(
+        'inventory_logs',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('inventory_logs_id_seq')"), nullable=False),
+        sa.Column('chemical_id', sa.Integer(), nullable=False),
+        sa.Column('action_type', sa.Enum('add', 'remove', 'update', name='actiontype', native_enum=False), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['chemical_id'], ['chemicals.id'], ),
+        **kwargs,
+    )
+
+
+def _swap_tables(create_table, pk_columns: list[str]) -> None:
+    """Move the log rows, sequence, indexes and trigger to a new table."""
+    op.execute('LOCK TABLE inventory_logs IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER inventory_logs_usage_rollup ON inventory_logs')
+    op.drop_index('ix_inventory_logs_chemical_id_timestamp_id', table_name='inventory_logs')
+    op.drop_index('ix_inventory_logs_id', table_name='inventory_logs')
+    op.execute('ALTER TABLE inventory_logs RENAME CONSTRAINT inventory_logs_pkey TO inventory_logs_old_pkey')
+    op.rename_table('inventory_logs', 'inventory_logs_old')
+    op.execute('ALTER SEQUENCE inventory_logs_id_seq OWNED BY NONE')
+
+    create_table()
+    # Rows were already folded into the usage rollups, so copy them before the
+    # rollup trigger exists.
+    op.execute(
+        """
+        INSERT INTO inventory_logs (id, chemical_id, action_type, quantity, timestamp)
+        SELECT id, chemical_id, action_type, quantity, timestamp
+        FROM inventory_logs_old
+        """
+    )
+    op.drop_table('inventory_logs_old')
+    op.execute('ALTER SEQUENCE inventory_logs_id_seq OWNED BY inventory_logs.id')
+
+    op.create_primary_key('inventory_logs_pkey', 'inventory_logs', pk_columns)
+    op.create_index('ix_inventory_logs_id', 'inventory_logs', ['id'], unique=False)
+    op.create_index(
+        'ix_inventory_logs_chemical_id_timestamp_id',
+        'inventory_logs',
+        ['chemical_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.execute(
+        """
+        CREATE TRIGGER inventory_logs_usage_rollup
+            AFTER INSERT ON inventory_logs
+            REFERENCING NEW TABLE AS new_logs
+            FOR EACH STATEMENT
+        EXECUTE FUNCTION inventory_logs_usage_rollup()
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Creates the missing monthly partitions covering [range_start, range_end). Partitions
+    # are named inventory_logs_yYYYYmMM and bounded on UTC month starts. The
+    # advisory lock serializes concurrent callers (e.g. several app workers
+    # starting at once).
+    op.execute(
+        """
+        CREATE FUNCTION inventory_logs_create_partitions(range_start timestamptz, range_end timestamptz)
+            RETURNS integer
+            LANGUAGE plpgsql AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', range_start AT TIME ZONE 'UTC');
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('inventory_logs_create_partitions'));
+            WHILE month_start AT TIME ZONE 'UTC' < range_end LOOP
+                partition_name := 'inventory_logs_' || to_char(month_start, '"y"YYYY"m"MM');
+                IF to_regclass(partition_name) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF inventory_logs FOR VALUES FROM (%L) TO (%L)',
+                        partition_name,
+                        to_char(month_start, 'YYYY-MM-DD') || ' 00:00:00+00',
+                        to_char(month_start + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := month_start + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$
+        """
+    )
+
+    def create_partitioned_table():
+        _create_logs_table(postgresql_partition_by='RANGE (timestamp)')
+        op.execute(
+            f"""
+            SELECT inventory_logs_create_partitions(
+                COALESCE((SELECT MIN(timestamp) FROM inventory_logs_old), now()),
+                GREATEST((SELECT MAX(timestamp) FROM inventory_logs_old), now())
+                    + interval '{MONTHS_AHEAD} months'
+            )
+            """
+        )
+
+    _swap_tables(create_partitioned_table, ['id', 'timestamp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap_tables(_create_logs_table, ['id'])
+    op.execute('DROP FUNCTION inventory_logs_create_partitions(timestamptz, timestamptz)')
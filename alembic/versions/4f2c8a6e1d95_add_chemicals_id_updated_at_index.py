@@ -0,0 +1,34 @@
+"""Add covering index on chemicals (id) INCLUDE (updated_at) for list ETags
+
+Revision ID: 4f2c8a6e1d95
+Revises: 9d6b1f4e2a73
+Create Date: 2026-10-17 16:33:51.772104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2c8a6e1d95'
+down_revision: Union[str, Sequence[str], None] = '9d6b1f4e2a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_chemicals_id_updated_at',
+        'chemicals',
+        ['id'],
+        unique=False,
+        postgresql_include=['updated_at'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chemicals_id_updated_at', table_name='chemicals')
@@ -0,0 +1,33 @@
+"""Add composite index for keyset pagination of inventory logs
+
+Revision ID: 5c1e9b7d2a40
+Revises: a06461c21598
+Create Date: 2026-10-17 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9b7d2a40'
+down_revision: Union[str, Sequence[str], None] = 'a06461c21598'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_inventory_logs_chemical_id_timestamp_id',
+        'inventory_logs',
+        ['chemical_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inventory_logs_chemical_id_timestamp_id', table_name='inventory_logs')
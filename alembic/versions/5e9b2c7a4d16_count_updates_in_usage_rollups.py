@@ -0,0 +1,93 @@
+"""Count 'update' logs in the usage rollups instead of summing their quantities
+
+Revision ID: 5e9b2c7a4d16
+Revises: 2d7a9c4e6b18
+Create Date: 2026-10-18 11:03:12.228741
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9b2c7a4d16'
+down_revision: Union[str, Sequence[str], None] = '2d7a9c4e6b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUPS = (
+    ('inventory_usage_hourly', 'hour'),
+    ('inventory_usage_daily', 'day'),
+)
+
+# 'update' logs store the new absolute quantity, so only their number is
+# meaningful per bucket
+UPDATES = "COUNT(*) FILTER (WHERE action_type = 'update')"
+UPDATED = "COALESCE(SUM(quantity) FILTER (WHERE action_type = 'update'), 0)"
+
+
+def _rollup_function(column: str, aggregate: str) -> str:
+    upserts = '\n'.join(
+        f"""
+        INSERT INTO {table} AS u (chemical_id, bucket, added, removed, {column}, log_count)
+        SELECT chemical_id,
+               date_trunc('{interval}', timestamp, 'UTC'),
+               COALESCE(SUM(quantity) FILTER (WHERE action_type = 'add'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE action_type = 'remove'), 0),
+               {aggregate},
+               COUNT(*)
+        FROM new_logs
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (chemical_id, bucket) DO UPDATE
+            SET added = u.added + EXCLUDED.added,
+                removed = u.removed + EXCLUDED.removed,
+                {column} = u.{column} + EXCLUDED.{column},
+                log_count = u.log_count + EXCLUDED.log_count;
+        """
+        for table, interval in ROLLUPS
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION inventory_logs_usage_rollup() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+        BEGIN
+            {upserts}
+            RETURN NULL;
+        END
+        $$
+        """
+
+
+def _swap_column(old: str, new: str, new_type: sa.types.TypeEngine, aggregate: str) -> None:
+    # Block log writes so the backfill and the new trigger body line up
+    op.execute('LOCK TABLE inventory_logs IN SHARE ROW EXCLUSIVE MODE')
+    for table, interval in ROLLUPS:
+        op.add_column(table, sa.Column(new, new_type, server_default='0', nullable=False))
+        # Buckets whose logs were archived already keep the default
+        op.execute(
+            f"""
+            UPDATE {table} u
+            SET {new} = s.value
+            FROM (SELECT chemical_id,
+                         date_trunc('{interval}', timestamp, 'UTC') AS bucket,
+                         {aggregate} AS value
+                  FROM inventory_logs
+                  GROUP BY 1, 2) s
+            WHERE u.chemical_id = s.chemical_id
+              AND u.bucket = s.bucket
+            """
+        )
+        op.drop_column(table, old)
+    op.execute(_rollup_function(new, aggregate))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _swap_column('updated', 'updates', sa.Integer(), UPDATES)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap_column('updates', 'updated', sa.BigInteger(), UPDATED)
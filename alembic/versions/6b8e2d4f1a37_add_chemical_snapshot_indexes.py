@@ -0,0 +1,30 @@
+"""Add chemicals (unit, id) and (updated_at, id) indexes for unit lookups and snapshot polling
+
+Revision ID: 6b8e2d4f1a37
+Revises: 4f2c8a6e1d95
+Create Date: 2026-10-17 17:12:40.318862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b8e2d4f1a37'
+down_revision: Union[str, Sequence[str], None] = '4f2c8a6e1d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chemicals_unit_id', 'chemicals', ['unit', 'id'], unique=False)
+    op.create_index('ix_chemicals_updated_at_id', 'chemicals', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chemicals_updated_at_id', table_name='chemicals')
+    op.drop_index('ix_chemicals_unit_id', table_name='chemicals')
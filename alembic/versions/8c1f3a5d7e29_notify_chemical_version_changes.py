@@ -0,0 +1,63 @@
+"""Publish chemical changes that only move updated_at
+
+Revision ID: 8c1f3a5d7e29
+Revises: 6b8e2d4f1a37
+Create Date: 2026-10-18 09:41:07.512394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f3a5d7e29'
+down_revision: Union[str, Sequence[str], None] = '6b8e2d4f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _notify_function(compared: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION chemicals_notify_change() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('chemical_changes', json_build_object(
+                    'type', 'chemical', 'op', 'deleted', 'id', OLD.id
+                )::text);
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'UPDATE'
+                AND (NEW.{compared.replace(', ', ', NEW.')})
+                    IS NOT DISTINCT FROM (OLD.{compared.replace(', ', ', OLD.')})
+            THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('chemical_changes', json_build_object(
+                'type', 'chemical',
+                'op', CASE TG_OP WHEN 'INSERT' THEN 'created' ELSE 'updated' END,
+                'id', NEW.id,
+                'name', NEW.name,
+                'cas_number', NEW.cas_number,
+                'quantity', NEW.quantity,
+                'unit', NEW.unit,
+                'updated_at', NEW.updated_at
+            )::text);
+            RETURN NULL;
+        END
+        $$
+        """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A PUT with unchanged values still moves updated_at, and with it the
+    # ETag other processes cache; log appends keep updated_at and stay quiet.
+    op.execute(_notify_function('name, cas_number, quantity, unit, updated_at'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_notify_function('name, cas_number, quantity, unit'))
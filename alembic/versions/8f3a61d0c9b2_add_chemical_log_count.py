@@ -0,0 +1,40 @@
+"""Add per-chemical inventory log counter
+
+Revision ID: 8f3a61d0c9b2
+Revises: 5c1e9b7d2a40
+Create Date: 2026-10-17 10:03:27.540918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a61d0c9b2'
+down_revision: Union[str, Sequence[str], None] = '5c1e9b7d2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chemicals', sa.Column('log_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE chemicals c
+        SET log_count = counts.n
+        FROM (
+            SELECT chemical_id, COUNT(*) AS n
+            FROM inventory_logs
+            GROUP BY chemical_id
+        ) counts
+        WHERE counts.chemical_id = c.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chemicals', 'log_count')
@@ -0,0 +1,102 @@
+"""Publish chemical and inventory log changes with NOTIFY
+
+Revision ID: 9d6b1f4e2a73
+Revises: c58d0f3b7e21
+Create Date: 2026-10-17 15:47:18.093125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d6b1f4e2a73'
+down_revision: Union[str, Sequence[str], None] = 'c58d0f3b7e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Notifications are delivered on commit only. Updates that touch nothing
+    # but the log counter (every log append) are not published as chemical
+    # changes; the log event covers them.
+    op.execute(
+        """
+        CREATE FUNCTION chemicals_notify_change() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('chemical_changes', json_build_object(
+                    'type', 'chemical', 'op', 'deleted', 'id', OLD.id
+                )::text);
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'UPDATE'
+                AND (NEW.name, NEW.cas_number, NEW.quantity, NEW.unit)
+                    IS NOT DISTINCT FROM (OLD.name, OLD.cas_number, OLD.quantity, OLD.unit)
+            THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('chemical_changes', json_build_object(
+                'type', 'chemical',
+                'op', CASE TG_OP WHEN 'INSERT' THEN 'created' ELSE 'updated' END,
+                'id', NEW.id,
+                'name', NEW.name,
+                'cas_number', NEW.cas_number,
+                'quantity', NEW.quantity,
+                'unit', NEW.unit,
+                'updated_at', NEW.updated_at
+            )::text);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER chemicals_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON chemicals
+            FOR EACH ROW
+        EXECUTE FUNCTION chemicals_notify_change()
+        """
+    )
+    # Same payload as InventoryLog.get_log_events_after_raw
+    op.execute(
+        """
+        CREATE FUNCTION inventory_logs_notify_change() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('chemical_changes', json_build_object(
+                'type', 'log',
+                'id', id,
+                'chemical_id', chemical_id,
+                'action_type', action_type,
+                'quantity', quantity,
+                'timestamp', timestamp
+            )::text)
+            FROM (SELECT * FROM new_logs ORDER BY id) ordered;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER inventory_logs_notify_change
+            AFTER INSERT ON inventory_logs
+            REFERENCING NEW TABLE AS new_logs
+            FOR EACH STATEMENT
+        EXECUTE FUNCTION inventory_logs_notify_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER inventory_logs_notify_change ON inventory_logs')
+    op.execute('DROP FUNCTION inventory_logs_notify_change()')
+    op.execute('DROP TRIGGER chemicals_notify_change ON chemicals')
+    op.execute('DROP FUNCTION chemicals_notify_change()')
@@ -0,0 +1,54 @@
+"""Add trigram name index and normalized CAS number index for search
+
+Revision ID: b7d24e91c3f5
+Revises: 8f3a61d0c9b2
+Create Date: 2026-10-17 11:26:05.372641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d24e91c3f5'
+down_revision: Union[str, Sequence[str], None] = '8f3a61d0c9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Same normalization as src.chemical.models.normalize_cas
+    op.execute(
+        r"""
+        UPDATE chemicals
+        SET cas_number = regexp_replace(
+            regexp_replace(cas_number, '\s', '', 'g'),
+            '^0*(\d{2,7})-?(\d{2})-?(\d)$', '\1-\2-\3'
+        )
+        WHERE cas_number IS DISTINCT FROM regexp_replace(
+            regexp_replace(cas_number, '\s', '', 'g'),
+            '^0*(\d{2,7})-?(\d{2})-?(\d)$', '\1-\2-\3'
+        )
+        """
+    )
+    op.create_index(
+        'ix_chemicals_name_trgm',
+        'chemicals',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index('ix_chemicals_cas_number', 'chemicals', ['cas_number'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chemicals_cas_number', table_name='chemicals')
+    op.drop_index('ix_chemicals_name_trgm', table_name='chemicals', postgresql_using='gin')
+    # The extension is left installed; other objects may depend on it and the
+    # normalized CAS numbers are still valid.
@@ -0,0 +1,33 @@
+"""Add checkpoints for the write-behind inventory log queue
+
+Revision ID: c58d0f3b7e21
+Revises: 3a9e5c27d814
+Create Date: 2026-10-17 14:52:30.664410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c58d0f3b7e21'
+down_revision: Union[str, Sequence[str], None] = '3a9e5c27d814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_log_queue_checkpoints',
+    sa.Column('slot', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('slot')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inventory_log_queue_checkpoints')
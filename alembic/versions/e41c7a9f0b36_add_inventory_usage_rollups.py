@@ -0,0 +1,111 @@
+"""Add hourly and daily inventory usage rollups maintained by trigger
+
+Revision ID: e41c7a9f0b36
+Revises: b7d24e91c3f5
+Create Date: 2026-10-17 12:08:44.905116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41c7a9f0b36'
+down_revision: Union[str, Sequence[str], None] = 'b7d24e91c3f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUPS = (
+    ('inventory_usage_hourly', 'hour'),
+    ('inventory_usage_daily', 'day'),
+)
+
+
+def _rollup_select(interval: str, source: str) -> str:
+    return f"""
+        SELECT chemical_id,
+               date_trunc('{interval}', timestamp, 'UTC'),
+               COALESCE(SUM(quantity) FILTER (WHERE action_type = 'add'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE action_type = 'remove'), 0),
+               COALESCE(SUM(quantity) FILTER (WHERE action_type = 'update'), 0),
+               COUNT(*)
+        FROM {source}
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, _ in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column('chemical_id', sa.Integer(), nullable=False),
+            sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('added', sa.BigInteger(), server_default='0', nullable=False),
+            sa.Column('removed', sa.BigInteger(), server_default='0', nullable=False),
+            sa.Column('updated', sa.BigInteger(), server_default='0', nullable=False),
+            sa.Column('log_count', sa.Integer(), server_default='0', nullable=False),
+            sa.ForeignKeyConstraint(['chemical_id'], ['chemicals.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('chemical_id', 'bucket'),
+        )
+    op.create_index('ix_inventory_usage_daily_bucket', 'inventory_usage_daily', ['bucket'], unique=False)
+
+    # One statement-level trigger folds each INSERT (single rows, multi-row
+    # INSERTs and COPY alike) into the rollups in the writer's transaction.
+    # Rows are upserted in key order so concurrent writers lock them in the
+    # same order.
+    upserts = '\n'.join(
+        f"""
+        INSERT INTO {table} AS u (chemical_id, bucket, added, removed, updated, log_count)
+        {_rollup_select(interval, 'new_logs')}
+        ON CONFLICT (chemical_id, bucket) DO UPDATE
+            SET added = u.added + EXCLUDED.added,
+                removed = u.removed + EXCLUDED.removed,
+                updated = u.updated + EXCLUDED.updated,
+                log_count = u.log_count + EXCLUDED.log_count;
+        """
+        for table, interval in ROLLUPS
+    )
+    op.execute(
+        f"""
+        CREATE FUNCTION inventory_logs_usage_rollup() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+        BEGIN
+            {upserts}
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    # Block log writes while the trigger is created and history is backfilled,
+    # so no row is counted twice or missed.
+    op.execute('LOCK TABLE inventory_logs IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(
+        """
+        CREATE TRIGGER inventory_logs_usage_rollup
+            AFTER INSERT ON inventory_logs
+            REFERENCING NEW TABLE AS new_logs
+            FOR EACH STATEMENT
+        EXECUTE FUNCTION inventory_logs_usage_rollup()
+        """
+    )
+    for table, interval in ROLLUPS:
+        op.execute(
+            f"""
+            INSERT INTO {table} (chemical_id, bucket, added, removed, updated, log_count)
+            {_rollup_select(interval, 'inventory_logs')}
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER inventory_logs_usage_rollup ON inventory_logs')
+    op.execute('DROP FUNCTION inventory_logs_usage_rollup()')
+    op.drop_index('ix_inventory_usage_daily_bucket', table_name='inventory_usage_daily')
+    for table, _ in reversed(ROLLUPS):
+        op.drop_table(table)
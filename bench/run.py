@@ -0,0 +1,371 @@
+"""Load test for the chemical API.
+
+Seeds a database with N chemicals and M inventory logs, then drives each
+endpoint in-process against the ASGI app at a fixed concurrency and records
+latency percentiles, throughput and database round-trips per request.
+
+    python -m bench.run --seed --reset --chemicals 10000 --logs 1000000
+    python -m bench.run --output bench/results/baseline.json
+    python -m bench.run --compare bench/results/baseline.json
+
+Point DB_* at a scratch database: `--reset` truncates the chemical tables.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event
+
+from src import statements
+from src.config import settings
+from src.database import get_pg_pool, sessionmanager
+from src.main import app
+from src.pagination import encode_cursor
+
+UNITS = ("L", "mL", "kg", "g", "mg", "m³")
+ACTIONS = ("add", "remove", "update")
+COPY_CHUNK = 50_000
+
+
+class RoundTripCounter:
+  """Counts statements sent to Postgres by both the ORM and the raw paths.
+
+  ORM statements run as prepared statements and are seen by the SQLAlchemy
+  cursor events; raw asyncpg queries and transaction control statements are
+  seen by asyncpg's query logger. Executions of registry statements
+  (src.statements) bypass the logger and are taken from its counter.
+  """
+
+  def __init__(self):
+    self._logged = 0
+
+  @property
+  def count(self) -> int:
+    return self._logged + statements.stats["executions"]
+
+  def install(self):
+    sync_engine = sessionmanager.engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _on_cursor_execute(*args):
+      self._logged += 1
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+      dbapi_connection.driver_connection.add_query_logger(self._on_query)
+
+  def _on_query(self, record):
+    self._logged += 1
+
+
+def _chemical_records(chemicals: int, logs: int, now: datetime):
+  per_chemical, remainder = divmod(logs, chemicals)
+  for i in range(1, chemicals + 1):
+    yield (
+      i,
+      f"Chemical {i}",
+      f"{1000 + i}-{i % 100:02d}-{i % 10}",
+      random.randint(0, 10_000),
+      random.choice(UNITS),
+      per_chemical + (1 if i <= remainder else 0),
+      now,
+      now,
+    )
+
+
+def _log_records(chemicals: int, logs: int, now: datetime):
+  start = now - timedelta(days=365)
+  step = timedelta(days=365) / max(logs, 1)
+  for i in range(logs):
+    yield (
+      i % chemicals + 1,
+      random.choice(ACTIONS),
+      random.randint(1, 100),
+      start + step * i,
+    )
+
+
+async def _copy(conn, table: str, columns: list[str], records):
+  chunk = []
+  for record in records:
+    chunk.append(record)
+    if len(chunk) == COPY_CHUNK:
+      await conn.copy_records_to_table(table, records=chunk, columns=columns)
+      chunk = []
+  if chunk:
+    await conn.copy_records_to_table(table, records=chunk, columns=columns)
+
+
+async def seed(chemicals: int, logs: int, reset: bool):
+  pool = await get_pg_pool()
+  async with pool.acquire() as conn:
+    existing = await conn.fetchval("SELECT COUNT(*) FROM chemicals")
+    if existing and not reset:
+      sys.stderr.write(f"Using existing data ({existing} chemicals)\n")
+      return
+    now = datetime.now(timezone.utc)
+    async with conn.transaction():
+      await conn.execute("TRUNCATE inventory_logs, chemicals RESTART IDENTITY CASCADE")
+      await conn.execute(
+        "SELECT inventory_logs_create_partitions($1, $2)",
+        now - timedelta(days=365),
+        now,
+      )
+      await _copy(
+        conn,
+        "chemicals",
+        [
+          "id",
+          "name",
+          "cas_number",
+          "quantity",
+          "unit",
+          "log_count",
+          "created_at",
+          "updated_at",
+        ],
+        _chemical_records(chemicals, logs, now),
+      )
+      await _copy(
+        conn,
+        "inventory_logs",
+        ["chemical_id", "action_type", "quantity", "timestamp"],
+        _log_records(chemicals, logs, now),
+      )
+      await conn.execute(
+        "SELECT setval('chemicals_id_seq', (SELECT MAX(id) FROM chemicals))"
+      )
+    await conn.execute("ANALYZE chemicals, inventory_logs")
+  sys.stderr.write(f"Seeded {chemicals} chemicals and {logs} logs\n")
+
+
+def scenarios(max_id: int):
+  """Request factories per endpoint: rng -> (method, url, json body)."""
+
+  def some_id(rng):
+    return rng.randint(1, max_id)
+
+  return {
+    "list_offset": lambda rng: ("GET", f"/chemicals/?offset={rng.randint(0, 1000)}"),
+    "list_cursor": lambda rng: (
+      "GET",
+      f"/chemicals/?cursor={encode_cursor(some_id(rng))}",
+    ),
+    "list_no_count": lambda rng: ("GET", "/chemicals/?count=none"),
+    "get_chemical": lambda rng: ("GET", f"/chemicals/{some_id(rng)}"),
+    "lookup_unit": lambda rng: (
+      "GET",
+      f"/chemicals/lookup?unit={rng.choice(UNITS)}&limit=50",
+    ),
+    "batch_get": lambda rng: (
+      "GET",
+      f"/chemicals/batch?logs=3&ids={','.join(str(some_id(rng)) for _ in range(50))}",
+    ),
+    "logs_offset": lambda rng: (
+      "GET",
+      f"/chemicals/{some_id(rng)}/logs?offset={rng.randint(0, 50)}",
+    ),
+    "logs_estimated": lambda rng: (
+      "GET",
+      f"/chemicals/{some_id(rng)}/logs?count=estimated",
+    ),
+    "usage_hourly": lambda rng: (
+      "GET",
+      f"/chemicals/{some_id(rng)}/usage?interval=hour",
+    ),
+    "usage_daily": lambda rng: ("GET", f"/chemicals/{some_id(rng)}/usage"),
+    "usage_summary": lambda rng: ("GET", "/chemicals/usage"),
+    "create_chemical": lambda rng: (
+      "POST",
+      "/chemicals/",
+      {
+        "name": f"Bench {rng.randrange(1_000_000)}",
+        "cas_number": "7732-18-5",
+        "quantity": 1,
+        "unit": "L",
+      },
+    ),
+    "update_chemical": lambda rng: (
+      "PUT",
+      f"/chemicals/{some_id(rng)}",
+      {
+        "name": f"Bench {rng.randrange(1_000_000)}",
+        "cas_number": "7732-18-5",
+        "quantity": rng.randint(0, 1000),
+        "unit": "L",
+      },
+    ),
+    "create_log": lambda rng: (
+      "POST",
+      f"/chemicals/{some_id(rng)}/log",
+      {"action_type": "add", "quantity": 1},
+    ),
+    "movement": lambda rng: (
+      "POST",
+      f"/chemicals/{some_id(rng)}/movements",
+      {"action_type": "add", "quantity": 1},
+    ),
+    "batch_movements": lambda rng: (
+      "POST",
+      "/chemicals/movements",
+      {
+        "mode": "best_effort",
+        "movements": [
+          {"chemical_id": some_id(rng), "action_type": "add", "quantity": 1}
+          for _ in range(50)
+        ],
+      },
+    ),
+  }
+
+
+async def run_scenario(
+  client: httpx.AsyncClient,
+  counter: RoundTripCounter,
+  factory,
+  requests: int,
+  concurrency: int,
+  seed_value: int,
+) -> dict:
+  rng = random.Random(seed_value)
+  planned = [factory(rng) for _ in range(requests)]
+  latencies: list[float] = []
+  errors = 0
+  queue = iter(planned)
+
+  async def worker():
+    nonlocal errors
+    for method, url, *body in queue:
+      started = time.perf_counter()
+      response = await client.request(method, url, json=body[0] if body else None)
+      latencies.append(time.perf_counter() - started)
+      if response.status_code >= 500:
+        errors += 1
+
+  # Let pending query logger callbacks from earlier work settle
+  await asyncio.sleep(0)
+  round_trips_before = counter.count
+  started = time.perf_counter()
+  await asyncio.gather(*(worker() for _ in range(concurrency)))
+  elapsed = time.perf_counter() - started
+  await asyncio.sleep(0)
+  round_trips = counter.count - round_trips_before
+
+  cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+  return {
+    "requests": len(latencies),
+    "errors": errors,
+    "rps": round(len(latencies) / elapsed, 1),
+    "p50_ms": round(cuts[49] * 1000, 3),
+    "p95_ms": round(cuts[94] * 1000, 3),
+    "p99_ms": round(cuts[98] * 1000, 3),
+    "db_round_trips_per_request": round(round_trips / max(len(latencies), 1), 2),
+  }
+
+
+async def run(args) -> dict:
+  counter = RoundTripCounter()
+  counter.install()
+  async with app.router.lifespan_context(app):
+    if args.seed:
+      await seed(args.chemicals, args.logs, args.reset)
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+      max_id = await conn.fetchval("SELECT COALESCE(MAX(id), 0) FROM chemicals")
+    if not max_id:
+      raise SystemExit("No chemicals in the database; run with --seed")
+
+    available = scenarios(max_id)
+    selected = args.endpoints or list(available)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+      transport=transport, base_url="http://bench"
+    ) as client:
+      for name in selected:
+        # Warm up pools, caches and prepared statements before measuring
+        await run_scenario(client, counter, available[name], args.concurrency, 1, 0)
+        results[name] = await run_scenario(
+          client, counter, available[name], args.requests, args.concurrency, 42
+        )
+        sys.stderr.write(f"{name}: {json.dumps(results[name])}\n")
+
+  return {
+    "meta": {
+      "created_at": datetime.now(timezone.utc).isoformat(),
+      "python": platform.python_version(),
+      "requests": args.requests,
+      "concurrency": args.concurrency,
+      "chemicals": max_id,
+      "db_pool_size": settings.DB_POOL_SIZE,
+      "db_raw_pool": settings.DB_RAW_POOL,
+      "db_pgbouncer": settings.DB_PGBOUNCER,
+      "cache_backend": settings.CACHE_BACKEND,
+      "snapshot": settings.SNAPSHOT_ENABLED,
+    },
+    "results": results,
+  }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+  """Print the change against a baseline; False if any p95 regressed."""
+  ok = True
+  header = (
+    f"{'endpoint':<18}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'rps now':>10}"
+  )
+  sys.stdout.write(header + "\n")
+  for name, result in current["results"].items():
+    base = baseline.get("results", {}).get(name)
+    if base is None:
+      sys.stdout.write(f"{name:<18}{'-':>10}{result['p95_ms']:>10}{'new':>9}\n")
+      continue
+    change = (result["p95_ms"] - base["p95_ms"]) / max(base["p95_ms"], 1e-9)
+    regressed = change > threshold
+    ok = ok and not regressed
+    sys.stdout.write(
+      f"{name:<18}{base['p95_ms']:>10}{result['p95_ms']:>10}"
+      f"{change:>+9.1%}{result['rps']:>10}{'  REGRESSION' if regressed else ''}\n"
+    )
+  return ok
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the chemical API")
+  parser.add_argument("--seed", action="store_true", help="seed data before running")
+  parser.add_argument(
+    "--reset", action="store_true", help="truncate existing data when seeding"
+  )
+  parser.add_argument("--chemicals", type=int, default=10_000)
+  parser.add_argument("--logs", type=int, default=1_000_000)
+  parser.add_argument("--requests", type=int, default=2_000)
+  parser.add_argument("--concurrency", type=int, default=32)
+  parser.add_argument("--endpoints", nargs="*", help="scenarios to run (default: all)")
+  parser.add_argument("--output", type=Path, default=Path("bench/results/latest.json"))
+  parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+  parser.add_argument(
+    "--threshold", type=float, default=0.10, help="allowed p95 regression ratio"
+  )
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  args.output.parent.mkdir(parents=True, exist_ok=True)
+  args.output.write_text(json.dumps(report, indent=2) + "\n")
+  sys.stderr.write(f"Wrote {args.output}\n")
+
+  if args.compare:
+    baseline = json.loads(args.compare.read_text())
+    if not compare(report, baseline, args.threshold):
+      sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,88 @@
+"""Memory footprint and read latency of the in-memory chemical snapshot.
+
+Fills an InventorySnapshot with synthetic chemicals, no database needed:
+
+    python -m bench.snapshot_memory --chemicals 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from bench.run import UNITS
+from src.chemical.snapshot import InventorySnapshot
+
+
+def _cas(i: int) -> str:
+  return f"{1000 + i}-{i % 100:02d}-{i % 10}"
+
+
+def _rows(chemicals: int, now: datetime):
+  for i in range(1, chemicals + 1):
+    yield {
+      "id": i,
+      "name": f"Chemical {i}",
+      "cas_number": _cas(i),
+      "quantity": i % 5000,
+      "unit": UNITS[i % len(UNITS)],
+      "created_at": now,
+      "updated_at": now,
+    }
+
+
+def _per_call_us(fn, calls: int) -> float:
+  started = time.perf_counter()
+  for _ in range(calls):
+    fn()
+  return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Measure the chemical snapshot")
+  parser.add_argument("--chemicals", type=int, default=1_000_000)
+  args = parser.parse_args()
+
+  now = datetime.now(timezone.utc)
+  snapshot = InventorySnapshot(max_staleness=1.0, poll_interval=1.0)
+  started = time.perf_counter()
+  for row in _rows(args.chemicals, now):
+    snapshot.upsert(row)
+  load_seconds = time.perf_counter() - started
+
+  # Load again under tracemalloc, which slows the load down considerably
+  traced_snapshot = InventorySnapshot(max_staleness=1.0, poll_interval=1.0)
+  tracemalloc.start()
+  for row in _rows(args.chemicals, now):
+    traced_snapshot.upsert(row)
+  traced, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del traced_snapshot
+
+  rng = random.Random(42)
+  report = {
+    "chemicals": len(snapshot),
+    "load_seconds": round(load_seconds, 2),
+    "memory_mib": round(snapshot.memory_bytes() / 2**20, 1),
+    "traced_mib": round(traced / 2**20, 1),
+    "bytes_per_chemical": round(traced / max(len(snapshot), 1)),
+    "get_us": _per_call_us(
+      lambda: snapshot.get(rng.randint(1, args.chemicals)), 100_000
+    ),
+    "lookup_cas_us": _per_call_us(
+      lambda: snapshot.lookup(_cas(rng.randint(1, args.chemicals)), None, 10),
+      100_000,
+    ),
+    "lookup_unit_50_us": _per_call_us(
+      lambda: snapshot.lookup(None, "kg", 50, rng.randint(0, args.chemicals)),
+      10_000,
+    ),
+  }
+  sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+  main()
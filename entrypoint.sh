@@ -1,16 +1,21 @@
 #!/bin/bash
 set -e
 
-echo "Waiting for DB to be ready..."
-while ! pg_isready -h db -p 5432; do
-  sleep 1
-done
+# Waits for the database, then migrates and seeds under a Postgres advisory
+# lock, so containers booting together don't race each other
+echo "Bootstrapping the database..."
+if [ "${SEED_DATA:-true}" = "true" ]; then
+  python -m src.bootstrap
+else
+  python -m src.bootstrap --no-seed
+fi
 
-echo "Running Alembic migrations..."
-alembic upgrade head
-
-echo "Seeding some data"
-python -m src.seed_data
+if [ "${RUN_MODE:-development}" = "production" ]; then
+  WORKERS="${WEB_CONCURRENCY:-$(nproc)}"
+  echo "Starting FastAPI with ${WORKERS} workers..."
+  exec uvicorn src.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS" \
+    --no-access-log --timeout-graceful-shutdown 30
+fi
 
 echo "Starting FastAPI..."
-uvicorn src.main:app --host 0.0.0.0 --port 8000
+exec uvicorn src.main:app --host 0.0.0.0 --port 8000
@@ -7,7 +7,7 @@ docker compose up -d
 
 # Wait for API to become ready
 echo "Waiting for FastAPI to be available on http://localhost:8000 ..."
-until curl -s http://localhost:8000/docs > /dev/null; do
+until curl -sf http://localhost:8000/ready > /dev/null; do
   sleep 1
 done
 
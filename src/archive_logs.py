@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+import asyncpg
+
+from src.chemical.partitions import add_months, archive_log_partitions
+from src.config import settings
+from src.database import ASYNC_DB_URL
+
+
+async def main(keep_months: int, output_dir: Path, dry_run: bool):
+  # Keep the current month plus `keep_months` full months before it
+  today = date.today()
+  before = add_months(date(today.year, today.month, 1), -keep_months)
+  pool = await asyncpg.create_pool(
+    ASYNC_DB_URL,
+    min_size=1,
+    max_size=1,
+    statement_cache_size=settings.statement_cache_size,
+  )
+  try:
+    archived = await archive_log_partitions(pool, before, output_dir, dry_run)
+  finally:
+    await pool.close()
+
+  for partition in archived:
+    sys.stdout.write(json.dumps(partition) + "\n")
+  return 0
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(
+    description="Archive old inventory log partitions to compressed CSV files"
+  )
+  parser.add_argument(
+    "--keep-months",
+    type=int,
+    default=12,
+    help="Full months to keep online before the current one (default: 12)",
+  )
+  parser.add_argument("--output-dir", type=Path, default=Path("archive"))
+  parser.add_argument(
+    "--dry-run", action="store_true", help="List the partitions that would be archived"
+  )
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  sys.exit(asyncio.run(main(args.keep_months, args.output_dir, args.dry_run)))
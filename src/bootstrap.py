@@ -0,0 +1,98 @@
+"""One-off database setup run before the API workers start.
+
+Waits for Postgres to accept connections, then applies the Alembic migrations
+and seeds an empty database while holding a session-level advisory lock. When
+several containers boot at once the first one does the work; the others wait
+on the lock and then find the schema at head and the data already there.
+
+    python -m src.bootstrap [--timeout SECONDS] [--no-seed]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import asyncpg
+
+from alembic import command
+from alembic.config import Config
+from src.chemical.partitions import ensure_log_partitions
+from src.config import settings
+from src.database import ASYNC_DB_URL
+from src.seed_data import seed
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key shared by every instance of the app ("neot")
+BOOTSTRAP_LOCK_ID = 0x6E656F74
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+async def wait_for_database(timeout: float) -> asyncpg.Connection:
+  """Connect to the database, retrying until it accepts connections."""
+  deadline = time.monotonic() + timeout
+  delay = 0.25
+  while True:
+    try:
+      return await asyncpg.connect(
+        ASYNC_DB_URL, statement_cache_size=settings.statement_cache_size
+      )
+    except (OSError, asyncpg.CannotConnectNowError) as e:
+      if time.monotonic() + delay > deadline:
+        raise
+      logger.info("Waiting for the database: %s", e)
+      await asyncio.sleep(delay)
+      delay = min(delay * 2, 2.0)
+
+
+def _upgrade():
+  config = Config(str(ALEMBIC_INI))
+  config.attributes["configure_logger"] = False
+  command.upgrade(config, "head")
+
+
+async def bootstrap(timeout: float, seed_data: bool = True):
+  conn = await wait_for_database(timeout)
+  try:
+    logger.info("Waiting for the bootstrap lock")
+    await conn.execute("SELECT pg_advisory_lock($1)", BOOTSTRAP_LOCK_ID)
+    try:
+      logger.info("Running migrations")
+      # env.py starts its own event loop
+      await asyncio.to_thread(_upgrade)
+      if seed_data:
+        pool = await asyncpg.create_pool(
+          ASYNC_DB_URL,
+          min_size=1,
+          max_size=1,
+          statement_cache_size=settings.statement_cache_size,
+        )
+        try:
+          # The seed's "add" logs need the current month's partition
+          await ensure_log_partitions(pool)
+          if await seed(pool):
+            logger.info("Seeded sample data")
+        finally:
+          await pool.close()
+    finally:
+      await conn.execute("SELECT pg_advisory_unlock($1)", BOOTSTRAP_LOCK_ID)
+  finally:
+    await conn.close()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Migrate and seed the database")
+  parser.add_argument(
+    "--timeout",
+    type=float,
+    default=60.0,
+    help="Seconds to wait for the database to accept connections",
+  )
+  parser.add_argument("--no-seed", action="store_true", help="Only run migrations")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+  asyncio.run(bootstrap(args.timeout, seed_data=not args.no_seed))
@@ -0,0 +1,185 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+import asyncpg
+
+from src.config import settings
+
+# Invalidation counters are striped over this many slots instead of kept per
+# key, so they take fixed memory; keys sharing a slot only skip more stores.
+GENERATION_SLOTS = 4096
+
+
+class CacheStats:
+  def __init__(self):
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def as_dict(self) -> dict[str, int]:
+    return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class Cache(ABC):
+  """Interface of the read cache backends.
+
+  Values are JSON-like dicts or asyncpg records; datetimes are allowed. A `get`
+  returning None is a miss.
+
+  Every `delete` (and `clear`) bumps an invalidation generation. A reader
+  takes `generation(key)` before loading a value and only stores it if the
+  generation is unchanged, so a value read before a write can't be cached
+  after that write's invalidation. Generations are per process.
+  """
+
+  def __init__(self):
+    self.stats = CacheStats()
+    self._generations = [0] * GENERATION_SLOTS
+    self._clears = 0
+
+  def generation(self, key: str) -> tuple[int, int]:
+    return self._clears, self._generations[hash(key) % GENERATION_SLOTS]
+
+  def _invalidated(self, keys: tuple[str, ...]):
+    for key in keys:
+      self._generations[hash(key) % GENERATION_SLOTS] += 1
+
+  @abstractmethod
+  async def get(self, key: str) -> Any | None: ...
+
+  @abstractmethod
+  async def set(self, key: str, value: Any) -> None: ...
+
+  @abstractmethod
+  async def delete(self, *keys: str) -> None: ...
+
+  async def close(self) -> None:
+    return None
+
+
+class NullCache(Cache):
+  """Cache that never stores anything, used when caching is disabled."""
+
+  async def get(self, key: str) -> Any | None:
+    self.stats.misses += 1
+    return None
+
+  async def set(self, key: str, value: Any) -> None:
+    return None
+
+  async def delete(self, *keys: str) -> None:
+    self._invalidated(keys)
+
+
+class MemoryCache(Cache):
+  """In-process cache with a per-entry TTL and LRU eviction."""
+
+  def __init__(self, ttl: float, max_entries: int):
+    super().__init__()
+    self._ttl = ttl
+    self._max_entries = max_entries
+    self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+  async def get(self, key: str) -> Any | None:
+    entry = self._entries.get(key)
+    if entry is None:
+      self.stats.misses += 1
+      return None
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+      del self._entries[key]
+      self.stats.misses += 1
+      return None
+    self._entries.move_to_end(key)
+    self.stats.hits += 1
+    return value
+
+  async def set(self, key: str, value: Any) -> None:
+    self._entries[key] = (time.monotonic() + self._ttl, value)
+    self._entries.move_to_end(key)
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+      self.stats.evictions += 1
+
+  async def delete(self, *keys: str) -> None:
+    self._invalidated(keys)
+    for key in keys:
+      self._entries.pop(key, None)
+
+  async def clear(self) -> None:
+    self._clears += 1
+    self._entries.clear()
+
+
+def _encode_value(value: Any) -> Any:
+  if isinstance(value, datetime):
+    return {"__datetime__": value.isoformat()}
+  if isinstance(value, asyncpg.Record):
+    return dict(value)
+  raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_value(obj: dict) -> Any:
+  if "__datetime__" in obj:
+    return datetime.fromisoformat(obj["__datetime__"])
+  return obj
+
+
+class RedisCache(Cache):
+  """Cache backed by a Redis-compatible server.
+
+  `client` only needs async `get`, `set(key, value, px=...)`, `delete` and
+  `aclose`, so tests can pass an in-memory fake. Redis handles TTL and
+  eviction; evictions are reported by the server (`INFO stats`) and not
+  counted here.
+  """
+
+  def __init__(self, client: Any, ttl: float, prefix: str = "neotech:"):
+    super().__init__()
+    self._client = client
+    self._ttl_ms = int(ttl * 1000)
+    self._prefix = prefix
+
+  async def get(self, key: str) -> Any | None:
+    raw = await self._client.get(self._prefix + key)
+    if raw is None:
+      self.stats.misses += 1
+      return None
+    self.stats.hits += 1
+    return json.loads(raw, object_hook=_decode_value)
+
+  async def set(self, key: str, value: Any) -> None:
+    raw = json.dumps(value, default=_encode_value, separators=(",", ":"))
+    await self._client.set(self._prefix + key, raw, px=self._ttl_ms)
+
+  async def delete(self, *keys: str) -> None:
+    self._invalidated(keys)
+    if keys:
+      await self._client.delete(*(self._prefix + key for key in keys))
+
+  async def close(self) -> None:
+    await self._client.aclose()
+
+
+def create_cache() -> Cache:
+  backend = settings.CACHE_BACKEND.lower()
+  if backend == "none":
+    return NullCache()
+  if backend == "redis":
+    try:
+      import redis.asyncio as redis
+    except ImportError as e:
+      raise RuntimeError(
+        "CACHE_BACKEND=redis requires the 'redis' package to be installed"
+      ) from e
+    return RedisCache(
+      redis.from_url(settings.CACHE_REDIS_URL), settings.CACHE_TTL_SECONDS
+    )
+  return MemoryCache(settings.CACHE_TTL_SECONDS, settings.CACHE_MAX_ENTRIES)
+
+
+cache = create_cache()
@@ -0,0 +1,219 @@
+import asyncio
+import collections
+import json
+import logging
+from typing import AsyncIterator
+
+import asyncpg
+from fastapi import HTTPException
+
+from src.chemical.models import InventoryLog
+from src.database import ASYNC_DB_URL
+
+logger = logging.getLogger(__name__)
+
+# Channel the chemicals / inventory_logs triggers NOTIFY on
+CHANNEL = "chemical_changes"
+SUBSCRIBER_QUEUE_SIZE = 1000
+HEARTBEAT_SECONDS = 15.0
+REPLAY_PAGE_SIZE = 1000
+# Replayed log ids remembered to drop their live duplicates. Logs committed
+# after the stream subscribed were inserted recently, so they are among the
+# last ids replayed.
+REPLAY_DEDUP_WINDOW = 10_000
+
+
+def _sse(event: str, data: str, event_id: int | None = None) -> bytes:
+  lines = [f"event: {event}"]
+  if event_id is not None:
+    lines.append(f"id: {event_id}")
+  lines.append(f"data: {data}")
+  return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscription:
+  __slots__ = ("chemical_ids", "events", "queue")
+
+  def __init__(self, chemical_ids: set[int] | None, events: set[str] | None = None):
+    self.chemical_ids = chemical_ids
+    self.events = events
+    # (event, log id or None, payload); None tells the client to resync
+    self.queue: asyncio.Queue[tuple[str, int | None, str] | None] = asyncio.Queue(
+      SUBSCRIBER_QUEUE_SIZE
+    )
+
+  def wants(self, event: str, chemical_id: int) -> bool:
+    if self.events is not None and event not in self.events:
+      return False
+    return self.chemical_ids is None or chemical_id in self.chemical_ids
+
+
+class ChangeFeed:
+  """Fans out chemical and inventory log changes to Server-Sent Event streams.
+
+  Changes are published by database triggers with NOTIFY, so they are only
+  seen once committed and cover every write path. Each process holds one
+  LISTEN connection, opened with the first subscriber.
+
+  A subscriber that falls `SUBSCRIBER_QUEUE_SIZE` events behind, or that was
+  connected while the listener connection dropped, gets a `resync` event and
+  its stream ends; reconnecting with `Last-Event-ID` replays the missed logs
+  from the table. Chemical events are only kept as NOTIFY payloads and can't
+  be replayed, so a resumed stream starts with a `reload` event telling the
+  client to re-read the chemicals it follows.
+  """
+
+  def __init__(self):
+    self._conn: asyncpg.Connection | None = None
+    self._lock = asyncio.Lock()
+    self._subscriptions: set[Subscription] = set()
+    self.stats = {"events": 0, "delivered": 0, "overflows": 0}
+
+  async def start(self):
+    """Open the listener connection if it isn't open yet.
+
+    Raises:
+        HTTPException: 503 if the database can't be reached.
+    """
+    if self.listening:
+      return
+    async with self._lock:
+      if self.listening:
+        return
+      try:
+        conn = await asyncpg.connect(ASYNC_DB_URL)
+        await conn.add_listener(CHANNEL, self._on_notify)
+      except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+        logger.warning("Could not start the change feed listener: %s", e)
+        raise HTTPException(status_code=503, detail="Change feed unavailable")
+      conn.add_termination_listener(self._on_terminate)
+      self._conn = conn
+
+  async def close(self):
+    for subscription in list(self._subscriptions):
+      self._drop(subscription)
+    if self._conn is not None:
+      await self._conn.close()
+      self._conn = None
+
+  def subscribe(
+    self, chemical_ids: set[int] | None = None, events: set[str] | None = None
+  ) -> Subscription:
+    """Start queueing the matching events for an in-process consumer.
+
+    The queue receives (event, log id or None, payload) tuples, and None once
+    the subscription is dropped and the consumer has to resync.
+    """
+    subscription = Subscription(chemical_ids, events)
+    self._subscriptions.add(subscription)
+    return subscription
+
+  def unsubscribe(self, subscription: Subscription):
+    self._subscriptions.discard(subscription)
+
+  @property
+  def listening(self) -> bool:
+    return self._conn is not None and not self._conn.is_closed()
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    samples = [("change_feed_subscribers", {}, len(self._subscriptions))]
+    samples += [
+      (f"change_feed_{name}_total", {}, value) for name, value in self.stats.items()
+    ]
+    return samples
+
+  def _on_notify(self, conn, pid, channel, payload: str):
+    try:
+      event = json.loads(payload)
+    except ValueError:
+      logger.warning("Ignoring malformed change notification: %r", payload)
+      return
+    self.stats["events"] += 1
+    if event["type"] == "log":
+      chemical_id, log_id = event["chemical_id"], event["id"]
+    else:
+      chemical_id, log_id = event["id"], None
+    for subscription in list(self._subscriptions):
+      if not subscription.wants(event["type"], chemical_id):
+        continue
+      try:
+        subscription.queue.put_nowait((event["type"], log_id, payload))
+        self.stats["delivered"] += 1
+      except asyncio.QueueFull:
+        self.stats["overflows"] += 1
+        self._drop(subscription)
+
+  def _on_terminate(self, conn):
+    logger.warning("Change feed listener connection lost")
+    if conn is self._conn:
+      self._conn = None
+    # Notifications sent while disconnected are lost; make clients replay
+    for subscription in list(self._subscriptions):
+      self._drop(subscription)
+
+  def _drop(self, subscription: Subscription):
+    self._subscriptions.discard(subscription)
+    while not subscription.queue.empty():
+      subscription.queue.get_nowait()
+    subscription.queue.put_nowait(None)
+
+  async def stream(
+    self,
+    pool: asyncpg.Pool,
+    chemical_ids: set[int] | None = None,
+    after_log_id: int | None = None,
+  ) -> AsyncIterator[bytes]:
+    """Yield SSE-encoded change events, starting with logs after `after_log_id`.
+
+    Log events carry the log id as the SSE event id. When resuming from
+    `after_log_id` a `reload` event comes first: chemical changes since then
+    are not replayed, and the client has to re-read the chemicals (those in
+    its `chemical_ids`, or all of them when null).
+    """
+    # Subscribe before replaying so nothing committed meanwhile is missed
+    subscription = self.subscribe(chemical_ids)
+    try:
+      if after_log_id is not None:
+        # Re-read after this, every later chemical change still arrives live
+        yield _sse(
+          "reload",
+          json.dumps({"chemical_ids": sorted(chemical_ids) if chemical_ids else None}),
+        )
+      # Log ids are taken at INSERT but become visible at commit, so a live
+      # event can be below the last replayed id without having been replayed;
+      # only ids actually replayed are skipped.
+      replayed: collections.deque[int] = collections.deque(maxlen=REPLAY_DEDUP_WINDOW)
+      if after_log_id is not None:
+        filter_ids = sorted(chemical_ids) if chemical_ids else None
+        replayed_up_to = after_log_id
+        while True:
+          rows = await InventoryLog.get_log_events_after_raw(
+            pool, replayed_up_to, filter_ids, REPLAY_PAGE_SIZE
+          )
+          for row in rows:
+            replayed.append(row["id"])
+            yield _sse("log", row["payload"], row["id"])
+          if rows:
+            replayed_up_to = rows[-1]["id"]
+          if len(rows) < REPLAY_PAGE_SIZE:
+            break
+      replayed_ids = set(replayed)
+
+      while True:
+        try:
+          item = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+          yield b": keep-alive\n\n"
+          continue
+        if item is None:
+          yield _sse("resync", "{}")
+          return
+        event, log_id, payload = item
+        if log_id in replayed_ids:
+          continue
+        yield _sse(event, payload, log_id)
+    finally:
+      self.unsubscribe(subscription)
+
+
+change_feed = ChangeFeed()
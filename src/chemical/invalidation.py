@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+
+from fastapi import HTTPException
+
+from src.cache import MemoryCache, cache
+from src.chemical.changes import change_feed
+from src.chemical.models import Chemical
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 1.0
+
+
+class CacheInvalidator:
+  """Evicts chemicals from the per-process cache when another process writes.
+
+  Writes only clear the cache of the process that made them. With the memory
+  backend and several workers or containers, each one also follows the change
+  feed's `chemical` events and evicts the chemical named in each. When the
+  subscription is dropped (listener lost or fallen behind) events may have
+  been missed, so the whole cache is cleared once it is back.
+  """
+
+  def __init__(self, enabled: bool):
+    self.enabled = enabled
+    self.stats = {"evictions": 0, "resubscribes": 0}
+    self._task: asyncio.Task | None = None
+
+  async def start(self):
+    self._task = asyncio.create_task(self._run())
+
+  async def close(self):
+    if self._task is not None:
+      self._task.cancel()
+      try:
+        await self._task
+      except asyncio.CancelledError:
+        pass
+      self._task = None
+
+  async def _run(self):
+    while True:
+      try:
+        await change_feed.start()
+      except HTTPException:
+        await asyncio.sleep(RETRY_SECONDS)
+        continue
+      subscription = change_feed.subscribe(events={"chemical"})
+      self.stats["resubscribes"] += 1
+      # Entries cached while not subscribed may predate a missed write
+      await cache.clear()
+      try:
+        while (item := await subscription.queue.get()) is not None:
+          await cache.delete(Chemical.cache_key(json.loads(item[2])["id"]))
+          self.stats["evictions"] += 1
+      finally:
+        change_feed.unsubscribe(subscription)
+      logger.warning("Cache invalidation subscription dropped, resubscribing")
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    return [
+      (f"cache_invalidation_{name}_total", {}, value)
+      for name, value in self.stats.items()
+    ]
+
+
+cache_invalidator = CacheInvalidator(enabled=isinstance(cache, MemoryCache))
@@ -0,0 +1,406 @@
+import asyncio
+import collections
+import contextlib
+import fcntl
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO
+
+import asyncpg
+from fastapi import HTTPException
+
+from src.chemical.models import ActionType, InventoryLog, InventoryLogQueueCheckpoint
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Start a new segment file once the current one grows past this size
+SEGMENT_BYTES = 16 * 1024 * 1024
+# Entries that can never be inserted, one JSON line each with the error (not a
+# *.log segment, so it is never replayed)
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+# Failures worth retrying the same batch for. Anything else from Postgres is a
+# problem with the rows themselves (a value out of range, a timestamp without
+# a partition) and is isolated row by row instead.
+_TRANSIENT_ERRORS = (
+  OSError,
+  asyncio.TimeoutError,
+  asyncpg.InterfaceError,
+  asyncpg.PostgresConnectionError,
+  asyncpg.InsufficientResourcesError,
+  asyncpg.OperatorInterventionError,
+  asyncpg.TransactionRollbackError,
+)
+
+
+class QueueEntry:
+  __slots__ = ("seq", "chemical_id", "action_type", "quantity", "timestamp")
+
+  def __init__(
+    self,
+    seq: int,
+    chemical_id: int,
+    action_type: str,
+    quantity: int,
+    timestamp: datetime,
+  ):
+    self.seq = seq
+    self.chemical_id = chemical_id
+    self.action_type = action_type
+    self.quantity = quantity
+    self.timestamp = timestamp
+
+  def to_line(self) -> str:
+    return json.dumps(
+      {
+        "seq": self.seq,
+        "chemical_id": self.chemical_id,
+        "action_type": self.action_type,
+        "quantity": self.quantity,
+        "timestamp": self.timestamp.isoformat(),
+      },
+      separators=(",", ":"),
+    )
+
+  @classmethod
+  def from_line(cls, line: str) -> "QueueEntry":
+    data = json.loads(line)
+    return cls(
+      data["seq"],
+      data["chemical_id"],
+      data["action_type"],
+      data["quantity"],
+      datetime.fromisoformat(data["timestamp"]),
+    )
+
+
+def _log_row(entry: QueueEntry) -> tuple[int, str, int, datetime]:
+  return (entry.chemical_id, entry.action_type, entry.quantity, entry.timestamp)
+
+
+class LogQueue:
+  """Write-behind queue for inventory log appends.
+
+  `append` returns once the log is fsynced to an append-only segment file on
+  local disk; concurrent appends share one write and fsync. A background task
+  moves the queued logs into inventory_logs in batches of `batch_size` every
+  `flush_interval` seconds (sooner when a full batch is waiting), and records
+  the last flushed sequence number in the same transaction. When a batch is
+  rejected for its contents it is retried row by row, and rows that still
+  fail are written to the slot's dead-letter file and skipped, so one bad
+  entry can't hold up the queue.
+
+  Each process claims its own slot directory under `directory` with an
+  exclusive file lock. On start the slot's segments are replayed from the
+  checkpoint, so logs acknowledged before a crash are still written.
+  """
+
+  def __init__(
+    self,
+    directory: Path,
+    batch_size: int,
+    flush_interval: float,
+    slots: int,
+    enabled: bool = True,
+  ):
+    self.directory = directory
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.slots = slots
+    self.enabled = enabled
+    self.slot: int | None = None
+    self.stats = {
+      "appended": 0,
+      "flushed": 0,
+      "dropped": 0,
+      "replayed": 0,
+      "flush_errors": 0,
+      "dead_lettered": 0,
+    }
+    self._pool: asyncpg.Pool | None = None
+    self._slot_dir: Path | None = None
+    self._lock_file: IO | None = None
+    # Appends waiting to be written, then durable entries waiting to be flushed
+    self._buffer: list[tuple[QueueEntry, asyncio.Future]] = []
+    self._pending: collections.deque[QueueEntry] = collections.deque()
+    self._seq = 0
+    self._checkpoint = 0
+    self._segment: IO | None = None
+    self._segment_last_seq = 0
+    self._closed_segments: list[tuple[Path, int]] = []
+    self._write_wakeup = asyncio.Event()
+    self._flush_wakeup = asyncio.Event()
+    self._writer_task: asyncio.Task | None = None
+    self._flusher_task: asyncio.Task | None = None
+    self._closing = False
+
+  @property
+  def depth(self) -> int:
+    return len(self._buffer) + len(self._pending)
+
+  async def start(self, pool: asyncpg.Pool):
+    self._pool = pool
+    self._claim_slot()
+    async with pool.acquire() as conn:
+      self._checkpoint = await InventoryLogQueueCheckpoint.get_raw(conn, self.slot)
+    self._seq = self._checkpoint
+    await asyncio.to_thread(self._replay)
+    self._retire_segments()
+    self._open_segment()
+    self._closing = False
+    self._writer_task = asyncio.create_task(self._writer())
+    self._flusher_task = asyncio.create_task(self._flusher())
+    if self._pending:
+      self._flush_wakeup.set()
+
+  async def close(self):
+    if self._writer_task is None:
+      return
+    self._closing = True
+    self._write_wakeup.set()
+    await self._writer_task
+    self._flush_wakeup.set()
+    await self._flusher_task
+    # Whatever is left is on disk and gets replayed on the next start
+    await self._flush()
+    self._writer_task = self._flusher_task = None
+    self._segment.close()
+    self._segment = None
+    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    self._lock_file.close()
+    self._lock_file = None
+
+  async def append(
+    self, chemical_id: int, action_type: str | ActionType, quantity: int
+  ) -> QueueEntry:
+    """Queue a log and wait until it is durable on local disk.
+
+    Raises:
+        HTTPException: 503 if the queue is closed or the write failed.
+    """
+    if self._writer_task is None or self._closing:
+      raise HTTPException(status_code=503, detail="Log queue is not accepting writes")
+    entry = QueueEntry(
+      0,
+      chemical_id,
+      ActionType(action_type).value,
+      quantity,
+      datetime.now(timezone.utc),
+    )
+    future = asyncio.get_running_loop().create_future()
+    self._buffer.append((entry, future))
+    self._write_wakeup.set()
+    await future
+    return entry
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    labels = {"slot": str(self.slot)}
+    samples = [("log_queue_depth", labels, self.depth)]
+    samples += [
+      (f"log_queue_{name}_total", labels, value) for name, value in self.stats.items()
+    ]
+    return samples
+
+  def _claim_slot(self):
+    for slot in range(self.slots):
+      slot_dir = self.directory / f"slot-{slot}"
+      slot_dir.mkdir(parents=True, exist_ok=True)
+      lock_file = open(slot_dir / "lock", "a")
+      try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+      except BlockingIOError:
+        lock_file.close()
+        continue
+      self.slot, self._slot_dir, self._lock_file = slot, slot_dir, lock_file
+      return
+    raise RuntimeError(
+      f"All {self.slots} log queue slots in {self.directory} are in use; "
+      "raise LOG_WRITE_BEHIND_SLOTS"
+    )
+
+  def _replay(self):
+    for path in sorted(self._slot_dir.glob("*.log")):
+      last_seq = self._seq
+      with path.open() as f:
+        for line in f:
+          try:
+            entry = QueueEntry.from_line(line)
+          except (ValueError, KeyError):
+            # A torn last line from a crash mid-write; it was never acknowledged
+            continue
+          last_seq = max(last_seq, entry.seq)
+          if entry.seq > self._checkpoint:
+            self._pending.append(entry)
+      self._seq = max(self._seq, last_seq)
+      self._closed_segments.append((path, last_seq))
+    if self._pending:
+      self.stats["replayed"] += len(self._pending)
+      logger.info(
+        "Replaying %d queued inventory logs from %s", len(self._pending), self._slot_dir
+      )
+
+  def _open_segment(self):
+    path = self._slot_dir / f"{self._seq + 1:020d}.log"
+    # An empty segment left by the previous run may carry the same name
+    self._closed_segments = [seg for seg in self._closed_segments if seg[0] != path]
+    self._segment = open(path, "ab")
+    self._segment_last_seq = self._seq
+
+  def _write(self, data: bytes):
+    offset = self._segment.tell()
+    try:
+      self._segment.write(data)
+      self._segment.flush()
+      os.fsync(self._segment.fileno())
+    except OSError:
+      # Don't leave a partial batch behind for a later replay
+      with contextlib.suppress(OSError):
+        self._segment.truncate(offset)
+      raise
+
+  async def _writer(self):
+    while True:
+      await self._write_wakeup.wait()
+      self._write_wakeup.clear()
+      await self._write_buffered()
+      if self._closing and not self._buffer:
+        return
+
+  async def _write_buffered(self):
+    batch, self._buffer = self._buffer, []
+    if not batch:
+      return
+    first_seq = self._seq
+    for entry, _ in batch:
+      self._seq += 1
+      entry.seq = self._seq
+    try:
+      await asyncio.to_thread(
+        self._write, "".join(entry.to_line() + "\n" for entry, _ in batch).encode()
+      )
+    except OSError as e:
+      logger.error("Could not write to the log queue: %s", e)
+      self._seq = first_seq
+      for _, future in batch:
+        if not future.done():
+          future.set_exception(
+            HTTPException(status_code=503, detail="Could not queue log")
+          )
+      return
+
+    self._segment_last_seq = self._seq
+    self._pending.extend(entry for entry, _ in batch)
+    self.stats["appended"] += len(batch)
+    for _, future in batch:
+      if not future.done():
+        future.set_result(None)
+    if len(self._pending) >= self.batch_size:
+      self._flush_wakeup.set()
+    if self._segment.tell() >= SEGMENT_BYTES:
+      self._closed_segments.append((Path(self._segment.name), self._segment_last_seq))
+      self._segment.close()
+      self._open_segment()
+
+  async def _flusher(self):
+    while not self._closing:
+      with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(self._flush_wakeup.wait(), self.flush_interval)
+      self._flush_wakeup.clear()
+      await self._flush()
+
+  async def _flush(self):
+    while self._pending:
+      batch = [
+        self._pending[i] for i in range(min(self.batch_size, len(self._pending)))
+      ]
+      last_seq = batch[-1].seq
+      dead = 0
+      try:
+        async with self._pool.acquire() as conn:
+          try:
+            async with conn.transaction():
+              inserted = await InventoryLog.create_logs_raw(
+                conn, [_log_row(entry) for entry in batch]
+              )
+              await InventoryLogQueueCheckpoint.save_raw(conn, self.slot, last_seq)
+          except _TRANSIENT_ERRORS:
+            raise
+          except asyncpg.PostgresError as e:
+            logger.warning("Retrying %d queued logs one by one: %s", len(batch), e)
+            inserted, dead = await self._flush_rows(conn, batch, last_seq)
+      except (*_TRANSIENT_ERRORS, asyncpg.PostgresError) as e:
+        # Keep the batch queued and retry on the next interval
+        self.stats["flush_errors"] += 1
+        logger.warning("Could not flush %d queued inventory logs: %s", len(batch), e)
+        return
+
+      for _ in batch:
+        self._pending.popleft()
+      self._checkpoint = last_seq
+      self.stats["flushed"] += inserted
+      self.stats["dead_lettered"] += dead
+      dropped = len(batch) - inserted - dead
+      if dropped:
+        self.stats["dropped"] += dropped
+        logger.warning("Dropped %d queued logs of deleted chemicals", dropped)
+      self._retire_segments()
+
+  async def _flush_rows(
+    self, conn: asyncpg.Connection, batch: list[QueueEntry], last_seq: int
+  ) -> tuple[int, int]:
+    """Insert `batch` row by row, dead-lettering the rows Postgres rejects.
+
+    Returns:
+        tuple[int, int]: Numbers of logs inserted and dead-lettered.
+    """
+    inserted = 0
+    dead: list[tuple[QueueEntry, Exception]] = []
+    async with conn.transaction():
+      for entry in batch:
+        try:
+          async with conn.transaction():
+            inserted += await InventoryLog.create_logs_raw(conn, [_log_row(entry)])
+        except _TRANSIENT_ERRORS:
+          raise
+        except asyncpg.PostgresError as e:
+          dead.append((entry, e))
+      # Written before the checkpoint commits; a failed commit only means the
+      # same entries are dead-lettered again on the retry
+      if dead:
+        await asyncio.to_thread(self._dead_letter, dead)
+      await InventoryLogQueueCheckpoint.save_raw(conn, self.slot, last_seq)
+    return inserted, len(dead)
+
+  def _dead_letter(self, dead: list[tuple[QueueEntry, Exception]]):
+    for entry, error in dead:
+      logger.error("Dead-lettering queued log %d: %s", entry.seq, error)
+    lines = "".join(
+      json.dumps({**json.loads(entry.to_line()), "error": str(error)}) + "\n"
+      for entry, error in dead
+    )
+    with (self._slot_dir / DEAD_LETTER_FILE).open("a") as f:
+      f.write(lines)
+      f.flush()
+      os.fsync(f.fileno())
+
+  def _retire_segments(self):
+    retired = [seg for seg in self._closed_segments if seg[1] <= self._checkpoint]
+    for path, _ in retired:
+      with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+    self._closed_segments = [
+      seg for seg in self._closed_segments if seg[1] > self._checkpoint
+    ]
+
+
+log_queue = LogQueue(
+  Path(settings.LOG_WRITE_BEHIND_DIR),
+  batch_size=settings.LOG_WRITE_BEHIND_BATCH_SIZE,
+  flush_interval=settings.LOG_WRITE_BEHIND_FLUSH_INTERVAL,
+  slots=settings.LOG_WRITE_BEHIND_SLOTS,
+  enabled=settings.LOG_WRITE_BEHIND,
+)
@@ -1,15 +1,44 @@
+import re
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
 
 import asyncpg
 from fastapi import HTTPException
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, func, select
-from sqlalchemy.exc import NoResultFound
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+  BigInteger,
+  DateTime,
+  Enum,
+  ForeignKey,
+  Index,
+  Integer,
+  String,
+  func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src import statements
+from src.cache import cache
+from src.chemical import queries
+from src.conditional import digest_etag, if_match_versions, version_etag
 from src.database import Base
 from src.models import TimestampMixin
+from src.pagination import CountStrategy, decode_cursor, encode_cursor
+from src.replicas import reads_from_cache, writes_to_cache
+
+# CAS registry numbers: 2-7 digits, 2 digits and a check digit, hyphenated
+_CAS_PATTERN = re.compile(r"^0*(\d{2,7})-?(\d{2})-?(\d)$")
+
+
+def normalize_cas(value: str) -> str:
+  """Canonical form of a CAS number, e.g. " 0007732 18 5" -> "7732-18-5".
+
+  Whitespace and leading zeros are dropped and the hyphens restored. Values
+  that don't look like a CAS number are only stripped of whitespace. Keep in
+  step with the backfill in the pg_trgm search migration.
+  """
+  value = "".join(value.split())
+  match = _CAS_PATTERN.match(value)
+  return "-".join(match.groups()) if match else value
 
 
 class ActionType(str, PyEnum):
@@ -18,6 +47,11 @@ class ActionType(str, PyEnum):
   update = "update"
 
 
+class UsageInterval(str, PyEnum):
+  hour = "hour"
+  day = "day"
+
+
 class Chemical(TimestampMixin, Base):
   __tablename__ = "chemicals"
 
@@ -28,6 +62,10 @@ class Chemical(TimestampMixin, Base):
   cas_number: Mapped[str] = mapped_column(String(100), nullable=False)
   quantity: Mapped[int] = mapped_column(nullable=False)
   unit: Mapped[str] = mapped_column(String(10), nullable=False)
+  # Number of inventory log rows for this chemical, kept in step by every
+  # statement that inserts or archives logs so the logs endpoint can report
+  # totals in O(1).
+  log_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
   inventory_logs: Mapped[list["InventoryLog"]] = relationship(
     "InventoryLog",
     back_populates="chemical",
@@ -38,106 +76,618 @@ class Chemical(TimestampMixin, Base):
     return f"Chemical id={self.id} name={self.name} cas_number={self.cas_number}"
 
   @classmethod
-  async def create(cls, db: AsyncSession, **kwargs):
-    async with db.begin():  # atomic transaction
-      chemical = cls(**kwargs)
-      db.add(chemical)
-      await db.flush()
-      # create log in same session
-      await InventoryLog.create_log(
-        db=db,
-        chemical_id=chemical.id,
-        action_type=ActionType.add,
-        quantity=chemical.quantity,
-        is_atomic=True,
+  async def create_raw(
+    cls, pool: asyncpg.Pool, name: str, cas_number: str, quantity: int, unit: str
+  ):
+    """Insert a chemical and its `add` log in a single statement.
+
+    Timestamps come from the database and are read back with RETURNING, so
+    the request costs one round-trip.
+    """
+    query = """
+            WITH created AS (
+                INSERT INTO chemicals (name, cas_number, quantity, unit, log_count,
+                                       created_at, updated_at)
+                    VALUES ($1, $2, $3, $4, 1, now(), now())
+                    RETURNING id, name, cas_number, quantity, unit,
+                        created_at, updated_at
+            ),
+            logged AS (
+                INSERT INTO inventory_logs (chemical_id, action_type, quantity,
+                                            timestamp)
+                    SELECT id, 'add', quantity, now()
+                    FROM created
+            )
+            SELECT *
+            FROM created
+            """
+    async with pool.acquire() as conn:
+      row = await conn.fetchrow(query, name, normalize_cas(cas_number), quantity, unit)
+    return dict(row)
+
+  @classmethod
+  async def update_raw(
+    cls,
+    pool: asyncpg.Pool,
+    chemical_id: int,
+    name: str,
+    cas_number: str,
+    quantity: int,
+    unit: str,
+    if_match: str | None = None,
+  ):
+    """Update a chemical and record an `update` log in a single statement.
+
+    The If-Match check is part of the UPDATE's WHERE clause, which Postgres
+    re-checks against the latest row version when a concurrent update wins
+    the row lock, so no separate locking read is needed.
+
+    Raises:
+        HTTPException: 404 if the chemical does not exist, 412 if `if_match`
+            does not match its current ETag.
+    """
+    versions = (
+      if_match_versions(if_match, chemical_id) if if_match is not None else None
+    )
+    query = """
+            WITH current AS (
+                SELECT id
+                FROM chemicals
+                WHERE id = $1
+            ),
+            updated AS (
+                UPDATE chemicals
+                    SET name = $2,
+                        cas_number = $3,
+                        quantity = $4,
+                        unit = $5,
+                        log_count = log_count + 1,
+                        updated_at = now()
+                    WHERE id = $1
+                        AND ($6::timestamptz[] IS NULL OR updated_at = ANY ($6))
+                    RETURNING id, name, cas_number, quantity, unit,
+                        created_at, updated_at
+            ),
+            logged AS (
+                INSERT INTO inventory_logs (chemical_id, action_type, quantity,
+                                            timestamp)
+                    SELECT id, 'update', quantity, now()
+                    FROM updated
+            )
+            SELECT u.*
+            FROM current c
+                     LEFT JOIN updated u ON true
+            """
+    async with pool.acquire() as conn:
+      row = await conn.fetchrow(
+        query,
+        chemical_id,
+        name,
+        normalize_cas(cas_number),
+        quantity,
+        unit,
+        versions,
       )
-    await db.refresh(chemical)
+    if row is None:
+      raise HTTPException(status_code=404, detail="Chemical not found")
+    if row["id"] is None:
+      raise HTTPException(status_code=412, detail="Chemical has been modified")
 
-    return chemical
+    await cache.delete(cls.cache_key(chemical_id))
+    return dict(row)
 
   @classmethod
-  async def get(cls, db: AsyncSession, id: int):
-    try:
-      transaction = await db.get(cls, id)
-    except NoResultFound:
-      return None
-    return transaction
+  async def delete_raw(cls, pool: asyncpg.Pool, chemical_id: int):
+    """Delete a chemical and its inventory logs in a single statement.
+
+    Both DELETEs run in one statement, so the foreign key is checked once
+    the logs are already gone. Rollup rows are removed by their ON DELETE
+    CASCADE.
+
+    Raises:
+        HTTPException: 404 if the chemical does not exist.
+    """
+    query = """
+            WITH removed_logs AS (
+                DELETE FROM inventory_logs
+                    WHERE chemical_id = $1
+            )
+            DELETE
+            FROM chemicals
+            WHERE id = $1
+            RETURNING name
+            """
+    async with pool.acquire() as conn:
+      name = await conn.fetchval(query, chemical_id)
+    if name is None:
+      raise HTTPException(status_code=404, detail="Chemical not found")
+
+    await cache.delete(cls.cache_key(chemical_id))
+    return {"message": f"Chemical with id {name} deleted successfully"}
 
   @classmethod
-  async def get_all(cls, db: AsyncSession, limit: int = 10, offset: int = 0):
-    total_result = await db.execute(select(func.count()).select_from(cls))
-    total = total_result.scalar()
+  async def get_all_raw(
+    cls,
+    pool: asyncpg.Pool,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    count: CountStrategy = CountStrategy.exact,
+  ):
+    """Fetch a page of chemicals ordered by id using a raw asyncpg query.
+
+    When `cursor` is given the page is resolved with a keyset predicate on
+    `id` and `offset` is ignored, so deep pages cost the same as the first one.
+    `count` selects how `total` is computed, see `CountStrategy`.
+    """
+    query, args, offset = cls._page_query(
+      "id, name, cas_number, quantity, unit, created_at, updated_at",
+      limit,
+      offset,
+      cursor,
+    )
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, *args)
+      total = await cls.count_raw(conn, count)
 
-    # Get paginated results
-    result = await db.execute(select(cls).limit(limit).offset(offset))
-    chemicals = result.scalars().all()
+    next_cursor = None
+    if len(rows) == limit:
+      next_cursor = encode_cursor(rows[-1]["id"])
 
     return {
       "total": total,
       "limit": limit,
       "offset": offset,
-      "results": chemicals,
+      "next_cursor": next_cursor,
+      "results": [dict(row) for row in rows],
     }
 
+  @staticmethod
+  def _page_query(
+    columns: str, limit: int, offset: int, cursor: str | None
+  ) -> tuple[str, tuple, int]:
+    select_clause = f"""
+            SELECT {columns}
+            FROM chemicals
+            """
+    if cursor is not None:
+      (last_id,) = decode_cursor(cursor, int)
+      query = select_clause + "WHERE id > $2 ORDER BY id LIMIT $1"
+      return query, (limit, last_id), 0
+    query = select_clause + "ORDER BY id LIMIT $1 OFFSET $2"
+    return query, (limit, offset), offset
+
   @classmethod
-  async def update(cls, db: AsyncSession, chemical_id: int, **kwargs):
-    async with db.begin():
-      obj = await db.get(cls, chemical_id)
-      if not obj:
-        raise HTTPException(status_code=404, detail="Chemical not found")
-
-      for key, value in kwargs.items():
-        setattr(obj, key, value)
-      db.add(obj)
-      await db.flush()
-      # create log in same session
-      await InventoryLog.create_log(
-        db=db,
-        chemical_id=obj.id,
-        action_type=ActionType.update,
-        quantity=obj.quantity,
-        is_atomic=True,
+  async def get_page_etag_raw(
+    cls,
+    pool: asyncpg.Pool,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    count: CountStrategy = CountStrategy.exact,
+  ) -> str:
+    """ETag of the page `get_all_raw` would return, without fetching it.
+
+    Only (id, updated_at) of the page rows are read, which the covering index
+    serves with an index-only scan, plus the same `total`.
+    """
+    query, args, _ = cls._page_query("id, updated_at", limit, offset, cursor)
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, *args)
+      total = await cls.count_raw(conn, count)
+    return digest_etag(
+      [total, *(version_etag(row["id"], row["updated_at"]) for row in rows)]
+    )
+
+  @staticmethod
+  def etag(chemical_id: int, updated_at: datetime) -> str:
+    return version_etag(chemical_id, updated_at)
+
+  @classmethod
+  async def get_version_raw(cls, pool: asyncpg.Pool, chemical_id: int) -> datetime:
+    """`updated_at` of a chemical, from the cache when possible.
+
+    Raises:
+        HTTPException: 404 if the chemical does not exist.
+    """
+    if reads_from_cache(pool):
+      cached = await cache.get(cls.cache_key(chemical_id))
+      if cached is not None:
+        return cached["updated_at"]
+    async with pool.acquire() as conn:
+      updated_at = await conn.fetchval(
+        "SELECT updated_at FROM chemicals WHERE id = $1", chemical_id
       )
-    await db.refresh(obj)
-    return obj
-
-  @classmethod
-  async def delete(cls, db: AsyncSession, chemical_id: int):
-    async with db.begin():
-      obj = await db.get(cls, chemical_id)
-
-      if not obj:
-        raise HTTPException(status_code=404, detail="Chemical not found")
-      obj_name = obj.name
-      await InventoryLog.create_log(
-        db=db,
-        chemical_id=obj.id,
-        action_type=ActionType.remove,
-        quantity=obj.quantity,
-        is_atomic=True,
+    if updated_at is None:
+      raise HTTPException(status_code=404, detail="Chemical not found")
+    return updated_at
+
+  @classmethod
+  async def count_raw(cls, conn: asyncpg.Connection, strategy: CountStrategy):
+    if strategy == CountStrategy.none:
+      return None
+    if strategy == CountStrategy.estimated:
+      # reltuples is refreshed by autovacuum/ANALYZE; -1 means never analyzed
+      estimate = await conn.fetchval(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = 'chemicals'::regclass"
       )
-      await db.delete(obj)
-    return {"message": f"Chemical with id {obj_name} deleted successfully"}
+      if estimate is not None and estimate >= 0:
+        return estimate
+    return await conn.fetchval("SELECT COUNT(*) FROM chemicals")
 
   @classmethod
-  async def get_by_id_raw(cls, pool: asyncpg.Pool, chemical_id: int):
+  async def search_raw(
+    cls,
+    pool: asyncpg.Pool,
+    q: str,
+    limit: int = 10,
+    cursor: str | None = None,
+  ):
+    """Rank chemicals by how well their name or CAS number matches `q`.
+
+    An exact match on the normalized CAS number scores highest, then names
+    starting with `q`, then names containing it; trigram similarity to the
+    name breaks ties and admits misspellings. Candidates come from the btree
+    index on `cas_number` and the trigram GIN index on `name`.
+
+    Results are ordered by (score DESC, id) and paginated with a keyset cursor
+    on that pair.
+    """
+    escaped = re.sub(r"([\\%_])", r"\\\1", q)
+    query = """
+            SELECT id, name, cas_number, quantity, unit, created_at, updated_at,
+                   score
+            FROM (SELECT *,
+                         (CASE WHEN cas_number = $2 THEN 3 ELSE 0 END
+                             + CASE WHEN name ILIKE $3 || '%' THEN 2 ELSE 0 END
+                             + CASE WHEN name ILIKE '%' || $3 || '%' THEN 1 ELSE 0 END
+                             + similarity(name, $1))::float8 AS score
+                  FROM chemicals
+                  WHERE cas_number = $2
+                     OR name ILIKE '%' || $3 || '%'
+                     OR name % $1) ranked
+            """
+    args = [q, normalize_cas(q), escaped, limit]
+    if cursor is not None:
+      last_score, last_id = decode_cursor(cursor, float, int)
+      query += "WHERE score < $5 OR (score = $5 AND id > $6)\n"
+      args += [last_score, last_id]
+    query += "ORDER BY score DESC, id LIMIT $4"
+
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, *args)
+
+    next_cursor = None
+    if len(rows) == limit:
+      next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+
+    return {
+      "limit": limit,
+      "next_cursor": next_cursor,
+      "results": [dict(row) for row in rows],
+    }
+
+  @classmethod
+  async def lookup_raw(
+    cls,
+    pool: asyncpg.Pool,
+    cas_number: str | None,
+    unit: str | None,
+    limit: int = 10,
+    after_id: int = 0,
+  ):
+    """Chemicals with the given CAS number and/or unit, in id order after `after_id`.
+
+    Same results as `InventorySnapshot.lookup`, from the cas_number and
+    (unit, id) indexes.
+    """
     query = """
             SELECT id, name, cas_number, quantity, unit, created_at, updated_at
             FROM chemicals
-            WHERE id = $1 \
+            WHERE ($1::text IS NULL OR cas_number = $1)
+              AND ($2::text IS NULL OR unit = $2)
+              AND id > $3
+            ORDER BY id
+                LIMIT $4
             """
     async with pool.acquire() as conn:
-      row = await conn.fetchrow(query, chemical_id)
+      return await conn.fetch(
+        query, cas_number, unit, after_id, limit, record_class=statements.Row
+      )
+
+  @staticmethod
+  def cache_key(chemical_id: int) -> str:
+    return f"chemical:{chemical_id}"
 
-    if not row:
+  @classmethod
+  async def get_by_id_raw(cls, pool: asyncpg.Pool, chemical_id: int):
+    """Fetch a chemical by id, reading through the shared cache.
+
+    Requests that need read-your-writes skip the cache, and rows read from a
+    replica that may lag are not cached. Neither is a row whose key was
+    invalidated while it was being read, as it may predate that write.
+    """
+    key = cls.cache_key(chemical_id)
+    if reads_from_cache(pool):
+      cached = await cache.get(key)
+      if cached is not None:
+        return cached
+
+    generation = cache.generation(key)
+    async with pool.acquire() as conn:
+      chemical = await statements.fetchrow(conn, queries.CHEMICAL_BY_ID, chemical_id)
+
+    if not chemical:
       raise HTTPException(status_code=404, detail="Chemical not found")
 
-    # Convert asyncpg Record to dict
-    return dict(row)
+    if writes_to_cache(pool) and cache.generation(key) == generation:
+      await cache.set(key, chemical)
+    return chemical
+
+  @classmethod
+  async def get_many_raw(cls, pool: asyncpg.Pool, ids: list[int], logs: int = 0):
+    """Fetch several chemicals and their latest `logs` log entries in one query.
+
+    Results follow the order of `ids` (duplicates collapsed); ids without a
+    chemical are returned in `missing`.
+    """
+    ids = list(dict.fromkeys(ids))
+    query = """
+            SELECT c.id,
+                   c.name,
+                   c.cas_number,
+                   c.quantity,
+                   c.unit,
+                   c.created_at,
+                   c.updated_at,
+                   l.id       AS log_id,
+                   l.action_type,
+                   l.quantity AS log_quantity,
+                   l.timestamp
+            FROM unnest($1::int[]) WITH ORDINALITY AS r(id, ord)
+                     JOIN chemicals c ON c.id = r.id
+                     LEFT JOIN LATERAL (
+                SELECT il.id, il.action_type, il.quantity, il.timestamp
+                FROM inventory_logs il
+                WHERE il.chemical_id = c.id
+                ORDER BY il.timestamp DESC, il.id DESC
+                LIMIT $2
+                ) l ON true
+            ORDER BY r.ord, l.timestamp DESC, l.id DESC
+            """
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, ids, logs)
+
+    chemicals: dict[int, dict] = {}
+    for row in rows:
+      chemical = chemicals.get(row["id"])
+      if chemical is None:
+        chemical = chemicals[row["id"]] = {
+          "id": row["id"],
+          "name": row["name"],
+          "cas_number": row["cas_number"],
+          "quantity": row["quantity"],
+          "unit": row["unit"],
+          "created_at": row["created_at"],
+          "updated_at": row["updated_at"],
+          "logs": [],
+        }
+      if row["log_id"] is not None:
+        chemical["logs"].append(
+          {
+            "id": row["log_id"],
+            "action_type": row["action_type"],
+            "quantity": row["log_quantity"],
+            "timestamp": row["timestamp"],
+            "chemical_id": row["id"],
+          }
+        )
+
+    return {
+      "results": list(chemicals.values()),
+      "missing": [chemical_id for chemical_id in ids if chemical_id not in chemicals],
+    }
+
+  @classmethod
+  async def apply_movement(
+    cls,
+    pool: asyncpg.Pool,
+    chemical_id: int,
+    action_type: str | ActionType,
+    quantity: int,
+    allow_negative: bool = False,
+  ):
+    """Atomically add or remove stock and record the movement.
+
+    The quantity change and the inventory log insert run as a single
+    UPDATE ... RETURNING / INSERT statement, so concurrent movements never lose
+    updates and the row lock is only held for that one statement.
+
+    Raises:
+        HTTPException: 404 if the chemical does not exist, 409 if the movement
+            would make the quantity negative and `allow_negative` is False.
+    """
+    action_type = ActionType(action_type)
+    delta = quantity if action_type == ActionType.add else -quantity
+    query = """
+            WITH moved AS (
+                UPDATE chemicals
+                    SET quantity = quantity + $2,
+                        log_count = log_count + 1,
+                        updated_at = now()
+                    WHERE id = $1
+                        AND ($3 OR quantity + $2 >= 0)
+                    RETURNING id, name, cas_number, quantity, unit,
+                        created_at, updated_at
+            ),
+            logged AS (
+                INSERT INTO inventory_logs (chemical_id, action_type, quantity,
+                                            timestamp)
+                    SELECT id, $4, $5, now()
+                    FROM moved
+                    RETURNING id, action_type, quantity, timestamp, chemical_id
+            )
+            SELECT m.id, m.name, m.cas_number, m.quantity, m.unit,
+                   m.created_at, m.updated_at,
+                   l.id AS log_id, l.action_type, l.quantity AS log_quantity,
+                   l.timestamp
+            FROM moved m
+                     JOIN logged l ON l.chemical_id = m.id
+            """
+    async with pool.acquire() as conn:
+      row = await conn.fetchrow(
+        query, chemical_id, delta, allow_negative, action_type.value, quantity
+      )
+      if row is None:
+        current = await conn.fetchval(
+          "SELECT quantity FROM chemicals WHERE id = $1", chemical_id
+        )
+        if current is None:
+          raise HTTPException(status_code=404, detail="Chemical not found")
+        raise HTTPException(status_code=409, detail="Insufficient stock")
+
+    await cache.delete(cls.cache_key(chemical_id))
+    return {
+      "chemical": {
+        key: row[key]
+        for key in (
+          "id",
+          "name",
+          "cas_number",
+          "quantity",
+          "unit",
+          "created_at",
+          "updated_at",
+        )
+      },
+      "log": {
+        "id": row["log_id"],
+        "action_type": row["action_type"],
+        "quantity": row["log_quantity"],
+        "timestamp": row["timestamp"],
+        "chemical_id": row["id"],
+      },
+    }
+
+  @classmethod
+  async def apply_movements(
+    cls,
+    pool: asyncpg.Pool,
+    movements: list[tuple[int, str | ActionType, int]],
+    atomic: bool = True,
+    allow_negative: bool = False,
+  ):
+    """Apply a batch of (chemical_id, action_type, quantity) movements.
+
+    The touched chemicals are locked once in id order, every movement is
+    checked in request order against the running quantity, and the accepted
+    ones are written with a single multi-row log INSERT plus one aggregated
+    quantity UPDATE per chemical. The whole batch costs four round-trips
+    regardless of its size.
+
+    Args:
+        pool (asyncpg.Pool): Database connection pool.
+        movements (list[tuple[int, str | ActionType, int]]): Movements to apply.
+        atomic (bool, optional): If True nothing is written when any movement
+            is rejected; otherwise only the rejected movements are skipped.
+        allow_negative (bool, optional): Accept movements that make a
+            quantity negative.
+
+    Returns:
+        list[dict]: One result per movement, in request order.
+    """
+    chemical_ids = sorted({chemical_id for chemical_id, _, _ in movements})
+    results = []
+    accepted = []
+    async with pool.acquire() as conn:
+      async with conn.transaction():
+        rows = await conn.fetch(
+          """
+          SELECT id, quantity
+          FROM chemicals
+          WHERE id = ANY ($1::int[])
+          ORDER BY id
+              FOR UPDATE
+          """,
+          chemical_ids,
+        )
+        stock = {row["id"]: row["quantity"] for row in rows}
+
+        for index, (chemical_id, action_type, quantity) in enumerate(movements):
+          action_type = ActionType(action_type)
+          result = {"index": index, "chemical_id": chemical_id, "status": "applied"}
+          results.append(result)
+          if chemical_id not in stock:
+            result.update(status="rejected", error="Chemical not found")
+            continue
+          delta = quantity if action_type == ActionType.add else -quantity
+          if not allow_negative and stock[chemical_id] + delta < 0:
+            result.update(status="rejected", error="Insufficient stock")
+            continue
+          stock[chemical_id] += delta
+          result["quantity"] = stock[chemical_id]
+          accepted.append((result, action_type, quantity, delta))
+
+        rejected = len(results) - len(accepted)
+        if atomic and rejected:
+          for result, _, _, _ in accepted:
+            result.update(status="skipped", quantity=None)
+          return results
+        if not accepted:
+          return results
+
+        deltas: dict[int, list[int]] = {}
+        for result, _, _, delta in accepted:
+          totals = deltas.setdefault(result["chemical_id"], [0, 0])
+          totals[0] += delta
+          totals[1] += 1
+        # INSERT ... RETURNING can't tell which input row a log came from, so
+        # the ids are drawn per input position first and inserted explicitly
+        log_ids = await conn.fetch(
+          """
+          WITH moved AS (
+              UPDATE chemicals c
+                  SET quantity = c.quantity + d.delta,
+                      log_count = c.log_count + d.n,
+                      updated_at = now()
+                  FROM unnest($4::int[], $5::int[], $6::int[]) AS d(id, delta, n)
+                  WHERE c.id = d.id
+          ),
+               numbered AS (
+                   SELECT nextval('inventory_logs_id_seq') AS id, m.*
+                   FROM unnest($1::int[], $2::text[], $3::int[]) WITH ORDINALITY
+                            AS m(chemical_id, action_type, quantity, ord)
+               ),
+               logged AS (
+                   INSERT
+                   INTO inventory_logs (id, chemical_id, action_type, quantity,
+                                        timestamp)
+                   SELECT id, chemical_id, action_type, quantity, now()
+                   FROM numbered
+               )
+          SELECT ord, id
+          FROM numbered
+          """,
+          [result["chemical_id"] for result, _, _, _ in accepted],
+          [action_type.value for _, action_type, _, _ in accepted],
+          [quantity for _, _, quantity, _ in accepted],
+          list(deltas),
+          [totals[0] for totals in deltas.values()],
+          [totals[1] for totals in deltas.values()],
+        )
+
+    log_id_by_position = {row["ord"]: row["id"] for row in log_ids}
+    for position, (result, _, _, _) in enumerate(accepted, start=1):
+      result["log_id"] = log_id_by_position[position]
+    await cache.delete(*(cls.cache_key(chemical_id) for chemical_id in deltas))
+    return results
 
 
 class InventoryLog(Base):
   __tablename__ = "inventory_logs"
+  # Monthly range partitions on timestamp, created ahead of time by
+  # src.chemical.partitions; the partition key has to be part of the primary key.
+  __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
   id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement=True)
   chemical_id: Mapped[int] = mapped_column(ForeignKey("chemicals.id"))
@@ -146,7 +696,10 @@ class InventoryLog(Base):
   )
   quantity: Mapped[int] = mapped_column(nullable=False)
   timestamp: Mapped[datetime] = mapped_column(
-    DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    DateTime(timezone=True),
+    primary_key=True,
+    default=lambda: datetime.now(timezone.utc),
+    nullable=False,
   )
 
   chemical: Mapped["Chemical"] = relationship(
@@ -155,58 +708,347 @@ class InventoryLog(Base):
   )
 
   @classmethod
-  async def create_log(
+  async def create_log_raw(
     cls,
-    db: AsyncSession,
+    pool: asyncpg.Pool,
     chemical_id: int,
     action_type: str | ActionType,
     quantity: int,
-    is_atomic: bool = False,
   ):
-    # Convert string to enum if needed
-    if isinstance(action_type, str):
-      action_type = ActionType(action_type)
+    """Insert a log and bump the chemical's log counter in a single statement.
 
-    log_entry = cls(chemical_id=chemical_id, action_type=action_type, quantity=quantity)
-    db.add(log_entry)
-    if not is_atomic:
-      await db.commit()
-      await db.refresh(log_entry)
+    The foreign key doubles as the existence check. The cached chemical is
+    left alone: neither its fields nor its updated_at change.
 
-    return log_entry
+    Raises:
+        HTTPException: 404 if the chemical does not exist.
+    """
+    query = """
+            WITH counted AS (
+                UPDATE chemicals
+                    SET log_count = log_count + 1
+                    WHERE id = $1
+            )
+            INSERT
+            INTO inventory_logs (chemical_id, action_type, quantity, timestamp)
+            VALUES ($1, $2, $3, now())
+            RETURNING id, action_type, quantity, timestamp, chemical_id
+            """
+    try:
+      async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+          query, chemical_id, ActionType(action_type).value, quantity
+        )
+    except asyncpg.ForeignKeyViolationError:
+      raise HTTPException(status_code=404, detail="Chemical not found")
+    return dict(row)
 
   @classmethod
-  async def get_logs_by_chemical_raw(
-    cls, pool: asyncpg.Pool, chemical_id: int, limit: int = 10, offset: int = 0
+  async def create_logs_raw(
+    cls,
+    conn: asyncpg.Connection,
+    logs: list[tuple[int, str, int, datetime]],
+  ) -> int:
+    """Insert (chemical_id, action_type, quantity, timestamp) logs in one statement.
+
+    The chemicals' log counters are bumped in the same statement. Logs of
+    chemicals that no longer exist are skipped.
+
+    Returns:
+        int: Number of logs inserted.
+    """
+    status = await conn.execute(
+      """
+      WITH logs AS (
+          SELECT m.chemical_id, m.action_type, m.quantity, m.timestamp
+          FROM unnest($1::int[], $2::text[], $3::int[], $4::timestamptz[])
+                   AS m(chemical_id, action_type, quantity, timestamp)
+                   JOIN chemicals c ON c.id = m.chemical_id
+      ),
+      counted AS (
+          UPDATE chemicals c
+              SET log_count = c.log_count + n.n
+              FROM (SELECT chemical_id, COUNT(*) AS n
+                    FROM logs
+                    GROUP BY chemical_id) n
+              WHERE c.id = n.chemical_id
+      )
+      INSERT
+      INTO inventory_logs (chemical_id, action_type, quantity, timestamp)
+      SELECT chemical_id, action_type, quantity, timestamp
+      FROM logs
+      """,
+      [log[0] for log in logs],
+      [log[1] for log in logs],
+      [log[2] for log in logs],
+      [log[3] for log in logs],
+    )
+    return int(status.split()[-1])
+
+  @classmethod
+  async def get_log_events_after_raw(
+    cls,
+    pool: asyncpg.Pool,
+    after_id: int,
+    chemical_ids: list[int] | None = None,
+    limit: int = 1000,
   ):
-    """Fetch logs for a chemical using a raw asyncpg query."""
+    """Logs with an id above `after_id`, oldest first, as change-feed events.
+
+    The payload is built in SQL exactly like the NOTIFY payload of the
+    `inventory_logs_notify_change` trigger, so replayed and live events look
+    the same to clients.
+    """
     query = """
-            SELECT il.id,
-                   il.action_type,
-                   il.quantity,
-                   il.timestamp,
-                   c.id AS chemical_id,
-                   c.name,
-                   c.cas_number,
-                   c.unit
-            FROM inventory_logs il
-                     JOIN chemicals c ON il.chemical_id = c.id
-            WHERE il.chemical_id = $1
-            ORDER BY il.timestamp DESC
-                LIMIT $2
-            OFFSET $3
+            SELECT id,
+                   chemical_id,
+                   json_build_object(
+                       'type', 'log',
+                       'id', id,
+                       'chemical_id', chemical_id,
+                       'action_type', action_type,
+                       'quantity', quantity,
+                       'timestamp', timestamp
+                   )::text AS payload
+            FROM inventory_logs
+            WHERE id > $1
+              AND ($2::int[] IS NULL OR chemical_id = ANY ($2::int[]))
+            ORDER BY id
+            LIMIT $3
             """
-    count_query = """
-                  SELECT COUNT(*)
-                  FROM inventory_logs
-                  WHERE chemical_id = $1 \
-                  """
-    async with pool.acquire() as conn:
-      rows = await conn.fetch(query, chemical_id, limit, offset)
-      total = await conn.fetchval(count_query, chemical_id)
+    async with pool.acquire() as conn:
+      return await conn.fetch(query, after_id, chemical_ids, limit)
+
+  @classmethod
+  async def get_logs_by_chemical_raw(
+    cls,
+    pool: asyncpg.Pool,
+    chemical_id: int,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    count: CountStrategy = CountStrategy.exact,
+  ):
+    """Fetch logs for a chemical using a raw asyncpg query.
+
+    Logs are ordered newest first on (timestamp, id). When `cursor` is given the
+    page starts right after the row it encodes and `offset` is ignored.
+    With `count=estimated` the total is read from `chemicals.log_count`
+    instead of counting the chemical's log rows. The page and the total are
+    read on the same connection, so a request holds one pool connection.
+    """
+    if cursor is not None:
+      last_timestamp, last_id = decode_cursor(cursor, datetime, int)
+      page = (queries.LOGS_PAGE_AFTER, chemical_id, limit, last_timestamp, last_id)
+      offset = 0
+    else:
+      page = (queries.LOGS_PAGE, chemical_id, limit, offset)
+
+    total = None
+    async with pool.acquire() as conn:
+      rows = await statements.fetch(conn, *page)
+      if count != CountStrategy.none:
+        count_statement = (
+          queries.LOGS_COUNT
+          if count == CountStrategy.exact
+          else queries.LOGS_COUNT_ESTIMATED
+        )
+        total = await statements.fetchval(conn, count_statement, chemical_id)
+
+    next_cursor = None
+    if len(rows) == limit:
+      next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
     return {
       "total": total,
       "limit": limit,
       "offset": offset,
+      "next_cursor": next_cursor,
+      "results": rows,
+    }
+
+  @classmethod
+  async def get_usage_raw(
+    cls,
+    pool: asyncpg.Pool,
+    chemical_id: int,
+    interval: UsageInterval,
+    since: datetime,
+    until: datetime,
+  ):
+    """Per-bucket added/removed quantities and update counts of one chemical.
+
+    Served from the rollup table of the requested interval; buckets are UTC
+    and buckets without activity are omitted. `since` is rounded down to the
+    start of its bucket, `until` is exclusive.
+
+    Raises:
+        HTTPException: 404 if the chemical does not exist.
+    """
+    table = USAGE_TABLES[interval].__tablename__
+    query = f"""
+            SELECT bucket,
+                   added,
+                   removed,
+                   updates,
+                   added - removed AS net,
+                   log_count       AS logs
+            FROM {table}
+            WHERE chemical_id = $1
+              AND bucket >= date_trunc($2, $3::timestamptz, 'UTC')
+              AND bucket < $4
+            ORDER BY bucket
+            """
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, chemical_id, interval.value, since, until)
+      if not rows:
+        exists = await conn.fetchval(
+          "SELECT EXISTS(SELECT 1 FROM chemicals WHERE id = $1)", chemical_id
+        )
+        if not exists:
+          raise HTTPException(status_code=404, detail="Chemical not found")
+
+    return {
+      "chemical_id": chemical_id,
+      "interval": interval,
+      "since": since,
+      "until": until,
       "results": [dict(row) for row in rows],
     }
+
+  @classmethod
+  async def get_usage_summary_raw(
+    cls, pool: asyncpg.Pool, since: datetime, until: datetime, limit: int = 10
+  ):
+    """Chemicals with the most stock removed between `since` and `until`.
+
+    Totals are summed from the daily rollup, so the window is widened to whole
+    UTC days.
+    """
+    query = """
+            SELECT c.id AS chemical_id,
+                   c.name,
+                   c.cas_number,
+                   c.unit,
+                   c.quantity,
+                   s.added,
+                   s.removed,
+                   s.updates,
+                   s.added - s.removed AS net,
+                   s.logs
+            FROM (SELECT chemical_id,
+                         SUM(added)::bigint     AS added,
+                         SUM(removed)::bigint   AS removed,
+                         SUM(updates)::bigint   AS updates,
+                         SUM(log_count)::bigint AS logs
+                  FROM inventory_usage_daily
+                  WHERE bucket >= date_trunc('day', $1::timestamptz, 'UTC')
+                    AND bucket < $2
+                  GROUP BY chemical_id) s
+                     JOIN chemicals c ON c.id = s.chemical_id
+            ORDER BY s.removed DESC, c.id
+            LIMIT $3
+            """
+    async with pool.acquire() as conn:
+      rows = await conn.fetch(query, since, until, limit)
+
+    return {
+      "since": since,
+      "until": until,
+      "results": [dict(row) for row in rows],
+    }
+
+
+class UsageRollupMixin:
+  """Net stock movement of a chemical within one UTC time bucket.
+
+  Rows are maintained by the `inventory_logs_usage_rollup` trigger, which
+  aggregates every INSERT into inventory_logs in the same transaction. Logs are
+  append-only, so deleting log rows directly does not adjust the rollups.
+  """
+
+  chemical_id: Mapped[int] = mapped_column(
+    ForeignKey("chemicals.id", ondelete="CASCADE"), primary_key=True
+  )
+  bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+  added: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+  removed: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+  # Number of 'update' logs; they carry the new absolute quantity, not a change
+  updates: Mapped[int] = mapped_column(server_default="0", nullable=False)
+  log_count: Mapped[int] = mapped_column(server_default="0", nullable=False)
+
+
+class InventoryUsageHourly(UsageRollupMixin, Base):
+  __tablename__ = "inventory_usage_hourly"
+
+
+class InventoryUsageDaily(UsageRollupMixin, Base):
+  __tablename__ = "inventory_usage_daily"
+
+
+USAGE_TABLES = {
+  UsageInterval.hour: InventoryUsageHourly,
+  UsageInterval.day: InventoryUsageDaily,
+}
+
+
+class InventoryLogQueueCheckpoint(Base):
+  """Last write-behind queue entry committed to inventory_logs, per queue slot.
+
+  Updated in the same transaction as the logs it covers, so replaying a slot
+  after a crash never inserts an entry twice.
+  """
+
+  __tablename__ = "inventory_log_queue_checkpoints"
+
+  slot: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+  last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+  updated_at: Mapped[datetime] = mapped_column(
+    DateTime(timezone=True), server_default=func.now(), nullable=False
+  )
+
+  @classmethod
+  async def get_raw(cls, conn: asyncpg.Connection, slot: int) -> int:
+    last_seq = await conn.fetchval(
+      "SELECT last_seq FROM inventory_log_queue_checkpoints WHERE slot = $1", slot
+    )
+    return last_seq or 0
+
+  @classmethod
+  async def save_raw(cls, conn: asyncpg.Connection, slot: int, last_seq: int):
+    await conn.execute(
+      """
+      INSERT INTO inventory_log_queue_checkpoints (slot, last_seq, updated_at)
+      VALUES ($1, $2, now())
+      ON CONFLICT (slot) DO UPDATE
+          SET last_seq = EXCLUDED.last_seq,
+              updated_at = EXCLUDED.updated_at
+      """,
+      slot,
+      last_seq,
+    )
+
+
+# Serves the per-chemical log listing and its keyset cursor in a single index scan
+Index(
+  "ix_inventory_logs_chemical_id_timestamp_id",
+  InventoryLog.chemical_id,
+  InventoryLog.timestamp.desc(),
+  InventoryLog.id.desc(),
+)
+
+# Fuzzy and substring name search (requires the pg_trgm extension)
+Index(
+  "ix_chemicals_name_trgm",
+  Chemical.name,
+  postgresql_using="gin",
+  postgresql_ops={"name": "gin_trgm_ops"},
+)
+# Exact lookup on the normalized CAS number
+Index("ix_chemicals_cas_number", Chemical.cas_number)
+# Cross-chemical summaries scan a range of days
+Index("ix_inventory_usage_daily_bucket", InventoryUsageDaily.bucket)
+# Lets list ETags be computed from an index-only scan
+Index("ix_chemicals_id_updated_at", Chemical.id, postgresql_include=["updated_at"])
+# Lookups by unit
+Index("ix_chemicals_unit_id", Chemical.unit, Chemical.id)
@@ -0,0 +1,175 @@
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import asyncpg
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Names given by the inventory_logs_create_partitions() SQL function
+PARTITION_PATTERN = re.compile(r"^inventory_logs_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+  index = month.year * 12 + month.month - 1 + months
+  return date(index // 12, index % 12 + 1, 1)
+
+
+async def ensure_log_partitions(
+  pool: asyncpg.Pool,
+  since: datetime | None = None,
+  until: datetime | None = None,
+) -> int:
+  """Create the missing monthly inventory_logs partitions in [since, until).
+
+  Defaults to the current month through `LOG_PARTITION_MONTHS_AHEAD` months
+  ahead. Safe to call concurrently from several processes.
+
+  Returns:
+      int: Number of partitions created.
+  """
+  now = datetime.now(timezone.utc)
+  since = since or now
+  until = until or now + timedelta(days=31 * settings.LOG_PARTITION_MONTHS_AHEAD)
+  async with pool.acquire() as conn:
+    created = await conn.fetchval(
+      "SELECT inventory_logs_create_partitions($1, $2)", since, until
+    )
+  if created:
+    logger.info("Created %d inventory_logs partitions", created)
+  return created
+
+
+async def maintain_log_partitions(pool: asyncpg.Pool):
+  """Keep future partitions in place for as long as the app runs."""
+  while True:
+    await asyncio.sleep(settings.LOG_PARTITION_CHECK_INTERVAL)
+    try:
+      await ensure_log_partitions(pool)
+    except (OSError, asyncpg.PostgresError) as e:
+      logger.warning("Could not create inventory_logs partitions: %s", e)
+
+
+async def list_log_partitions(conn: asyncpg.Connection) -> list[dict]:
+  """Monthly log tables, attached or detached but not yet archived.
+
+  Returns:
+      list[dict]: `name`, `month` (first day, UTC) and `attached`, oldest first.
+  """
+  rows = await conn.fetch(
+    """
+    SELECT c.relname AS name, i.inhrelid IS NOT NULL AS attached
+    FROM pg_class c
+             LEFT JOIN pg_inherits i
+                       ON i.inhrelid = c.oid
+                           AND i.inhparent = 'inventory_logs'::regclass
+    WHERE c.relkind = 'r'
+      AND c.relnamespace = current_schema()::regnamespace
+      AND c.relname LIKE 'inventory\\_logs\\_y%'
+    """
+  )
+  partitions = []
+  for row in rows:
+    match = PARTITION_PATTERN.match(row["name"])
+    if match:
+      month = date(int(match.group(1)), int(match.group(2)), 1)
+      partitions.append({**dict(row), "month": month})
+  return sorted(partitions, key=lambda partition: partition["month"])
+
+
+async def _detach_partition(conn: asyncpg.Connection, name: str):
+  async with conn.transaction():
+    await conn.execute(f'ALTER TABLE inventory_logs DETACH PARTITION "{name}"')
+    # The logs are gone from the API now; keep the per-chemical counters exact
+    await conn.execute(
+      f"""
+      UPDATE chemicals c
+      SET log_count = GREATEST(c.log_count - archived.n, 0)
+      FROM (SELECT chemical_id, COUNT(*) AS n
+            FROM "{name}"
+            GROUP BY chemical_id) archived
+      WHERE c.id = archived.chemical_id
+      """
+    )
+    # The detached table keeps a copy of the foreign key, which would block
+    # deleting chemicals until the table is dropped
+    constraints = await conn.fetch(
+      """
+      SELECT conname
+      FROM pg_constraint
+      WHERE conrelid = $1::regclass
+        AND contype = 'f'
+      """,
+      name,
+    )
+    for constraint in constraints:
+      await conn.execute(
+        f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint["conname"]}"'
+      )
+
+
+async def _dump_table(conn: asyncpg.Connection, name: str, path: Path) -> int:
+  tmp_path = path.with_name(path.name + ".tmp")
+  with gzip.open(tmp_path, "wb") as f:
+
+    async def write(chunk: bytes):
+      f.write(chunk)
+
+    status = await conn.copy_from_table(
+      name,
+      columns=["id", "chemical_id", "action_type", "quantity", "timestamp"],
+      output=write,
+      format="csv",
+      header=True,
+    )
+    f.flush()
+    os.fsync(f.fileno())
+  tmp_path.replace(path)
+  return int(status.split()[-1])
+
+
+async def archive_log_partitions(
+  pool: asyncpg.Pool, before: date, output_dir: Path, dry_run: bool = False
+) -> list[dict]:
+  """Detach, dump and drop the monthly log partitions that end before `before`.
+
+  Each partition is detached first, so the API stops serving it, then copied
+  to `<output_dir>/<partition>.csv.gz` and dropped once the file is on disk.
+  An interrupted run leaves a detached table behind that the next run
+  picks up again. The usage rollups are left alone, so usage reports still
+  cover archived months.
+
+  Args:
+      pool (asyncpg.Pool): Database connection pool.
+      before (date): Partitions of months ending on or before this date are
+          archived.
+      output_dir (Path): Directory for the compressed CSV files.
+      dry_run (bool, optional): Only report what would be archived.
+
+  Returns:
+      list[dict]: `partition`, `rows` and `path` of every archived partition.
+  """
+  archived = []
+  async with pool.acquire() as conn:
+    for partition in await list_log_partitions(conn):
+      if add_months(partition["month"], 1) > before:
+        continue
+      name = partition["name"]
+      path = output_dir / f"{name}.csv.gz"
+      if dry_run:
+        archived.append({"partition": name, "rows": None, "path": str(path)})
+        continue
+      output_dir.mkdir(parents=True, exist_ok=True)
+      if partition["attached"]:
+        await _detach_partition(conn, name)
+      rows = await _dump_table(conn, name, path)
+      await conn.execute(f'DROP TABLE "{name}"')
+      logger.info("Archived %s (%d rows) to %s", name, rows, path)
+      archived.append({"partition": name, "rows": rows, "path": str(path)})
+  return archived
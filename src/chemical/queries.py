@@ -0,0 +1,67 @@
+"""Named statements for the hot chemical read paths, see src.statements."""
+
+from src.statements import statement
+
+CHEMICAL_BY_ID = statement(
+  "chemical_by_id",
+  """
+  SELECT id, name, cas_number, quantity, unit, created_at, updated_at
+  FROM chemicals
+  WHERE id = $1
+  """,
+)
+
+_LOGS_SELECT = """
+  SELECT il.id,
+         il.action_type,
+         il.quantity,
+         il.timestamp,
+         c.id AS chemical_id,
+         c.name,
+         c.cas_number,
+         c.unit
+  FROM inventory_logs il
+           JOIN chemicals c ON il.chemical_id = c.id
+  WHERE il.chemical_id = $1
+  """
+
+LOGS_PAGE = statement(
+  "logs_page",
+  _LOGS_SELECT
+  + """
+  ORDER BY il.timestamp DESC, il.id DESC
+      LIMIT $2
+  OFFSET $3
+  """,
+)
+
+# The plain bound on timestamp next to the row comparison lets the planner
+# skip the monthly partitions newer than the cursor.
+LOGS_PAGE_AFTER = statement(
+  "logs_page_after",
+  _LOGS_SELECT
+  + """
+    AND (il.timestamp, il.id) < ($3, $4)
+    AND il.timestamp <= $3
+  ORDER BY il.timestamp DESC, il.id DESC
+      LIMIT $2
+  """,
+)
+
+LOGS_COUNT = statement(
+  "logs_count",
+  """
+  SELECT COUNT(*)
+  FROM inventory_logs
+  WHERE chemical_id = $1
+  """,
+)
+
+LOGS_COUNT_ESTIMATED = statement(
+  "logs_count_estimated",
+  """
+  SELECT COALESCE(MAX(log_count), 0)
+  FROM chemicals
+  WHERE id = $1
+  """,
+)
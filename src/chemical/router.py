@@ -1,129 +1,619 @@
-import asyncpg
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
 
-from src.chemical import schemas
-from src.chemical.models import Chemical, InventoryLog
-from src.database import get_db, get_pg_pool
+import asyncpg
+from fastapi import (
+  APIRouter,
+  Depends,
+  Header,
+  HTTPException,
+  Query,
+  Request,
+  Response,
+  status,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src import conditional
+from src.chemical import schemas, serializers, service
+from src.chemical.changes import change_feed
+from src.chemical.log_queue import log_queue
+from src.chemical.models import (
+  ActionType,
+  Chemical,
+  InventoryLog,
+  UsageInterval,
+  normalize_cas,
+)
+from src.chemical.snapshot import InventorySnapshot, inventory_snapshot
+from src.config import settings
+from src.database import get_pg_pool
+from src.pagination import INT4_MAX, CountStrategy, decode_cursor, encode_cursor
+from src.replicas import get_read_pool
+from src.singleflight import SingleFlight
 
 router = APIRouter(prefix="/chemicals", tags=["chemical"])
 
+MAX_BATCH_IDS = 500
+
+# Coalesces identical concurrent reads of a chemical or a page of its logs
+read_flights = SingleFlight(timeout=settings.SINGLE_FLIGHT_TIMEOUT)
+
+DEFAULT_USAGE_WINDOW = {
+  UsageInterval.hour: timedelta(days=7),
+  UsageInterval.day: timedelta(days=365),
+}
+
+
+def _coalesce(request: Request, key: tuple, call):
+  """Share one in-flight read between concurrent identical requests.
+
+  Requests asking to read their own writes (`X-Min-LSN`) always run their own
+  query, since a read already in flight may predate their write.
+  """
+  if not settings.SINGLE_FLIGHT or "x-min-lsn" in request.headers:
+    return call()
+  return read_flights.do(key, call)
+
+
+def _fresh_snapshot(request: Request) -> InventorySnapshot | None:
+  """The in-memory snapshot, if it may answer this request.
+
+  Requests asking to read their own writes (`X-Min-LSN`) go to the database.
+  """
+  if (
+    inventory_snapshot.enabled
+    and "x-min-lsn" not in request.headers
+    and inventory_snapshot.fresh()
+  ):
+    return inventory_snapshot
+  return None
+
+
+def _usage_window(
+  since: datetime | None, until: datetime | None, default: timedelta
+) -> tuple[datetime, datetime]:
+  # Naive bounds are taken as UTC, like the buckets
+  if until is not None and until.tzinfo is None:
+    until = until.replace(tzinfo=timezone.utc)
+  if since is not None and since.tzinfo is None:
+    since = since.replace(tzinfo=timezone.utc)
+  until = until or datetime.now(timezone.utc)
+  since = since or until - default
+  if since >= until:
+    raise HTTPException(status_code=400, detail="since must be before until")
+  return since, until
+
 
 @router.get("/", response_model=schemas.PaginatedChemicalSchemaOut)
 async def get_chemicals(
+  request: Request,
+  response: Response,
   limit: int = Query(10, ge=1, le=100),
   offset: int = Query(0, ge=0),
-  db: AsyncSession = Depends(get_db),
+  cursor: str | None = Query(None),
+  count: CountStrategy = Query(CountStrategy.exact),
+  pool: asyncpg.Pool = Depends(get_read_pool),
 ):
   """Get paginated list of chemicals.
 
+  The page carries a weak ETag; a request whose `If-None-Match` still matches
+  gets a 304 after a validator query over the page's ids and versions.
+
   Args:
+      request (Request): Incoming request, for its conditional headers.
+      response (Response): Outgoing response, for the ETag header.
       limit (int, optional): Maximum number of items to return. Defaults to 10.
       offset (int, optional): Number of items to skip. Defaults to 0.
-      db (AsyncSession): Database session dependency.
+      cursor (str, optional): `next_cursor` from a previous page. Takes
+          precedence over `offset`.
+      count (CountStrategy, optional): How `total` is computed: `exact`,
+          `estimated` from table statistics, or `none`. Defaults to `exact`.
+      pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       PaginatedChemicalSchemaOut: Paginated list of chemicals.
   """
-
-  chemicals = await Chemical.get_all(db, limit, offset)
+  if "if-none-match" in request.headers:
+    etag = await Chemical.get_page_etag_raw(pool, limit, offset, cursor, count)
+    if conditional.not_modified(request.headers, etag):
+      return conditional.not_modified_response(etag)
+
+  chemicals = await Chemical.get_all_raw(pool, limit, offset, cursor, count)
+  etag = conditional.digest_etag(
+    [
+      chemicals["total"],
+      *(Chemical.etag(row["id"], row["updated_at"]) for row in chemicals["results"]),
+    ]
+  )
+  if settings.FAST_SERIALIZATION:
+    return serializers.json_response(
+      serializers.page_payload(chemicals, serializers.chemical_payload),
+      headers=conditional.validator_headers(etag),
+    )
+  response.headers.update(conditional.validator_headers(etag))
   return chemicals
 
 
+@router.get("/search", response_model=schemas.ChemicalSearchSchemaOut)
+async def search_chemicals(
+  q: str = Query(..., min_length=2, max_length=100),
+  limit: int = Query(10, ge=1, le=100),
+  cursor: str | None = Query(None),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """Search chemicals by name or CAS number, best matches first.
+
+  Args:
+      q (str): Search term; a name fragment, a misspelled name or a CAS
+          number in any common notation.
+      limit (int, optional): Maximum number of items to return. Defaults to 10.
+      cursor (str, optional): `next_cursor` from a previous page.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      ChemicalSearchSchemaOut: Ranked page of matching chemicals.
+  """
+  return await Chemical.search_raw(pool, q.strip(), limit, cursor)
+
+
+@router.get("/lookup", response_model=schemas.ChemicalLookupSchemaOut)
+async def lookup_chemicals(
+  request: Request,
+  cas_number: str | None = Query(None, max_length=100),
+  unit: str | None = Query(None, max_length=10),
+  limit: int = Query(10, ge=1, le=100),
+  cursor: str | None = Query(None),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """List chemicals by exact CAS number and/or unit, in id order.
+
+  Served from the in-memory snapshot when it is enabled and fresh.
+
+  Args:
+      request (Request): Incoming request.
+      cas_number (str, optional): CAS number in any common notation.
+      unit (str, optional): Unit, e.g. `L`.
+      limit (int, optional): Maximum number of items to return. Defaults to 10.
+      cursor (str, optional): `next_cursor` from a previous page.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      ChemicalLookupSchemaOut: Page of matching chemicals.
+
+  Raises:
+      HTTPException: If neither `cas_number` nor `unit` is given.
+  """
+  if cas_number is None and unit is None:
+    raise HTTPException(status_code=400, detail="Provide cas_number and/or unit")
+  if cas_number is not None:
+    cas_number = normalize_cas(cas_number)
+  after_id = decode_cursor(cursor, int)[0] if cursor is not None else 0
+
+  snapshot = _fresh_snapshot(request)
+  if snapshot is not None:
+    chemicals = snapshot.lookup(cas_number, unit, limit, after_id)
+  else:
+    chemicals = await Chemical.lookup_raw(pool, cas_number, unit, limit, after_id)
+  page = {
+    "limit": limit,
+    "next_cursor": (
+      encode_cursor(chemicals[-1]["id"]) if len(chemicals) == limit else None
+    ),
+    "results": chemicals,
+  }
+  if settings.FAST_SERIALIZATION:
+    return serializers.json_response(
+      {
+        **page,
+        "results": [serializers.chemical_payload(row) for row in chemicals],
+      }
+    )
+  return page
+
+
+@router.get("/batch", response_model=schemas.ChemicalBatchSchemaOut)
+async def get_chemicals_batch(
+  ids: str = Query(..., description="Comma-separated chemical ids"),
+  logs: int = Query(0, ge=0, le=50),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """Get several chemicals, with their latest logs, in one request.
+
+  Args:
+      ids (str): Comma-separated ids, at most 500. Results keep this order.
+      logs (int, optional): Latest log entries to include per chemical.
+          Defaults to 0.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      ChemicalBatchSchemaOut: Found chemicals and the ids that were not found.
+
+  Raises:
+      HTTPException: If `ids` is malformed, out of range or lists too many ids.
+  """
+  try:
+    chemical_ids = [int(part) for part in ids.split(",") if part.strip()]
+  except ValueError:
+    raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+  if any(not 1 <= chemical_id <= INT4_MAX for chemical_id in chemical_ids):
+    raise HTTPException(status_code=400, detail=f"ids must be between 1 and {INT4_MAX}")
+  if not chemical_ids or len(chemical_ids) > MAX_BATCH_IDS:
+    raise HTTPException(
+      status_code=400, detail=f"Provide between 1 and {MAX_BATCH_IDS} ids"
+    )
+  return await Chemical.get_many_raw(pool, chemical_ids, logs)
+
+
 @router.post("/", response_model=schemas.ChemicalSchemaOut)
 async def create_chemicals(
-  chemical: schemas.ChemicalSchemaIn, db: AsyncSession = Depends(get_db)
+  chemical: schemas.ChemicalSchemaIn, pool: asyncpg.Pool = Depends(get_pg_pool)
 ):
   """Create a new chemical.
 
   Args:
       chemical (ChemicalSchemaIn): Chemical data to create.
-      db (AsyncSession): Database session dependency.
+      pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       ChemicalSchemaOut: Created chemical data.
   """
-  chemical = await Chemical.create(db, **chemical.model_dump())
-  return chemical
+  return await Chemical.create_raw(pool, **chemical.model_dump())
+
+
+@router.post("/import", response_model=schemas.ChemicalImportSchemaOut)
+async def import_chemicals(
+  request: Request,
+  format: schemas.FileFormat | None = Query(None),
+  batch_size: int = Query(service.IMPORT_BATCH_SIZE, ge=1, le=10_000),
+  pool: asyncpg.Pool = Depends(get_pg_pool),
+):
+  """Bulk import chemicals from a CSV or NDJSON request body.
+
+  The body is streamed and loaded in batches; rows that fail validation or
+  insertion are reported without aborting the rest of the load.
+
+  Args:
+      request (Request): Incoming request whose body holds the file.
+      format (FileFormat, optional): `csv` or `ndjson`. Inferred from the
+          Content-Type header when omitted.
+      batch_size (int, optional): Rows loaded per transaction. Defaults to 1000.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      ChemicalImportSchemaOut: Import summary with per-row errors.
+  """
+  if format is None:
+    content_type = request.headers.get("content-type", "")
+    is_ndjson = "ndjson" in content_type or "json" in content_type
+    format = schemas.FileFormat.ndjson if is_ndjson else schemas.FileFormat.csv
+  return await service.import_chemicals(pool, request.stream(), format, batch_size)
+
+
+@router.get("/logs/export")
+async def export_logs(
+  format: schemas.FileFormat = Query(schemas.FileFormat.ndjson),
+  chemical_id: int | None = Query(None),
+  action_type: ActionType | None = Query(None),
+  since: datetime | None = Query(None),
+  until: datetime | None = Query(None),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """Stream the inventory log history as NDJSON or CSV.
+
+  Args:
+      format (FileFormat, optional): `ndjson` or `csv`. Defaults to `ndjson`.
+      chemical_id (int, optional): Only export logs of this chemical.
+      action_type (ActionType, optional): Only export logs of this action.
+      since (datetime, optional): Inclusive lower bound on the log timestamp,
+          UTC if naive.
+      until (datetime, optional): Exclusive upper bound on the log timestamp,
+          UTC if naive.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      StreamingResponse: The export, oldest log first.
+  """
+  media_types = {
+    schemas.FileFormat.ndjson: "application/x-ndjson",
+    schemas.FileFormat.csv: "text/csv",
+  }
+  return StreamingResponse(
+    service.export_logs(pool, format, chemical_id, action_type, since, until),
+    media_type=media_types[format],
+    headers={
+      "Content-Disposition": f'attachment; filename="inventory_logs.{format.value}"'
+    },
+  )
+
+
+@router.get("/usage", response_model=schemas.UsageSummarySchemaOut)
+async def get_usage_summary(
+  since: datetime | None = Query(None),
+  until: datetime | None = Query(None),
+  limit: int = Query(10, ge=1, le=100),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """Get the chemicals with the highest consumption in a time window.
+
+  Args:
+      since (datetime, optional): Start of the window, rounded down to the UTC
+          day. Defaults to 30 days before `until`.
+      until (datetime, optional): Exclusive end of the window. Defaults to now.
+      limit (int, optional): Maximum number of chemicals to return. Defaults
+          to 10.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      UsageSummarySchemaOut: Per-chemical totals, most removed stock first.
+  """
+  since, until = _usage_window(since, until, timedelta(days=30))
+  return await InventoryLog.get_usage_summary_raw(pool, since, until, limit)
+
+
+@router.get("/changes")
+async def stream_changes(
+  chemical_id: list[int] | None = Query(None),
+  after_log_id: int | None = Query(None, ge=0),
+  last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+  pool: asyncpg.Pool = Depends(get_pg_pool),
+):
+  """Stream chemical and inventory log changes as Server-Sent Events.
+
+  Emits `chemical` events (created, updated, deleted) and `log` events, whose
+  SSE id is the log id. A `resync` event means events were lost and the
+  stream is closing; reconnect to replay the missed logs. Only logs are
+  replayed: a resumed stream starts with a `reload` event, after which the
+  client must re-read the chemicals it follows.
+
+  Args:
+      chemical_id (list[int], optional): Only stream changes of these
+          chemicals. Repeat the parameter for several ids.
+      after_log_id (int, optional): First replay the logs with a higher id.
+      last_event_id (str, optional): Set by EventSource on reconnect; used
+          as `after_log_id` when that is not given.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      StreamingResponse: The `text/event-stream`.
+
+  Raises:
+      HTTPException: If `Last-Event-ID` is not a log id, or the change feed
+          is unavailable.
+  """
+  if after_log_id is None and last_event_id:
+    if not last_event_id.isdigit():
+      raise HTTPException(status_code=400, detail="Invalid Last-Event-ID header")
+    after_log_id = int(last_event_id)
+  await change_feed.start()
+  return StreamingResponse(
+    change_feed.stream(pool, set(chemical_id) if chemical_id else None, after_log_id),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+  )
+
+
+@router.post("/movements", response_model=schemas.StockMovementBatchSchemaOut)
+async def create_stock_movements(
+  batch: schemas.StockMovementBatchSchemaIn,
+  pool: asyncpg.Pool = Depends(get_pg_pool),
+):
+  """Apply a batch of stock movements in one transaction.
+
+  Args:
+      batch (StockMovementBatchSchemaIn): Movements to apply, the batch mode
+          (`atomic` all-or-nothing, or `best_effort`) and whether quantities
+          may go negative.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      StockMovementBatchSchemaOut: Per-movement results in request order.
+  """
+  results = await Chemical.apply_movements(
+    pool,
+    [(m.chemical_id, m.action_type, m.quantity) for m in batch.movements],
+    atomic=batch.mode == schemas.BatchMode.atomic,
+    allow_negative=batch.allow_negative,
+  )
+  applied = sum(1 for result in results if result["status"] == "applied")
+  rejected = sum(1 for result in results if result["status"] == "rejected")
+  return {"applied": applied, "rejected": rejected, "results": results}
 
 
 @router.put("/{id}", response_model=schemas.ChemicalSchemaOut)
 async def update_chemicals(
-  id: int, chemical: schemas.ChemicalSchemaIn, db: AsyncSession = Depends(get_db)
+  id: int,
+  chemical: schemas.ChemicalSchemaIn,
+  response: Response,
+  if_match: str | None = Header(None),
+  pool: asyncpg.Pool = Depends(get_pg_pool),
 ):
   """Update an existing chemical.
 
   Args:
       id (int): ID of the chemical to update.
       chemical (ChemicalSchemaIn): Updated chemical data.
-      db (AsyncSession): Database session dependency.
+      response (Response): Outgoing response, for the new ETag.
+      if_match (str, optional): ETag the client last saw; the update is
+          rejected if the chemical has changed since.
+      pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       ChemicalSchemaOut: Updated chemical data.
+
+  Raises:
+      HTTPException: If the chemical is not found, or `If-Match` does not
+          match its current ETag.
   """
-  chemical = await Chemical.update(db, id, **chemical.model_dump())
+  chemical = await Chemical.update_raw(
+    pool, id, if_match=if_match, **chemical.model_dump()
+  )
+  response.headers.update(
+    conditional.validator_headers(
+      Chemical.etag(chemical["id"], chemical["updated_at"]), chemical["updated_at"]
+    )
+  )
   return chemical
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
-async def delete_chemical(id: int, db: AsyncSession = Depends(get_db)):
+async def delete_chemical(id: int, pool: asyncpg.Pool = Depends(get_pg_pool)):
   """Delete a chemical by ID.
 
   Args:
       id (int): ID of the chemical to delete.
-      db (AsyncSession): Database session dependency.
+      pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       dict: Success message.
+
+  Raises:
+      HTTPException: If the chemical is not found.
   """
-  return await Chemical.delete(db, id)
+  return await Chemical.delete_raw(pool, id)
 
 
 @router.get("/{id}", response_model=schemas.ChemicalSchemaOut)
-async def get_chemical_by_id(id: int, pool: asyncpg.Pool = Depends(get_pg_pool)):
+async def get_chemical_by_id(
+  id: int,
+  request: Request,
+  response: Response,
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
   """Get a chemical by ID.
 
+  Conditional requests (`If-None-Match` / `If-Modified-Since`) are checked
+  against the cached or freshly queried `updated_at` only, and get a 304
+  without the row being fetched when nothing changed. Served from the
+  in-memory snapshot when it is enabled and fresh.
+
   Args:
       id (int): ID of the chemical to retrieve.
+      request (Request): Incoming request, for its conditional headers.
+      response (Response): Outgoing response, for the validator headers.
       pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       ChemicalSchemaOut: Chemical data.
   """
-  return await Chemical.get_by_id_raw(pool, id)
+  snapshot = _fresh_snapshot(request)
+  if snapshot is not None:
+    chemical = snapshot.get(id)
+    etag = Chemical.etag(id, chemical["updated_at"])
+    if conditional.not_modified(request.headers, etag, chemical["updated_at"]):
+      return conditional.not_modified_response(etag, chemical["updated_at"])
+  else:
+    if conditional.has_validators(request.headers):
+      updated_at = await Chemical.get_version_raw(pool, id)
+      etag = Chemical.etag(id, updated_at)
+      if conditional.not_modified(request.headers, etag, updated_at):
+        return conditional.not_modified_response(etag, updated_at)
+
+    chemical = await _coalesce(
+      request, ("chemical", id), lambda: Chemical.get_by_id_raw(pool, id)
+    )
+  headers = conditional.validator_headers(
+    Chemical.etag(id, chemical["updated_at"]), chemical["updated_at"]
+  )
+  if settings.FAST_SERIALIZATION:
+    return serializers.json_response(
+      serializers.chemical_payload(chemical), headers=headers
+    )
+  response.headers.update(headers)
+  return chemical
 
 
 @router.get("/{id}/logs", response_model=schemas.PaginatedInventoryLogSchemaOut)
 async def get_chemical_logs(
   id: int,
+  request: Request,
   limit: int = Query(10, ge=1, le=100),
   offset: int = Query(0, ge=0),
-  pool: asyncpg.Pool = Depends(get_pg_pool),
+  cursor: str | None = Query(None),
+  count: CountStrategy = Query(CountStrategy.exact),
+  pool: asyncpg.Pool = Depends(get_read_pool),
 ):
   """Get paginated logs for a specific chemical.
 
   Args:
       id (int): ID of the chemical.
+      request (Request): Incoming request.
       limit (int, optional): Maximum number of items to return. Defaults to 10.
       offset (int, optional): Number of items to skip. Defaults to 0.
+      cursor (str, optional): `next_cursor` from a previous page. Takes
+          precedence over `offset`.
+      count (CountStrategy, optional): How `total` is computed: `exact`,
+          `estimated` from the chemical's log counter, or `none`. Defaults to
+          `exact`.
       pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       PaginatedInventoryLogSchemaOut: Paginated list of inventory logs.
   """
-  return await InventoryLog.get_logs_by_chemical_raw(pool, id, limit, offset)
+  logs = await _coalesce(
+    request,
+    ("logs", id, limit, offset, cursor, count),
+    lambda: InventoryLog.get_logs_by_chemical_raw(
+      pool, id, limit, offset, cursor, count
+    ),
+  )
+  if settings.FAST_SERIALIZATION:
+    return serializers.json_response(
+      serializers.page_payload(logs, serializers.log_payload)
+    )
+  return logs
+
+
+@router.get("/{id}/usage", response_model=schemas.ChemicalUsageSchemaOut)
+async def get_chemical_usage(
+  id: int,
+  interval: UsageInterval = Query(UsageInterval.day),
+  since: datetime | None = Query(None),
+  until: datetime | None = Query(None),
+  pool: asyncpg.Pool = Depends(get_read_pool),
+):
+  """Get the usage time series of a chemical.
+
+  Args:
+      id (int): ID of the chemical.
+      interval (UsageInterval, optional): Bucket size, `hour` or `day`.
+          Defaults to `day`.
+      since (datetime, optional): Start of the series, rounded down to the
+          bucket. Defaults to 7 days (hourly) or 365 days (daily) before
+          `until`.
+      until (datetime, optional): Exclusive end of the series. Defaults to now.
+      pool (asyncpg.Pool): Database connection pool.
+
+  Returns:
+      ChemicalUsageSchemaOut: Added and removed quantities and update counts
+          per bucket.
+
+  Raises:
+      HTTPException: If the chemical is not found.
+  """
+  since, until = _usage_window(since, until, DEFAULT_USAGE_WINDOW[interval])
+  return await InventoryLog.get_usage_raw(pool, id, interval, since, until)
 
 
-@router.post("/{id}/log", response_model=schemas.InventoryLogSchemaOut)
+@router.post(
+  "/{id}/log",
+  response_model=schemas.InventoryLogSchemaOut,
+  responses={status.HTTP_202_ACCEPTED: {"model": schemas.InventoryLogQueuedSchemaOut}},
+)
 async def create_chemical_log(
-  id: int, log: schemas.InventoryLogSchemaIn, db: AsyncSession = Depends(get_db)
+  id: int,
+  log: schemas.InventoryLogSchemaIn,
+  pool: asyncpg.Pool = Depends(get_pg_pool),
 ):
   """Create a new inventory log entry for a chemical.
 
+  With `LOG_WRITE_BEHIND` enabled the log is queued on local disk and the
+  response is 202 with the queue sequence number instead of the log row; the
+  log shows up in the listings once the queue is flushed.
+
   Args:
       id (int): ID of the chemical.
       log (InventoryLogSchemaIn): Log entry data.
-      db (AsyncSession): Database session dependency.
+      pool (asyncpg.Pool): Database connection pool.
 
   Returns:
       InventoryLogSchemaOut: Created log entry.
@@ -131,13 +621,43 @@ async def create_chemical_log(
   Raises:
       HTTPException: If chemical is not found.
   """
-  # Check if chemical exists
-  chemical = await db.get(Chemical, id)
-  if not chemical:
-    raise HTTPException(status_code=404, detail="Chemical not found")
+  if log_queue.enabled:
+    await Chemical.get_by_id_raw(pool, id)
+    entry = await log_queue.append(id, log.action_type, log.quantity)
+    queued = schemas.InventoryLogQueuedSchemaOut(
+      sequence=entry.seq,
+      action_type=entry.action_type,
+      quantity=entry.quantity,
+      timestamp=entry.timestamp,
+      chemical_id=entry.chemical_id,
+    )
+    return JSONResponse(
+      queued.model_dump(mode="json"), status_code=status.HTTP_202_ACCEPTED
+    )
+
+  return await InventoryLog.create_log_raw(pool, id, log.action_type, log.quantity)
+
+
+@router.post("/{id}/movements", response_model=schemas.StockMovementSchemaOut)
+async def create_stock_movement(
+  id: int,
+  movement: schemas.StockMovementSchemaIn,
+  pool: asyncpg.Pool = Depends(get_pg_pool),
+):
+  """Atomically add or remove stock for a chemical.
+
+  Args:
+      id (int): ID of the chemical.
+      movement (StockMovementSchemaIn): Direction and size of the movement.
+      pool (asyncpg.Pool): Database connection pool.
 
-  # Create log
-  log_entry = await InventoryLog.create_log(
-    db, chemical_id=id, action_type=log.action_type, quantity=log.quantity
+  Returns:
+      StockMovementSchemaOut: Chemical after the movement and the recorded log.
+
+  Raises:
+      HTTPException: If the chemical is not found, or the movement would make
+          its quantity negative and `allow_negative` is not set.
+  """
+  return await Chemical.apply_movement(
+    pool, id, movement.action_type, movement.quantity, movement.allow_negative
   )
-  return log_entry
@@ -1,8 +1,11 @@
 from datetime import datetime
+from enum import Enum as PyEnum
+from typing import Literal
 
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 
-from src.chemical.models import ActionType
+from src.chemical.models import ActionType, UsageInterval
+from src.pagination import INT4_MAX, INT4_MIN
 
 
 class ChemicalSchemaOut(BaseModel):
@@ -27,9 +30,26 @@ class ChemicalSchemaOut(BaseModel):
 
 
 class PaginatedChemicalSchemaOut(BaseModel):
-  total: int
+  total: int | None
   limit: int
   offset: int
+  next_cursor: str | None = None
+  results: list[ChemicalSchemaOut]
+
+
+class ChemicalSearchResultSchemaOut(ChemicalSchemaOut):
+  score: float
+
+
+class ChemicalSearchSchemaOut(BaseModel):
+  limit: int
+  next_cursor: str | None = None
+  results: list[ChemicalSearchResultSchemaOut]
+
+
+class ChemicalLookupSchemaOut(BaseModel):
+  limit: int
+  next_cursor: str | None = None
   results: list[ChemicalSchemaOut]
 
 
@@ -45,12 +65,18 @@ class ChemicalSchemaIn(BaseModel):
 
 class InventoryLogSchemaIn(BaseModel):
   action_type: ActionType
-  quantity: int
+  quantity: int = Field(ge=INT4_MIN, le=INT4_MAX)
 
   class Config:
     model_config = {"from_attributes": True}
 
 
+class StockMovementSchemaIn(BaseModel):
+  action_type: Literal[ActionType.add, ActionType.remove]
+  quantity: int = Field(gt=0)
+  allow_negative: bool = False
+
+
 class InventoryLogSchemaOut(BaseModel):
   id: int
   action_type: str
@@ -66,8 +92,127 @@ class InventoryLogSchemaOut(BaseModel):
     return ts.strftime("%d %b %Y %I:%M %p")
 
 
+class InventoryLogQueuedSchemaOut(BaseModel):
+  sequence: int
+  action_type: str
+  quantity: int
+  timestamp: datetime
+  chemical_id: int
+
+  class Config:
+    model_config = {"from_attributes": True}
+
+  @field_serializer("timestamp")
+  def format_timestamp(self, ts: datetime) -> str:
+    return ts.strftime("%d %b %Y %I:%M %p")
+
+
 class PaginatedInventoryLogSchemaOut(BaseModel):
-  total: int
+  total: int | None
   limit: int
   offset: int
+  next_cursor: str | None = None
   results: list[InventoryLogSchemaOut]
+
+
+class ChemicalWithLogsSchemaOut(ChemicalSchemaOut):
+  logs: list[InventoryLogSchemaOut] = []
+
+
+class ChemicalBatchSchemaOut(BaseModel):
+  results: list[ChemicalWithLogsSchemaOut]
+  missing: list[int]
+
+
+class StockMovementSchemaOut(BaseModel):
+  chemical: ChemicalSchemaOut
+  log: InventoryLogSchemaOut
+
+
+class BatchMode(str, PyEnum):
+  atomic = "atomic"
+  best_effort = "best_effort"
+
+
+class StockMovementItemSchemaIn(BaseModel):
+  chemical_id: int
+  action_type: Literal[ActionType.add, ActionType.remove]
+  quantity: int = Field(gt=0)
+
+
+class StockMovementBatchSchemaIn(BaseModel):
+  movements: list[StockMovementItemSchemaIn] = Field(min_length=1, max_length=10_000)
+  mode: BatchMode = BatchMode.atomic
+  allow_negative: bool = False
+
+
+class StockMovementResultSchemaOut(BaseModel):
+  index: int
+  chemical_id: int
+  status: Literal["applied", "rejected", "skipped"]
+  error: str | None = None
+  log_id: int | None = None
+  quantity: int | None = None
+
+
+class StockMovementBatchSchemaOut(BaseModel):
+  applied: int
+  rejected: int
+  results: list[StockMovementResultSchemaOut]
+
+
+class UsageBucketSchemaOut(BaseModel):
+  bucket: datetime
+  added: int
+  removed: int
+  updates: int
+  net: int
+  logs: int
+
+  @field_serializer("bucket")
+  def format_bucket(self, ts: datetime) -> str:
+    return ts.strftime("%d %b %Y %I:%M %p")
+
+
+class ChemicalUsageSchemaOut(BaseModel):
+  chemical_id: int
+  interval: UsageInterval
+  since: datetime
+  until: datetime
+  results: list[UsageBucketSchemaOut]
+
+
+class UsageSummaryItemSchemaOut(BaseModel):
+  chemical_id: int
+  name: str
+  cas_number: str
+  unit: str
+  quantity: int
+  added: int
+  removed: int
+  updates: int
+  net: int
+  logs: int
+
+
+class UsageSummarySchemaOut(BaseModel):
+  since: datetime
+  until: datetime
+  results: list[UsageSummaryItemSchemaOut]
+
+
+class FileFormat(str, PyEnum):
+  csv = "csv"
+  ndjson = "ndjson"
+
+
+class ImportRowErrorSchemaOut(BaseModel):
+  row: int
+  error: str
+
+
+class ChemicalImportSchemaOut(BaseModel):
+  processed: int
+  imported: int
+  failed: int
+  errors: list[ImportRowErrorSchemaOut]
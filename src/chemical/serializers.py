@@ -0,0 +1,69 @@
+"""Direct JSON encoding for the hot read endpoints.
+
+Produces the same bytes FastAPI would for the corresponding response models,
+without building pydantic models or validating the response a second time.
+Rows may be asyncpg Records, dicts or ORM objects exposing the same keys.
+"""
+
+import functools
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+# Must match the field serializers in src/chemical/schemas.py
+TIMESTAMP_FORMAT = "%d %b %Y %I:%M %p"
+CHEMICAL_FIELDS = ("id", "name", "cas_number", "quantity", "unit")
+LOG_FIELDS = ("id", "action_type", "quantity")
+
+
+@functools.lru_cache(maxsize=65536)
+def _format_minute(year: int, month: int, day: int, hour: int, minute: int) -> str:
+  return datetime(year, month, day, hour, minute).strftime(TIMESTAMP_FORMAT)
+
+
+def format_timestamp(ts: datetime) -> str:
+  # The format has minute resolution, so timestamps within the same minute
+  # share one cached strftime call.
+  return _format_minute(ts.year, ts.month, ts.day, ts.hour, ts.minute)
+
+
+def _get(row: Any, key: str) -> Any:
+  return row[key] if not hasattr(row, "__table__") else getattr(row, key)
+
+
+def chemical_payload(row: Any) -> dict:
+  payload = {key: _get(row, key) for key in CHEMICAL_FIELDS}
+  payload["created_at"] = format_timestamp(_get(row, "created_at"))
+  payload["updated_at"] = format_timestamp(_get(row, "updated_at"))
+  return payload
+
+
+def log_payload(row: Any) -> dict:
+  payload = {key: _get(row, key) for key in LOG_FIELDS}
+  if isinstance(payload["action_type"], Enum):
+    payload["action_type"] = payload["action_type"].value
+  payload["timestamp"] = format_timestamp(_get(row, "timestamp"))
+  payload["chemical_id"] = _get(row, "chemical_id")
+  return payload
+
+
+def page_payload(page: dict, encode_row) -> dict:
+  return {
+    "total": page["total"],
+    "limit": page["limit"],
+    "offset": page["offset"],
+    "next_cursor": page["next_cursor"],
+    "results": [encode_row(row) for row in page["results"]],
+  }
+
+
+def dumps(payload: Any) -> bytes:
+  # Same bytes as starlette's JSONResponse for these payloads
+  return orjson.dumps(payload)
+
+
+def json_response(payload: Any, **kwargs) -> Response:
+  return Response(content=dumps(payload), media_type="application/json", **kwargs)
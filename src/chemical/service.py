@@ -0,0 +1,274 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import asyncpg
+from pydantic import ValidationError
+
+from src.chemical.models import ActionType, normalize_cas
+from src.chemical.schemas import ChemicalSchemaIn, FileFormat
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_FETCH_SIZE = 500
+EXPORT_COLUMNS = ("id", "chemical_id", "action_type", "quantity", "timestamp")
+
+INSERT_CHEMICALS_QUERY = """
+    INSERT INTO chemicals (name, cas_number, quantity, unit, log_count,
+                           created_at, updated_at)
+    SELECT r.name, r.cas_number, r.quantity, r.unit, 1, now(), now()
+    FROM unnest($1::text[], $2::text[], $3::int[], $4::text[])
+             AS r(name, cas_number, quantity, unit)
+    RETURNING id, quantity
+    """
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+  decoder = codecs.getincrementaldecoder("utf-8-sig")()
+  buffer = ""
+  async for chunk in chunks:
+    buffer += decoder.decode(chunk)
+    *lines, buffer = buffer.split("\n")
+    for line in lines:
+      yield line.rstrip("\r")
+  buffer += decoder.decode(b"", final=True)
+  if buffer:
+    yield buffer.rstrip("\r")
+
+
+async def _iter_ndjson(
+  lines: AsyncIterator[str],
+) -> AsyncIterator[tuple[int, dict | Exception]]:
+  row = 0
+  async for line in lines:
+    if not line.strip():
+      continue
+    row += 1
+    try:
+      data = json.loads(line)
+    except ValueError as e:
+      yield row, ValueError(f"Invalid JSON: {e}")
+      continue
+    if not isinstance(data, dict):
+      yield row, ValueError("Expected a JSON object")
+      continue
+    yield row, data
+
+
+async def _iter_csv(
+  lines: AsyncIterator[str],
+) -> AsyncIterator[tuple[int, dict | Exception]]:
+  header = None
+  record = ""
+  row = 0
+  async for line in lines:
+    record = f"{record}\n{line}" if record else line
+    # A quoted field may contain newlines; keep reading until quotes balance
+    if record.count('"') % 2:
+      continue
+    if not record.strip():
+      record = ""
+      continue
+    values = next(csv.reader([record]))
+    record = ""
+    if header is None:
+      header = [name.strip() for name in values]
+      continue
+    row += 1
+    if len(values) != len(header):
+      yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+      continue
+    yield row, dict(zip(header, values))
+  if record:
+    yield row + 1, ValueError("Unterminated quoted field")
+
+
+def _validation_message(e: ValidationError) -> str:
+  error = e.errors()[0]
+  loc = ".".join(str(part) for part in error["loc"])
+  return f"{loc}: {error['msg']}" if loc else error["msg"]
+
+
+async def _insert_batch(
+  conn: asyncpg.Connection, batch: list[tuple[int, ChemicalSchemaIn]]
+) -> None:
+  chemicals = [chemical for _, chemical in batch]
+  async with conn.transaction():
+    inserted = await conn.fetch(
+      INSERT_CHEMICALS_QUERY,
+      [c.name for c in chemicals],
+      [normalize_cas(c.cas_number) for c in chemicals],
+      [c.quantity for c in chemicals],
+      [c.unit for c in chemicals],
+    )
+    now = datetime.now(timezone.utc)
+    await conn.copy_records_to_table(
+      "inventory_logs",
+      records=[
+        (row["id"], ActionType.add.value, row["quantity"], now) for row in inserted
+      ],
+      columns=["chemical_id", "action_type", "quantity", "timestamp"],
+    )
+
+
+async def _load_batch(
+  pool: asyncpg.Pool, batch: list[tuple[int, ChemicalSchemaIn]], report: dict
+) -> None:
+  async with pool.acquire() as conn:
+    try:
+      await _insert_batch(conn, batch)
+      report["imported"] += len(batch)
+      return
+    except asyncpg.PostgresError:
+      pass
+
+    # Isolate the offending rows so the rest of the batch still loads
+    for item in batch:
+      try:
+        await _insert_batch(conn, [item])
+        report["imported"] += 1
+      except asyncpg.PostgresError as e:
+        report["failed"] += 1
+        report["errors"].append({"row": item[0], "error": str(e)})
+
+
+async def import_chemicals(
+  pool: asyncpg.Pool,
+  chunks: AsyncIterator[bytes],
+  file_format: FileFormat,
+  batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+  """Stream chemicals from CSV or NDJSON into the database in batches.
+
+  Each batch inserts the chemicals with one multi-row INSERT ... RETURNING and
+  their initial "add" inventory logs with COPY, inside one transaction. Rows
+  that fail validation or insertion are reported and skipped.
+
+  Args:
+      pool (asyncpg.Pool): Database connection pool.
+      chunks (AsyncIterator[bytes]): Raw file contents.
+      file_format (FileFormat): Format of the file.
+      batch_size (int, optional): Rows per transaction. Defaults to 1000.
+
+  Returns:
+      dict: Counts of processed, imported and failed rows, plus per-row errors.
+  """
+  report = {"processed": 0, "imported": 0, "failed": 0, "errors": []}
+  parse = _iter_csv if file_format == FileFormat.csv else _iter_ndjson
+
+  batch: list[tuple[int, ChemicalSchemaIn]] = []
+  async for row, data in parse(_iter_lines(chunks)):
+    report["processed"] += 1
+    if isinstance(data, Exception):
+      report["failed"] += 1
+      report["errors"].append({"row": row, "error": str(data)})
+      continue
+    try:
+      batch.append((row, ChemicalSchemaIn.model_validate(data)))
+    except ValidationError as e:
+      report["failed"] += 1
+      report["errors"].append({"row": row, "error": _validation_message(e)})
+      continue
+    if len(batch) >= batch_size:
+      await _load_batch(pool, batch, report)
+      batch = []
+
+  if batch:
+    await _load_batch(pool, batch, report)
+  return report
+
+
+def _encode_export_rows(rows: list[asyncpg.Record], file_format: FileFormat) -> bytes:
+  if file_format == FileFormat.ndjson:
+    return "".join(
+      json.dumps(
+        {
+          "id": row["id"],
+          "chemical_id": row["chemical_id"],
+          "action_type": row["action_type"],
+          "quantity": row["quantity"],
+          "timestamp": row["timestamp"].isoformat(),
+        },
+        separators=(",", ":"),
+      )
+      + "\n"
+      for row in rows
+    ).encode()
+
+  buffer = io.StringIO()
+  writer = csv.writer(buffer, lineterminator="\n")
+  writer.writerows(
+    (
+      row["id"],
+      row["chemical_id"],
+      row["action_type"],
+      row["quantity"],
+      row["timestamp"].isoformat(),
+    )
+    for row in rows
+  )
+  return buffer.getvalue().encode()
+
+
+async def export_logs(
+  pool: asyncpg.Pool,
+  file_format: FileFormat,
+  chemical_id: int | None = None,
+  action_type: ActionType | None = None,
+  since: datetime | None = None,
+  until: datetime | None = None,
+) -> AsyncIterator[bytes]:
+  """Stream inventory logs as NDJSON or CSV, oldest first.
+
+  Rows are read through a server-side cursor and encoded in chunks of
+  `EXPORT_FETCH_SIZE`, so memory stays constant regardless of table size. The
+  next chunk is only fetched once the previous one has been handed to the
+  client, which lets a slow reader throttle the query instead of buffering.
+
+  Args:
+      pool (asyncpg.Pool): Database connection pool.
+      file_format (FileFormat): Output format.
+      chemical_id (int, optional): Only export logs of this chemical.
+      action_type (ActionType, optional): Only export logs of this action.
+      since (datetime, optional): Inclusive lower bound on the log timestamp.
+          Naive values are taken as UTC.
+      until (datetime, optional): Exclusive upper bound on the log timestamp.
+          Naive values are taken as UTC.
+
+  Yields:
+      bytes: Encoded chunks of the export.
+  """
+  if since is not None and since.tzinfo is None:
+    since = since.replace(tzinfo=timezone.utc)
+  if until is not None and until.tzinfo is None:
+    until = until.replace(tzinfo=timezone.utc)
+  filters = []
+  args = []
+  for clause, value in (
+    ("chemical_id = ${}", chemical_id),
+    ("action_type = ${}", action_type.value if action_type else None),
+    ("timestamp >= ${}", since),
+    ("timestamp < ${}", until),
+  ):
+    if value is not None:
+      args.append(value)
+      filters.append(clause.format(len(args)))
+  where = f"WHERE {' AND '.join(filters)}" if filters else ""
+  query = f"""
+    SELECT id, chemical_id, action_type, quantity, timestamp
+    FROM inventory_logs
+    {where}
+    ORDER BY timestamp, id
+    """
+
+  if file_format == FileFormat.csv:
+    yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+
+  async with pool.acquire() as conn:
+    # Server-side cursors only live inside a transaction
+    async with conn.transaction(readonly=True):
+      cursor = await conn.cursor(query, *args)
+      while rows := await cursor.fetch(EXPORT_FETCH_SIZE):
+        yield _encode_export_rows(rows, file_format)
@@ -0,0 +1,401 @@
+import asyncio
+import bisect
+import json
+import logging
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+import asyncpg
+from fastapi import HTTPException
+
+from src.chemical.changes import change_feed
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+LOAD_PAGE_SIZE = 50_000
+
+_SELECT = """
+          SELECT id, name, cas_number, quantity, unit, created_at, updated_at
+          FROM chemicals
+          """
+
+
+def _micros(ts: datetime) -> int:
+  return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros: int) -> datetime:
+  return _EPOCH + timedelta(microseconds=micros)
+
+
+def _index_add(ids: array, chemical_id: int):
+  # Ids are mostly appended in increasing order
+  if not ids or ids[-1] < chemical_id:
+    ids.append(chemical_id)
+  else:
+    ids.insert(bisect.bisect_left(ids, chemical_id), chemical_id)
+
+
+def _index_remove(ids: array, chemical_id: int):
+  del ids[bisect.bisect_left(ids, chemical_id)]
+
+
+class InventorySnapshot:
+  """Per-process copy of the chemicals table for reads that skip Postgres.
+
+  Rows are stored column-wise in typed arrays, with a dense id -> position
+  array and id-sorted secondary indexes on cas_number and unit; see
+  `memory_bytes` for the footprint. Timestamps are kept as epoch
+  microseconds.
+
+  The table is loaded on start. Afterwards a background task applies the
+  change feed's `chemical` events: chemicals created or updated are re-read
+  by id, deleted ones removed. The feed is notified on commit, in commit
+  order, so unlike polling on updated_at (the writing transaction's start
+  time) it can't skip a write from a long transaction. The task wakes up on
+  every event and at least every `poll_interval` seconds. The snapshot only
+  answers reads (`fresh`) while the change feed listener is up and the last
+  time the task had applied every event received was less than
+  `max_staleness` seconds ago.
+  """
+
+  def __init__(self, max_staleness: float, poll_interval: float, enabled: bool = True):
+    self.max_staleness = max_staleness
+    self.poll_interval = poll_interval
+    self.enabled = enabled
+    self.stats = {"reloads": 0, "syncs": 0, "upserts": 0, "deletes": 0}
+    self._pool: asyncpg.Pool | None = None
+    self._task: asyncio.Task | None = None
+    self._subscription = None
+    self._synced_at: float | None = None
+    self._clear()
+
+  def _clear(self):
+    self._pos = array("i")
+    self._ids = array("q")
+    self._quantity = array("q")
+    self._created = array("q")
+    self._updated = array("q")
+    self._unit = array("H")
+    self._name: list[str] = []
+    self._cas: list[str] = []
+    self._units: list[str] = []
+    self._unit_codes: dict[str, int] = {}
+    self._by_unit: dict[int, array] = {}
+    # A single id for most CAS numbers, a sorted array for shared ones
+    self._by_cas: dict[str, int | array] = {}
+
+  def __len__(self) -> int:
+    return len(self._ids)
+
+  # Reads
+
+  def fresh(self) -> bool:
+    return (
+      self._synced_at is not None
+      and change_feed.listening
+      and time.monotonic() - self._synced_at <= self.max_staleness
+    )
+
+  def get(self, chemical_id: int) -> dict:
+    """Chemical by id, shaped like a chemicals row.
+
+    Raises:
+        HTTPException: 404 if the chemical is not in the snapshot.
+    """
+    pos = self._position(chemical_id)
+    if pos < 0:
+      raise HTTPException(status_code=404, detail="Chemical not found")
+    return self._row(pos)
+
+  def lookup(
+    self,
+    cas_number: str | None,
+    unit: str | None,
+    limit: int,
+    after_id: int = 0,
+  ) -> list[dict]:
+    """Chemicals with the given cas_number and/or unit, in id order after `after_id`."""
+    if cas_number is not None:
+      entry = self._by_cas.get(cas_number)
+      ids: Iterable[int] = (
+        () if entry is None else (entry,) if isinstance(entry, int) else entry
+      )
+      if unit is not None:
+        code = self._unit_codes.get(unit)
+        ids = [i for i in ids if self._unit[self._pos[i]] == code]
+    else:
+      code = self._unit_codes.get(unit)
+      ids = self._by_unit.get(code, ())
+    start = bisect.bisect_right(ids, after_id)
+    return [self._row(self._pos[i]) for i in ids[start : start + limit]]
+
+  def _position(self, chemical_id: int) -> int:
+    if 0 <= chemical_id < len(self._pos):
+      return self._pos[chemical_id]
+    return -1
+
+  def _row(self, pos: int) -> dict:
+    return {
+      "id": self._ids[pos],
+      "name": self._name[pos],
+      "cas_number": self._cas[pos],
+      "quantity": self._quantity[pos],
+      "unit": self._units[self._unit[pos]],
+      "created_at": _datetime(self._created[pos]),
+      "updated_at": _datetime(self._updated[pos]),
+    }
+
+  # Writes
+
+  def _unit_code(self, unit: str) -> int:
+    code = self._unit_codes.get(unit)
+    if code is None:
+      code = self._unit_codes[unit] = len(self._units)
+      self._units.append(unit)
+      self._by_unit[code] = array("q")
+    return code
+
+  def _cas_add(self, cas_number: str, chemical_id: int):
+    entry = self._by_cas.get(cas_number)
+    if entry is None:
+      self._by_cas[cas_number] = chemical_id
+      return
+    if isinstance(entry, int):
+      entry = self._by_cas[cas_number] = array("q", [entry])
+    _index_add(entry, chemical_id)
+
+  def _cas_remove(self, cas_number: str, chemical_id: int):
+    entry = self._by_cas[cas_number]
+    if isinstance(entry, int):
+      del self._by_cas[cas_number]
+      return
+    _index_remove(entry, chemical_id)
+    if len(entry) == 1:
+      self._by_cas[cas_number] = entry[0]
+
+  def upsert(self, row) -> None:
+    chemical_id = row["id"]
+    code = self._unit_code(row["unit"])
+    pos = self._position(chemical_id)
+    if pos < 0:
+      if chemical_id >= len(self._pos):
+        self._pos.extend([-1] * (chemical_id + 1 - len(self._pos)))
+      self._pos[chemical_id] = len(self._ids)
+      self._ids.append(chemical_id)
+      self._quantity.append(row["quantity"])
+      self._created.append(_micros(row["created_at"]))
+      self._updated.append(_micros(row["updated_at"]))
+      self._unit.append(code)
+      self._name.append(row["name"])
+      self._cas.append(row["cas_number"])
+      _index_add(self._by_unit[code], chemical_id)
+      self._cas_add(row["cas_number"], chemical_id)
+    else:
+      if self._unit[pos] != code:
+        _index_remove(self._by_unit[self._unit[pos]], chemical_id)
+        _index_add(self._by_unit[code], chemical_id)
+        self._unit[pos] = code
+      if self._cas[pos] != row["cas_number"]:
+        self._cas_remove(self._cas[pos], chemical_id)
+        self._cas_add(row["cas_number"], chemical_id)
+        self._cas[pos] = row["cas_number"]
+      self._quantity[pos] = row["quantity"]
+      self._created[pos] = _micros(row["created_at"])
+      self._updated[pos] = _micros(row["updated_at"])
+      self._name[pos] = row["name"]
+    self.stats["upserts"] += 1
+
+  def remove(self, chemical_id: int) -> None:
+    pos = self._position(chemical_id)
+    if pos < 0:
+      return
+    _index_remove(self._by_unit[self._unit[pos]], chemical_id)
+    self._cas_remove(self._cas[pos], chemical_id)
+    # Move the last row into the hole
+    last = len(self._ids) - 1
+    if pos != last:
+      moved_id = self._ids[last]
+      for column in (
+        self._ids,
+        self._quantity,
+        self._created,
+        self._updated,
+        self._unit,
+        self._name,
+        self._cas,
+      ):
+        column[pos] = column[last]
+      self._pos[moved_id] = pos
+    for column in (
+      self._ids,
+      self._quantity,
+      self._created,
+      self._updated,
+      self._unit,
+      self._name,
+      self._cas,
+    ):
+      column.pop()
+    self._pos[chemical_id] = -1
+    self.stats["deletes"] += 1
+
+  def memory_bytes(self) -> int:
+    """Approximate memory held by the snapshot, strings included."""
+    total = sum(
+      sys.getsizeof(column)
+      for column in (
+        self._pos,
+        self._ids,
+        self._quantity,
+        self._created,
+        self._updated,
+        self._unit,
+        self._name,
+        self._cas,
+        self._by_cas,
+      )
+    )
+    total += sum(sys.getsizeof(name) for name in self._name)
+    total += sum(sys.getsizeof(cas) for cas in self._cas)
+    total += sum(
+      sys.getsizeof(ids) for ids in self._by_cas.values() if isinstance(ids, array)
+    )
+    total += sum(sys.getsizeof(ids) for ids in self._by_unit.values())
+    return total
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    age = -1 if self._synced_at is None else time.monotonic() - self._synced_at
+    samples = [
+      ("snapshot_rows", {}, len(self)),
+      ("snapshot_memory_bytes", {}, self.memory_bytes()),
+      ("snapshot_sync_age_seconds", {}, age),
+      ("snapshot_fresh", {}, int(self.fresh())),
+    ]
+    samples += [
+      (f"snapshot_{name}_total", {}, value) for name, value in self.stats.items()
+    ]
+    return samples
+
+  # Sync
+
+  async def start(self, pool: asyncpg.Pool):
+    self._pool = pool
+    try:
+      await self._resync()
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, HTTPException) as e:
+      # Reads go to Postgres until the sync loop manages to load it
+      logger.warning("Could not load the chemical snapshot: %s", e)
+      self._drop_subscription()
+    self._task = asyncio.create_task(self._sync_loop())
+
+  async def close(self):
+    if self._task is not None:
+      self._task.cancel()
+      try:
+        await self._task
+      except asyncio.CancelledError:
+        pass
+      self._task = None
+    self._drop_subscription()
+
+  def _drop_subscription(self):
+    self._synced_at = None
+    if self._subscription is not None:
+      change_feed.unsubscribe(self._subscription)
+      self._subscription = None
+
+  async def _resync(self):
+    """Reload the whole table."""
+    self._drop_subscription()
+    await change_feed.start()
+    # Subscribe before loading so changes committed meanwhile are applied
+    self._subscription = change_feed.subscribe(events={"chemical"})
+    started = time.monotonic()
+    self._clear()
+    last_id = 0
+    async with self._pool.acquire() as conn:
+      while True:
+        rows = await conn.fetch(
+          _SELECT + "WHERE id > $1 ORDER BY id LIMIT $2", last_id, LOAD_PAGE_SIZE
+        )
+        for row in rows:
+          self.upsert(row)
+        if len(rows) < LOAD_PAGE_SIZE:
+          break
+        last_id = rows[-1]["id"]
+    self._synced_at = started
+    self.stats["reloads"] += 1
+    logger.info(
+      "Loaded %d chemicals into the snapshot (%.1f MiB)",
+      len(self),
+      self.memory_bytes() / 2**20,
+    )
+
+  def _drain(self) -> set[int] | None:
+    """Apply queued deletes and return the ids to re-read.
+
+    None when the subscription was dropped and events may have been missed.
+    """
+    changed: set[int] = set()
+    while not self._subscription.queue.empty():
+      item = self._subscription.queue.get_nowait()
+      if item is None:
+        return None
+      event = json.loads(item[2])
+      if event["op"] == "deleted":
+        changed.discard(event["id"])
+        self.remove(event["id"])
+      else:
+        changed.add(event["id"])
+    return changed
+
+  async def _sync(self) -> bool:
+    """Apply every event received so far; False when a reload is needed."""
+    started = time.monotonic()
+    changed = self._drain()
+    if changed is None:
+      return False
+    if changed:
+      async with self._pool.acquire() as conn:
+        rows = await conn.fetch(_SELECT + "WHERE id = ANY($1::int[])", list(changed))
+      # A chemical missing here was deleted since; its delete event is queued
+      for row in rows:
+        self.upsert(row)
+    self._synced_at = started
+    self.stats["syncs"] += 1
+    return True
+
+  async def _sync_loop(self):
+    while True:
+      try:
+        if self._subscription is None:
+          await self._resync()
+        queue = self._subscription.queue
+        try:
+          # Wake up on the first change and put it back for `_drain`
+          item = await asyncio.wait_for(queue.get(), self.poll_interval)
+          queue.put_nowait(item)
+        except asyncio.TimeoutError:
+          pass
+        if not await self._sync():
+          await self._resync()
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        # Stop serving reads until a reload succeeds
+        logger.warning("Chemical snapshot sync failed, reloading: %s", e)
+        self._drop_subscription()
+        await asyncio.sleep(self.poll_interval)
+
+
+inventory_snapshot = InventorySnapshot(
+  max_staleness=settings.SNAPSHOT_MAX_STALENESS,
+  poll_interval=settings.SNAPSHOT_POLL_INTERVAL,
+  enabled=settings.SNAPSHOT_ENABLED,
+)
@@ -0,0 +1,102 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from fastapi import Response
+from starlette.datastructures import Headers
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def version_etag(key: str | int, updated_at: datetime) -> str:
+  """Strong ETag for a resource versioned by its `updated_at` timestamp."""
+  micros = (updated_at - _EPOCH) // timedelta(microseconds=1)
+  return f'"{key}-{micros:x}"'
+
+
+def parse_version_etag(tag: str) -> tuple[str, datetime] | None:
+  """Inverse of `version_etag`; None for tags it didn't produce."""
+  if tag.startswith("W/") or len(tag) < 2 or tag[0] != '"' or tag[-1] != '"':
+    return None
+  key, _, micros = tag[1:-1].rpartition("-")
+  try:
+    return key, _EPOCH + timedelta(microseconds=int(micros, 16))
+  except (ValueError, OverflowError):
+    return None
+
+
+def digest_etag(parts: Iterable[str | int | None]) -> str:
+  """Weak ETag summarising the versions a composite response is built from."""
+  digest = hashlib.blake2b(digest_size=12)
+  for part in parts:
+    digest.update(f"{part}\x1f".encode())
+  return f'W/"{digest.hexdigest()}"'
+
+
+def http_date(ts: datetime) -> str:
+  return format_datetime(ts.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_etags(header: str) -> list[str]:
+  return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+  return tag[2:] if tag.startswith("W/") else tag
+
+
+def has_validators(headers: Headers) -> bool:
+  return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def not_modified(
+  headers: Headers, etag: str, last_modified: datetime | None = None
+) -> bool:
+  """Whether a GET can be answered with 304 (RFC 9110, section 13.2.2).
+
+  If-None-Match uses weak comparison and takes precedence over
+  If-Modified-Since, which is compared at one-second resolution.
+  """
+  if_none_match = headers.get("if-none-match")
+  if if_none_match is not None:
+    tags = _parse_etags(if_none_match)
+    return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+  if_modified_since = headers.get("if-modified-since")
+  if if_modified_since is None or last_modified is None:
+    return False
+  try:
+    since = parsedate_to_datetime(if_modified_since)
+  except (TypeError, ValueError):
+    return False
+  if since.tzinfo is None:
+    since = since.replace(tzinfo=timezone.utc)
+  return last_modified.replace(microsecond=0) <= since
+
+
+def if_match_versions(if_match: str, key: str | int) -> list[datetime] | None:
+  """Versions of `key` an If-Match header accepts, for checking in SQL.
+
+  None means any version (`*`); an empty list means none can match.
+  """
+  tags = _parse_etags(if_match)
+  if "*" in tags:
+    return None
+  versions = []
+  for tag in tags:
+    parsed = parse_version_etag(tag)
+    if parsed is not None and parsed[0] == str(key):
+      versions.append(parsed[1])
+  return versions
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict:
+  headers = {"ETag": etag}
+  if last_modified is not None:
+    headers["Last-Modified"] = http_date(last_modified)
+  return headers
+
+
+def not_modified_response(etag: str, last_modified: datetime | None = None) -> Response:
+  return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -24,14 +24,89 @@ class Settings(BaseSettings):
   DB_PASSWORD: str = "postgres"
   DB_PORT: int = 5432
 
+  # Connection pool settings
+  DB_POOL_SIZE: int = 10
+  DB_MAX_OVERFLOW: int = 5
+  DB_POOL_TIMEOUT: float = 30.0
+  # Maximum age of a pooled connection in seconds (-1 for no limit); the
+  # dedicated asyncpg pools also close connections idle for DB_POOL_IDLE_TIMEOUT
+  DB_POOL_RECYCLE: int = 1800
+  DB_POOL_IDLE_TIMEOUT: float = 300.0
+  DB_STATEMENT_CACHE_SIZE: int = 100
+  # Connect through PgBouncer in transaction pooling mode: no statement caching
+  # or prepared statements, which don't survive a change of server connection
+  DB_PGBOUNCER: bool = False
+  # Open DB_POOL_SIZE connections (DB_REPLICA_POOL_SIZE per replica) and
+  # prepare the statements on them before a worker reports ready
+  DB_POOL_PREWARM: bool = True
+  DB_RAW_POOL: str = Field(
+    "engine",
+    description="Set 'engine' to borrow raw asyncpg connections from the "
+    "SQLAlchemy pool, or 'asyncpg' for a dedicated asyncpg pool",
+  )
+
+  # Read replicas: comma-separated postgresql:// DSNs, empty to disable
+  DB_REPLICA_URLS: str = ""
+  DB_REPLICA_POOL_SIZE: int = 10
+  DB_REPLICA_EJECT_SECONDS: float = 30.0
+  DB_REPLICA_HEALTH_INTERVAL: float = 5.0
+  # How long a read waits for a busy replica's pool before trying the next
+  # replica or the primary; a busy replica is not ejected
+  DB_REPLICA_ACQUIRE_TIMEOUT: float = 0.5
+
+  # Monthly inventory_logs partitions are created this far ahead, re-checked
+  # every LOG_PARTITION_CHECK_INTERVAL seconds
+  LOG_PARTITION_MONTHS_AHEAD: int = 3
+  LOG_PARTITION_CHECK_INTERVAL: float = 6 * 3600
+
+  # Write-behind inventory log appends: POST /chemicals/{id}/log is acknowledged
+  # once the log is fsynced to a local queue and written to Postgres in batches
+  LOG_WRITE_BEHIND: bool = False
+  LOG_WRITE_BEHIND_DIR: str = "var/log-queue"
+  LOG_WRITE_BEHIND_BATCH_SIZE: int = 500
+  LOG_WRITE_BEHIND_FLUSH_INTERVAL: float = 0.2
+  # Upper bound on app processes sharing LOG_WRITE_BEHIND_DIR
+  LOG_WRITE_BEHIND_SLOTS: int = 16
+
+  # Per-process in-memory copy of the chemicals table serving GET
+  # /chemicals/{id} and /chemicals/lookup while it is at most
+  # SNAPSHOT_MAX_STALENESS seconds behind
+  SNAPSHOT_ENABLED: bool = False
+  SNAPSHOT_MAX_STALENESS: float = 2.0
+  SNAPSHOT_POLL_INTERVAL: float = 0.5
+
+  # /health and /ready reuse a database reachability result for this long, and
+  # report it unreachable when SELECT 1 takes longer than the timeout
+  HEALTH_CHECK_TTL: float = 2.0
+  HEALTH_CHECK_TIMEOUT: float = 2.0
+
   API_V1_STR: str = "/api/v1"
   PROJECT_NAME: str = "Neotech Assignment"
   DEBUG: bool = False
+  # Encode hot read responses directly to JSON instead of through response models
+  FAST_SERIALIZATION: bool = True
+  # Share one query between concurrent identical chemical / log page reads
+  SINGLE_FLIGHT: bool = True
+  SINGLE_FLIGHT_TIMEOUT: float = 10.0
+
+  # Read cache settings
+  CACHE_BACKEND: str = Field("memory", description="Set 'memory', 'redis' or 'none'")
+  CACHE_TTL_SECONDS: float = 30.0
+  CACHE_MAX_ENTRIES: int = 10_000
+  CACHE_REDIS_URL: str = "redis://localhost:6379/0"
 
   model_config = SettingsConfigDict(
     env_file=_find_env_file(), env_file_encoding="utf-8", extra="ignore"
   )
 
+  @property
+  def replica_urls(self) -> list[str]:
+    return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+  @property
+  def statement_cache_size(self) -> int:
+    return 0 if self.DB_PGBOUNCER else self.DB_STATEMENT_CACHE_SIZE
+
   @field_validator("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD", mode="before")
   @classmethod
   def switch_db_for_environment(cls, v, info):
@@ -1,22 +1,34 @@
+import asyncio
 import contextlib
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Callable
+from uuid import uuid4
 
 import asyncpg
 from sqlalchemy.ext.asyncio import (
   AsyncConnection,
-  AsyncSession,
-  async_sessionmaker,
+  AsyncEngine,
   create_async_engine,
 )
 from sqlalchemy.orm import declarative_base
 
 from src.config import settings
+from src.instrumentation import (
+  InstrumentedConnection,
+  InstrumentedQueuePool,
+  instrument_engine,
+)
+from src.statements import ensure_prepared, prepare_statements
 
 
 class DatabaseSessionManager:
   def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
     self._engine = create_async_engine(host, **engine_kwargs)
-    self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
+
+  @property
+  def engine(self) -> AsyncEngine:
+    if self._engine is None:
+      raise Exception("DatabaseSessionManager is not initialized")
+    return self._engine
 
   async def close(self):
     if self._engine is None:
@@ -24,7 +36,6 @@ class DatabaseSessionManager:
     await self._engine.dispose()
 
     self._engine = None
-    self._sessionmaker = None
 
   @contextlib.asynccontextmanager
   async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -38,20 +49,6 @@ class DatabaseSessionManager:
         await connection.rollback()
         raise
 
-  @contextlib.asynccontextmanager
-  async def session(self) -> AsyncIterator[AsyncSession]:
-    if self._sessionmaker is None:
-      raise Exception("DatabaseSessionManager is not initialized")
-
-    session = self._sessionmaker()
-    try:
-      yield session
-    except Exception:
-      await session.rollback()
-      raise
-    finally:
-      await session.close()
-
 
 SQL_ALCHEMY_DB_URL = (
   f"postgresql+asyncpg://{settings.DB_USER}:"
@@ -64,21 +61,160 @@ ASYNC_DB_URL = (
   f"{settings.DB_PASSWORD}@{settings.DB_HOST}:"
   f"{settings.DB_PORT}/{settings.DB_NAME}"
 )
-sessionmanager = DatabaseSessionManager(SQL_ALCHEMY_DB_URL)
+sessionmanager = DatabaseSessionManager(
+  SQL_ALCHEMY_DB_URL,
+  {
+    "poolclass": InstrumentedQueuePool,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "connect_args": {
+      "connection_class": InstrumentedConnection,
+      "statement_cache_size": settings.statement_cache_size,
+      "prepared_statement_cache_size": settings.statement_cache_size,
+      # SQLAlchemy still prepares each statement; unique names keep them from
+      # clashing on server connections PgBouncer shares between clients
+      **(
+        {"prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"}
+        if settings.DB_PGBOUNCER
+        else {}
+      ),
+    },
+  },
+)
+instrument_engine(sessionmanager.engine.sync_engine)
 
 Base = declarative_base()
 
 
-async def get_db():
-  async with sessionmanager.session() as session:
-    yield session
+class EnginePool:
+  """Raw asyncpg connections borrowed from the SQLAlchemy engine's pool.
 
+  Exposes the `acquire()` part of the asyncpg.Pool API used by the raw query
+  paths, so ORM sessions and raw queries share one bounded pool per worker.
+  """
 
-pool: asyncpg.Pool | None = None
+  def __init__(self, engine: AsyncEngine):
+    self._engine = engine
 
+  @contextlib.asynccontextmanager
+  async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+    async with self._engine.connect() as connection:
+      raw_connection = await connection.get_raw_connection()
+      yield raw_connection.driver_connection
+
+  async def close(self):
+    # The engine owns the connections and is disposed by the session manager
+    return None
 
-async def get_pg_pool() -> asyncpg.Pool:
+
+pool: asyncpg.Pool | EnginePool | None = None
+_pool_lock = asyncio.Lock()
+
+
+async def create_pg_pool() -> asyncpg.Pool | EnginePool:
+  if settings.DB_RAW_POOL.lower() == "asyncpg":
+    return await asyncpg.create_pool(
+      ASYNC_DB_URL,
+      min_size=1,
+      max_size=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+      timeout=settings.DB_POOL_TIMEOUT,
+      max_inactive_connection_lifetime=settings.DB_POOL_IDLE_TIMEOUT,
+      statement_cache_size=settings.statement_cache_size,
+      connection_class=InstrumentedConnection,
+      init=prepare_statements,
+    )
+  return EnginePool(sessionmanager.engine)
+
+
+async def get_pg_pool() -> asyncpg.Pool | EnginePool:
   global pool
   if pool is None:
-    pool = await asyncpg.create_pool(ASYNC_DB_URL)
+    # Normally created by the app lifespan; the lock covers scripts and tests
+    # that call this lazily from concurrent tasks.
+    async with _pool_lock:
+      if pool is None:
+        pool = await create_pg_pool()
   return pool
+
+
+async def warm_pg_pool(pool: asyncpg.Pool | EnginePool, connections: int):
+  """Open `connections` connections in `pool` and prepare statements on each.
+
+  The connections are held until all of them are open, so every acquire
+  opens (or checks) a different one. Raises the first error hit.
+  """
+  barrier = asyncio.Barrier(connections)
+
+  async def warm():
+    try:
+      async with pool.acquire() as conn:
+        await ensure_prepared(conn)
+        await barrier.wait()
+    except BaseException:
+      # Release the connections already waiting on the barrier
+      await barrier.abort()
+      raise
+
+  results = await asyncio.gather(
+    *(warm() for _ in range(connections)), return_exceptions=True
+  )
+  for result in results:
+    if isinstance(result, BaseException) and not isinstance(
+      result, asyncio.BrokenBarrierError
+    ):
+      raise result
+
+
+def pool_stats() -> dict:
+  """Occupancy of the connection pools, read without checking anything out."""
+  stats = {"engine": sessionmanager.engine.pool.stats()}
+  if isinstance(pool, asyncpg.Pool):
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    stats["asyncpg"] = {
+      "size": size,
+      "max_size": pool.get_max_size(),
+      "in_use": size - idle,
+      "idle": idle,
+    }
+  return stats
+
+
+def pool_metrics() -> list[tuple[str, dict, float]]:
+  samples = []
+  for name, stats in pool_stats().items():
+    for key in ("size", "in_use", "idle", "waiting"):
+      if key in stats:
+        samples.append((f"db_pool_{key}", {"pool": name}, stats[key]))
+  engine_pool = sessionmanager.engine.pool
+  samples.append(("db_pool_acquires_total", {"pool": "engine"}, engine_pool.acquires))
+  samples.append(
+    ("db_pool_acquire_seconds_total", {"pool": "engine"}, engine_pool.acquire_seconds)
+  )
+  return samples
+
+
+async def recycle_pg_pools(
+  pools: Callable[[], list[asyncpg.Pool | EnginePool]], interval: float
+):
+  """Replace the connections of the asyncpg pools every `interval` seconds.
+
+  asyncpg's max_inactive_connection_lifetime only closes idle connections.
+  Expiring a pool makes it close each connection on its next release (or
+  acquire, if idle) and open a new one, which bounds connection age like
+  SQLAlchemy's pool_recycle, which already covers EnginePool.
+  """
+  while True:
+    await asyncio.sleep(interval)
+    for asyncpg_pool in pools():
+      if isinstance(asyncpg_pool, asyncpg.Pool):
+        await asyncpg_pool.expire_connections()
+
+
+async def close_pg_pool():
+  global pool
+  if pool is not None:
+    await pool.close()
+    pool = None
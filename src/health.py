@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import asyncpg
+
+from src.config import settings
+from src.database import ASYNC_DB_URL
+from src.singleflight import SingleFlight
+
+_PROBE_ERRORS = (
+  OSError,
+  asyncio.TimeoutError,
+  asyncpg.PostgresError,
+  asyncpg.InterfaceError,
+)
+
+
+class DatabaseProbe:
+  """Database reachability check for health and readiness probes.
+
+  Runs `SELECT 1` on a connection of its own, so probes neither take a
+  connection from the pools nor queue behind requests when those are
+  exhausted. The result (including a failure) is reused for `ttl` seconds, and
+  concurrent probes that find it expired share a single check.
+  """
+
+  def __init__(self, ttl: float, timeout: float):
+    self.ttl = ttl
+    self.timeout = timeout
+    self._conn: asyncpg.Connection | None = None
+    self._result: dict | None = None
+    self._checked_at = 0.0
+    self._flight = SingleFlight()
+    self.stats = {"checks": 0, "failures": 0}
+
+  async def check(self) -> dict:
+    """Return `{"reachable": bool, ...}` from the last check, rechecking if stale."""
+    if self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+      return self._result
+    return await self._flight.do("database", self._check)
+
+  async def _check(self) -> dict:
+    self.stats["checks"] += 1
+    started = time.perf_counter()
+    try:
+      async with asyncio.timeout(self.timeout):
+        if self._conn is None or self._conn.is_closed():
+          self._conn = await asyncpg.connect(ASYNC_DB_URL, statement_cache_size=0)
+        await self._conn.fetchval("SELECT 1")
+      result = {
+        "reachable": True,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+      }
+    except _PROBE_ERRORS as e:
+      self.stats["failures"] += 1
+      self._discard()
+      result = {"reachable": False, "error": str(e) or type(e).__name__}
+    self._result = result
+    self._checked_at = time.monotonic()
+    return result
+
+  def _discard(self):
+    # A timed out query leaves the connection mid-protocol; don't reuse it
+    if self._conn is not None:
+      self._conn.terminate()
+      self._conn = None
+
+  async def close(self):
+    if self._conn is not None:
+      await self._conn.close()
+      self._conn = None
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    samples = [
+      (f"health_db_{name}_total", {}, value) for name, value in self.stats.items()
+    ]
+    if self._result is not None:
+      samples.append(("health_db_reachable", {}, int(self._result["reachable"])))
+    return samples
+
+
+db_probe = DatabaseProbe(
+  ttl=settings.HEALTH_CHECK_TTL, timeout=settings.HEALTH_CHECK_TIMEOUT
+)
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import asyncpg
+
+from src.chemical.schemas import FileFormat
+from src.chemical.service import IMPORT_BATCH_SIZE, import_chemicals
+from src.config import settings
+from src.database import ASYNC_DB_URL
+
+CHUNK_SIZE = 1 << 16
+
+
+async def read_chunks(path: Path):
+  with path.open("rb") as f:
+    while chunk := f.read(CHUNK_SIZE):
+      yield chunk
+
+
+async def main(path: Path, file_format: FileFormat, batch_size: int):
+  pool = await asyncpg.create_pool(
+    ASYNC_DB_URL,
+    min_size=1,
+    max_size=2,
+    statement_cache_size=settings.statement_cache_size,
+  )
+  try:
+    report = await import_chemicals(pool, read_chunks(path), file_format, batch_size)
+  finally:
+    await pool.close()
+
+  for error in report["errors"]:
+    sys.stderr.write(f"row {error['row']}: {error['error']}\n")
+  summary = {key: report[key] for key in ("processed", "imported", "failed")}
+  sys.stdout.write(json.dumps(summary) + "\n")
+  return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Bulk import chemicals")
+  parser.add_argument("path", type=Path, help="CSV or NDJSON file")
+  parser.add_argument(
+    "--format",
+    choices=[f.value for f in FileFormat],
+    help="File format; inferred from the extension when omitted",
+  )
+  parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+  args = parser.parse_args()
+
+  file_format = FileFormat(args.format) if args.format else None
+  if file_format is None:
+    is_ndjson = args.path.suffix.lower() in (".ndjson", ".jsonl")
+    file_format = FileFormat.ndjson if is_ndjson else FileFormat.csv
+  sys.exit(asyncio.run(main(args.path, file_format, args.batch_size)))
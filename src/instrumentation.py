@@ -0,0 +1,264 @@
+import bisect
+import functools
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+  __slots__ = ("queries", "db_time", "pool_wait")
+
+  def __init__(self):
+    self.queries = 0
+    self.db_time = 0.0
+    self.pool_wait = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+  "request_stats", default=None
+)
+
+
+def record_query(elapsed: float):
+  stats = _request_stats.get()
+  if stats is not None:
+    stats.queries += 1
+    stats.db_time += elapsed
+
+
+def _timed(method):
+  @functools.wraps(method)
+  async def wrapper(self, *args, **kwargs):
+    if _request_stats.get() is None:
+      return await method(self, *args, **kwargs)
+    started = time.perf_counter()
+    try:
+      return await method(self, *args, **kwargs)
+    finally:
+      record_query(time.perf_counter() - started)
+
+  return wrapper
+
+
+class InstrumentedConnection(asyncpg.Connection):
+  """asyncpg connection that reports raw query count and time per request.
+
+  Statements SQLAlchemy sends as prepared statements bypass these methods and
+  are counted by the engine events in `instrument_engine` instead, so nothing
+  is counted twice.
+  """
+
+  execute = _timed(asyncpg.Connection.execute)
+  executemany = _timed(asyncpg.Connection.executemany)
+  fetch = _timed(asyncpg.Connection.fetch)
+  fetchrow = _timed(asyncpg.Connection.fetchrow)
+  fetchval = _timed(asyncpg.Connection.fetchval)
+  fetchmany = _timed(asyncpg.Connection.fetchmany)
+  copy_records_to_table = _timed(asyncpg.Connection.copy_records_to_table)
+  copy_to_table = _timed(asyncpg.Connection.copy_to_table)
+  copy_from_table = _timed(asyncpg.Connection.copy_from_table)
+  copy_from_query = _timed(asyncpg.Connection.copy_from_query)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+  """Engine pool that reports how long each checkout waited.
+
+  Also keeps pool-wide checkout counters that health checks read without
+  checking a connection out themselves.
+  """
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.waiting = 0
+    self.acquires = 0
+    self.acquire_seconds = 0.0
+    # Exponentially weighted average over roughly the last 20 checkouts
+    self.recent_acquire_seconds = 0.0
+
+  def _do_get(self):
+    started = time.perf_counter()
+    self.waiting += 1
+    try:
+      return super()._do_get()
+    finally:
+      elapsed = time.perf_counter() - started
+      self.waiting -= 1
+      self.acquires += 1
+      self.acquire_seconds += elapsed
+      self.recent_acquire_seconds += (elapsed - self.recent_acquire_seconds) * 0.1
+      stats = _request_stats.get()
+      if stats is not None:
+        stats.pool_wait += elapsed
+
+  def stats(self) -> dict:
+    return {
+      "size": self.size(),
+      "max_size": self.size() + max(self._max_overflow, 0),
+      "in_use": self.checkedout(),
+      "idle": self.checkedin(),
+      "waiting": self.waiting,
+      "acquires": self.acquires,
+      "acquire_ms_avg": round(
+        self.acquire_seconds / self.acquires * 1000 if self.acquires else 0.0, 3
+      ),
+      "acquire_ms_recent": round(self.recent_acquire_seconds * 1000, 3),
+    }
+
+
+def instrument_engine(engine: Engine):
+  """Count ORM statements and their execution time per request."""
+
+  @event.listens_for(engine, "before_cursor_execute")
+  def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._query_started = time.perf_counter()
+
+  @event.listens_for(engine, "after_cursor_execute")
+  def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    record_query(time.perf_counter() - context._query_started)
+
+
+class Histogram:
+  __slots__ = ("counts", "sum", "count")
+
+  def __init__(self):
+    self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float):
+    self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+    self.sum += value
+    self.count += 1
+
+
+class RouteMetrics:
+  __slots__ = ("latency", "queries", "db_time", "pool_wait")
+
+  def __init__(self):
+    self.latency = Histogram()
+    self.queries = 0
+    self.db_time = 0.0
+    self.pool_wait = 0.0
+
+
+class Metrics:
+  """Process-local metrics rendered in the Prometheus text format.
+
+  Other modules expose their own counters by registering a collector that
+  returns `(name, labels, value)` samples.
+  """
+
+  def __init__(self):
+    self._routes: dict[tuple[str, str, int], RouteMetrics] = {}
+    self._collectors: list[Callable[[], list[tuple[str, dict, float]]]] = []
+
+  def add_collector(self, collector: Callable[[], list[tuple[str, dict, float]]]):
+    self._collectors.append(collector)
+
+  def observe(
+    self, method: str, route: str, status: int, elapsed: float, stats: RequestStats
+  ):
+    key = (method, route, status)
+    metrics = self._routes.get(key)
+    if metrics is None:
+      metrics = self._routes[key] = RouteMetrics()
+    metrics.latency.observe(elapsed)
+    metrics.queries += stats.queries
+    metrics.db_time += stats.db_time
+    metrics.pool_wait += stats.pool_wait
+
+  def render(self) -> str:
+    lines = [
+      "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), metrics in self._routes.items():
+      labels = f'method="{method}",route="{route}",status="{status}"'
+      cumulative = 0
+      for bound, count in zip(LATENCY_BUCKETS, metrics.latency.counts):
+        cumulative += count
+        lines.append(
+          f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+        )
+      lines.append(
+        f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+        f"{metrics.latency.count}"
+      )
+      lines.append(
+        f"http_request_duration_seconds_sum{{{labels}}} {metrics.latency.sum}"
+      )
+      lines.append(
+        f"http_request_duration_seconds_count{{{labels}}} {metrics.latency.count}"
+      )
+    for name, attribute in (
+      ("db_queries_total", "queries"),
+      ("db_query_seconds_total", "db_time"),
+      ("db_pool_wait_seconds_total", "pool_wait"),
+    ):
+      lines.append(f"# TYPE {name} counter")
+      for (method, route, status), metrics in self._routes.items():
+        labels = f'method="{method}",route="{route}",status="{status}"'
+        lines.append(f"{name}{{{labels}}} {getattr(metrics, attribute)}")
+    for collector in self._collectors:
+      for name, labels, value in collector():
+        rendered = ",".join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class InstrumentationMiddleware:
+  """Times each request, attaches a Server-Timing header and records metrics.
+
+  Implemented as plain ASGI middleware so the per-request cost is a context
+  variable and a handful of counters.
+  """
+
+  def __init__(self, app: ASGIApp):
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    started = time.perf_counter()
+    status = 500
+
+    async def send_with_timing(message: Message):
+      nonlocal status
+      if message["type"] == "http.response.start":
+        status = message["status"]
+        elapsed = (time.perf_counter() - started) * 1000
+        headers = MutableHeaders(scope=message)
+        headers.append(
+          "Server-Timing",
+          f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+          f"pool;dur={stats.pool_wait * 1000:.2f}, app;dur={elapsed:.2f}",
+        )
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_with_timing)
+    finally:
+      _request_stats.reset(token)
+      route = scope.get("route")
+      metrics.observe(
+        scope["method"],
+        route.path if route is not None else "unmatched",
+        status,
+        time.perf_counter() - started,
+        stats,
+      )
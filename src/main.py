@@ -1,13 +1,85 @@
-from fastapi import Depends, FastAPI
+import asyncio
+import contextlib
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from src import statements
+from src.cache import cache
 from src.chemical import router as chemical_router
-from src.database import get_db
+from src.chemical.changes import change_feed
+from src.chemical.invalidation import cache_invalidator
+from src.chemical.log_queue import log_queue
+from src.chemical.partitions import ensure_log_partitions, maintain_log_partitions
+from src.chemical.snapshot import inventory_snapshot
+from src.config import settings
+from src.database import (
+  close_pg_pool,
+  get_pg_pool,
+  pool_metrics,
+  pool_stats,
+  recycle_pg_pools,
+  sessionmanager,
+  warm_pg_pool,
+)
 from src.exceptions import register_exception_handlers
+from src.health import db_probe
+from src.instrumentation import InstrumentationMiddleware, metrics
+from src.replicas import (
+  LSN_HEADER,
+  RETURN_LSN_HEADER,
+  current_wal_lsn,
+  replica_router,
+)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+  app.state.ready = False
+  pool = await get_pg_pool()
+  if settings.DB_POOL_PREWARM:
+    await warm_pg_pool(pool, settings.DB_POOL_SIZE)
+  await ensure_log_partitions(pool)
+  partition_task = asyncio.create_task(maintain_log_partitions(pool))
+  await replica_router.start(pool)
+  if settings.DB_POOL_PREWARM:
+    await replica_router.warm()
+  recycle_task = None
+  if settings.DB_POOL_RECYCLE > 0:
+    # The engine pool recycles by itself; dedicated asyncpg pools don't
+    recycle_task = asyncio.create_task(
+      recycle_pg_pools(
+        lambda: [pool, *replica_router.pools],
+        settings.DB_POOL_RECYCLE,
+      )
+    )
+  if log_queue.enabled:
+    await log_queue.start(pool)
+  if inventory_snapshot.enabled:
+    await inventory_snapshot.start(pool)
+  if cache_invalidator.enabled:
+    await cache_invalidator.start()
+  app.state.ready = True
+  yield
+  app.state.ready = False
+  await cache_invalidator.close()
+  await inventory_snapshot.close()
+  await change_feed.close()
+  await log_queue.close()
+  for task in (partition_task, recycle_task):
+    if task is not None:
+      task.cancel()
+      with contextlib.suppress(asyncio.CancelledError):
+        await task
+  await replica_router.close()
+  await db_probe.close()
+  await close_pg_pool()
+  await cache.close()
+  await sessionmanager.close()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 register_exception_handlers(app)
 origins = [
   "http://localhost:8080",
@@ -20,23 +92,98 @@ app.add_middleware(
   allow_methods=["*"],
   allow_headers=["*"],
 )
+app.add_middleware(InstrumentationMiddleware)
+metrics.add_collector(
+  lambda: [
+    (f"cache_{name}_total", {}, value) for name, value in cache.stats.as_dict().items()
+  ]
+)
+metrics.add_collector(change_feed.metrics)
+metrics.add_collector(statements.metrics)
+metrics.add_collector(pool_metrics)
+metrics.add_collector(db_probe.metrics)
+metrics.add_collector(chemical_router.read_flights.metrics)
+if log_queue.enabled:
+  metrics.add_collector(log_queue.metrics)
+if inventory_snapshot.enabled:
+  metrics.add_collector(inventory_snapshot.metrics)
+if cache_invalidator.enabled:
+  metrics.add_collector(cache_invalidator.metrics)
 
 app.include_router(chemical_router.router)
 
 
+if replica_router.enabled:
+
+  @app.middleware("http")
+  async def attach_wal_lsn(request: Request, call_next):
+    """Give successful writes a WAL position clients can read their writes at.
+
+    Only for clients that ask with `X-Return-LSN: true`, as reading it costs a
+    primary connection and a round trip after the write. It is read after
+    the write committed; an LSN from inside the write's transaction would be
+    ahead of the data but not of its commit record.
+    """
+    response = await call_next(request)
+    if (
+      request.method not in ("GET", "HEAD", "OPTIONS")
+      and response.status_code < 400
+      and request.headers.get(RETURN_LSN_HEADER, "").lower() == "true"
+    ):
+      response.headers[LSN_HEADER] = await current_wal_lsn()
+    return response
+
+
 @app.get("/")
 async def root():
   return {"message": "Neotech Assignment"}
 
 
-@app.get(
-  "/health",
-)
-async def health(db: AsyncSession = Depends(get_db)):
-  try:
-    # Simple DB check
-    result = await db.execute(text("SELECT 1"))
-    _ = result.scalar()
-    return {"status": "ok", "database": "reachable"}
-  except Exception as e:
-    return {"status": "error", "database": str(e)}
+@app.get("/live")
+async def live():
+  """Liveness probe: answers while the event loop does, with pool statistics.
+
+  Never touches the database, so a worker that is busy or whose database is
+  down isn't restarted for it.
+  """
+  return {"status": "ok", "pools": pool_stats()}
+
+
+@app.get("/health")
+async def health():
+  """Database connectivity check from the shared, briefly cached probe."""
+  database = await db_probe.check()
+  return {
+    "status": "ok" if database["reachable"] else "error",
+    "database": "reachable" if database["reachable"] else database["error"],
+    "pools": pool_stats(),
+  }
+
+
+@app.get("/ready")
+async def ready(request: Request):
+  """Readiness probe: whether this worker should receive traffic.
+
+  503 until start-up has warmed the pools, again on shutdown, and while the
+  cached database check fails. Pool exhaustion alone doesn't make a worker
+  unready; the pool statistics are reported for the orchestrator to see.
+  """
+  if not getattr(request.app.state, "ready", False):
+    return JSONResponse({"status": "unavailable"}, status_code=503)
+  database = await db_probe.check()
+  body = {
+    "status": "ready" if database["reachable"] else "unavailable",
+    "database": database,
+    "pools": pool_stats(),
+  }
+  return JSONResponse(body, status_code=200 if database["reachable"] else 503)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+  return {"backend": type(cache).__name__, **cache.stats.as_dict()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+  return metrics.render()
@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum as PyEnum
+from typing import Any
+
+from fastapi import HTTPException
+
+# Range of Postgres integer (int4) columns and parameters
+INT4_MIN = -(2**31)
+INT4_MAX = 2**31 - 1
+
+
+def encode_cursor(*values: Any) -> str:
+  """Encode the sort key of the last row of a page into an opaque cursor.
+
+  Datetimes are stored as ISO 8601 strings; everything else must be JSON
+  serializable.
+  """
+  payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+  raw = json.dumps(payload, separators=(",", ":")).encode()
+  return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+  """Decode a cursor produced by `encode_cursor`.
+
+  Args:
+      cursor (str): Opaque cursor received from the client.
+      *types (type): Expected type of each value in the cursor.
+
+  Returns:
+      tuple: Decoded values, converted to the requested types.
+
+  Raises:
+      HTTPException: If the cursor is malformed or an int is outside int4.
+  """
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(payload, list) or len(payload) != len(types):
+      raise ValueError("cursor arity mismatch")
+    values = tuple(
+      datetime.fromisoformat(v) if t is datetime else t(v)
+      for t, v in zip(types, payload)
+    )
+    # Cursor ints are bound to integer columns; past int4 asyncpg can't send them
+    if any(t is int and not INT4_MIN <= v <= INT4_MAX for t, v in zip(types, values)):
+      raise ValueError("cursor value out of range")
+    return values
+  except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class CountStrategy(str, PyEnum):
+  """How the `total` of a paginated response is computed.
+
+  exact: run COUNT(*) over the filtered rows.
+  estimated: read a cheap pre-computed value (planner statistics or a counter
+      maintained on write).
+  none: skip the count and return `total` as null.
+  """
+
+  exact = "exact"
+  estimated = "estimated"
+  none = "none"
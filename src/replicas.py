@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import logging
+import re
+import time
+from typing import AsyncIterator
+
+import asyncpg
+from fastapi import Header, HTTPException
+
+from src.config import settings
+from src.database import EnginePool, get_pg_pool, warm_pg_pool
+from src.instrumentation import InstrumentedConnection
+from src.statements import prepare_statements
+
+logger = logging.getLogger(__name__)
+
+LSN_HEADER = "X-DB-LSN"
+RETURN_LSN_HEADER = "X-Return-LSN"
+_LSN_PATTERN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+_REPLICA_ERRORS = (
+  OSError,
+  asyncio.TimeoutError,
+  asyncpg.PostgresError,
+  asyncpg.InterfaceError,
+)
+
+
+class Replica:
+  def __init__(self, dsn: str):
+    self.dsn = dsn
+    self.pool: asyncpg.Pool | None = None
+    self.ejected_until = 0.0
+
+  @property
+  def healthy(self) -> bool:
+    return self.pool is not None and self.ejected_until <= time.monotonic()
+
+
+class ReplicaRouter:
+  """Routes raw read queries to read replicas.
+
+  Replicas are used round-robin. A replica that fails with a connection or
+  Postgres error is ejected for `DB_REPLICA_EJECT_SECONDS` and readmitted by
+  the background health check once it answers again; one whose pool stays
+  exhausted for `DB_REPLICA_ACQUIRE_TIMEOUT` is only skipped. Reads fall back
+  to the primary when no replica is available.
+  """
+
+  def __init__(self, dsns: list[str]):
+    self._replicas = [Replica(dsn) for dsn in dsns]
+    self._next = 0
+    self._primary: asyncpg.Pool | EnginePool | None = None
+    self._health_task: asyncio.Task | None = None
+
+  @property
+  def enabled(self) -> bool:
+    return bool(self._replicas)
+
+  @property
+  def pools(self) -> list[asyncpg.Pool]:
+    return [replica.pool for replica in self._replicas if replica.pool is not None]
+
+  async def start(self, primary: asyncpg.Pool | EnginePool):
+    self._primary = primary
+    for replica in self._replicas:
+      await self._connect(replica)
+    if self._replicas:
+      self._health_task = asyncio.create_task(self._health_loop())
+
+  async def close(self):
+    if self._health_task is not None:
+      self._health_task.cancel()
+      with contextlib.suppress(asyncio.CancelledError):
+        await self._health_task
+      self._health_task = None
+    for replica in self._replicas:
+      if replica.pool is not None:
+        await replica.pool.close()
+        replica.pool = None
+
+  async def warm(self):
+    """Pre-open each connected replica's pool; replicas that fail are ejected.
+
+    Never raises: a replica that can't be warmed only costs its share of
+    reads until the health check readmits it.
+    """
+    for replica in self._replicas:
+      if not replica.healthy:
+        continue
+      try:
+        await warm_pg_pool(replica.pool, settings.DB_REPLICA_POOL_SIZE)
+      except Exception as e:
+        self.eject(replica, e)
+
+  def reader(self, min_lsn: str | None = None) -> "ReadPool":
+    return ReadPool(self, min_lsn)
+
+  def eject(self, replica: Replica, error: Exception):
+    replica.ejected_until = time.monotonic() + settings.DB_REPLICA_EJECT_SECONDS
+    logger.warning("Ejecting read replica %s: %s", replica.dsn, error)
+
+  def _candidates(self) -> list[Replica]:
+    start = self._next
+    self._next = (self._next + 1) % len(self._replicas)
+    ordered = self._replicas[start:] + self._replicas[:start]
+    return [replica for replica in ordered if replica.healthy]
+
+  async def _connect(self, replica: Replica):
+    try:
+      replica.pool = await asyncpg.create_pool(
+        replica.dsn,
+        min_size=1,
+        max_size=settings.DB_REPLICA_POOL_SIZE,
+        timeout=settings.DB_POOL_TIMEOUT,
+        max_inactive_connection_lifetime=settings.DB_POOL_IDLE_TIMEOUT,
+        statement_cache_size=settings.statement_cache_size,
+        connection_class=InstrumentedConnection,
+        init=prepare_statements,
+      )
+    except _REPLICA_ERRORS as e:
+      self.eject(replica, e)
+
+  async def _health_loop(self):
+    while True:
+      await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
+      for replica in self._replicas:
+        if replica.pool is None:
+          await self._connect(replica)
+          continue
+        try:
+          await replica.pool.fetchval(
+            "SELECT 1", timeout=settings.DB_REPLICA_HEALTH_INTERVAL
+          )
+        except _REPLICA_ERRORS as e:
+          self.eject(replica, e)
+        else:
+          if replica.ejected_until:
+            logger.info("Readmitting read replica %s", replica.dsn)
+          replica.ejected_until = 0.0
+
+  async def _acquire_replica(
+    self, min_lsn: str | None
+  ) -> tuple[asyncpg.Connection, asyncpg.Pool] | None:
+    for replica in self._candidates():
+      try:
+        conn = await replica.pool.acquire(timeout=settings.DB_REPLICA_ACQUIRE_TIMEOUT)
+      except asyncio.TimeoutError:
+        # Pool exhausted: busy rather than broken, so keep it in rotation
+        continue
+      except _REPLICA_ERRORS as e:
+        self.eject(replica, e)
+        continue
+      if min_lsn is None:
+        return conn, replica.pool
+      caught_up = False
+      try:
+        caught_up = await conn.fetchval(
+          "SELECT pg_last_wal_replay_lsn() >= $1::pg_lsn", min_lsn
+        )
+      except _REPLICA_ERRORS as e:
+        self.eject(replica, e)
+      finally:
+        if not caught_up:
+          await replica.pool.release(conn)
+      if caught_up:
+        return conn, replica.pool
+    return None
+
+
+class ReadPool:
+  """Pool-like view over the replicas for a single request.
+
+  With `min_lsn` set only replicas that have replayed the primary's WAL up to
+  that position are used, which gives the caller read-your-writes.
+
+  `current` tells whether the last connection handed out was the primary's or
+  a replica's checked against `min_lsn`; rows read from a replica that may lag
+  must not be put in the shared cache.
+  """
+
+  def __init__(self, router: ReplicaRouter, min_lsn: str | None):
+    self._router = router
+    self.min_lsn = min_lsn
+    self.current = False
+
+  @contextlib.asynccontextmanager
+  async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+    acquired = await self._router._acquire_replica(self.min_lsn)
+    if acquired is None:
+      self.current = True
+      async with self._router._primary.acquire() as conn:
+        yield conn
+      return
+
+    conn, pool = acquired
+    self.current = self.min_lsn is not None
+    try:
+      yield conn
+    finally:
+      await pool.release(conn)
+
+
+replica_router = ReplicaRouter(settings.replica_urls)
+
+
+def reads_from_cache(pool: asyncpg.Pool | EnginePool | ReadPool) -> bool:
+  """Whether reads through `pool` may be answered from the shared cache.
+
+  Not when the caller asked for read-your-writes: the cached entry may have
+  been filled before its write.
+  """
+  return not isinstance(pool, ReadPool) or pool.min_lsn is None
+
+
+def writes_to_cache(pool: asyncpg.Pool | EnginePool | ReadPool) -> bool:
+  """Whether the row just read through `pool` may be put in the shared cache."""
+  return not isinstance(pool, ReadPool) or pool.current
+
+
+async def get_read_pool(
+  min_lsn: str | None = Header(None, alias="X-Min-LSN"),
+) -> asyncpg.Pool | EnginePool | ReadPool:
+  """Connection source for read-only endpoints.
+
+  Clients that need to see their own writes send the write with
+  `X-Return-LSN: true` and echo the `X-DB-LSN` header of its response back as
+  `X-Min-LSN`.
+  """
+  if not replica_router.enabled:
+    return await get_pg_pool()
+  if min_lsn is not None and not _LSN_PATTERN.match(min_lsn):
+    raise HTTPException(status_code=400, detail="Invalid X-Min-LSN header")
+  return replica_router.reader(min_lsn)
+
+
+async def current_wal_lsn() -> str:
+  pool = await get_pg_pool()
+  async with pool.acquire() as conn:
+    return await conn.fetchval("SELECT pg_current_wal_lsn()::text")
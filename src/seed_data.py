@@ -1,37 +1,54 @@
 import asyncio
+import json
+import logging
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+import asyncpg
 
-from src.chemical.models import Chemical
-from src.database import SQL_ALCHEMY_DB_URL
+from src.chemical.schemas import FileFormat
+from src.chemical.service import import_chemicals
+from src.config import settings
+from src.database import ASYNC_DB_URL
 
-# Build async database URL
-ASYNC_DB_URL = SQL_ALCHEMY_DB_URL
+logger = logging.getLogger(__name__)
 
-# Async engine + session
-engine = create_async_engine(ASYNC_DB_URL, echo=True)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+CHEMICALS = [
+  {"name": "Water", "cas_number": "7732-18-5", "quantity": 100, "unit": "L"},
+  {"name": "Carbon Dioxide", "cas_number": "124-38-9", "quantity": 50, "unit": "kg"},
+  {"name": "Methane", "cas_number": "74-82-8", "quantity": 200, "unit": "m³"},
+]
 
 
-async def seed():
-  chemicals_data = [
-    {"name": "Water", "cas_number": "7732-18-5", "quantity": 100, "unit": "L"},
-    {"name": "Carbon Dioxide", "cas_number": "124-38-9", "quantity": 50, "unit": "kg"},
-    {"name": "Methane", "cas_number": "74-82-8", "quantity": 200, "unit": "m³"},
-  ]
+async def _ndjson(rows: list[dict]):
+  yield "".join(json.dumps(row) + "\n" for row in rows).encode()
 
-  async with AsyncSessionLocal() as session:
-    # Check if already seeded
-    result = await Chemical.get_all(session)
-    if result["total"] != 0:
-      return
 
-  # Call create in separate sessions for atomic insert
-  for data in chemicals_data:
-    async with AsyncSessionLocal() as session:
-      await Chemical.create(session, **data)
+async def seed(pool: asyncpg.Pool) -> bool:
+  """Load the sample chemicals into an empty database.
+
+  Goes through the bulk import path, so all rows and their "add" logs are
+  written in one transaction. Returns whether anything was seeded.
+  """
+  async with pool.acquire() as conn:
+    if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM chemicals)"):
+      return False
+  report = await import_chemicals(pool, _ndjson(CHEMICALS), FileFormat.ndjson)
+  for error in report["errors"]:
+    logger.error("Seed row %s: %s", error["row"], error["error"])
+  return report["imported"] > 0
+
+
+async def main():
+  pool = await asyncpg.create_pool(
+    ASYNC_DB_URL,
+    min_size=1,
+    max_size=1,
+    statement_cache_size=settings.statement_cache_size,
+  )
+  try:
+    await seed(pool)
+  finally:
+    await pool.close()
 
 
 if __name__ == "__main__":
-  asyncio.run(seed())
+  asyncio.run(main())
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import HTTPException
+
+
+class SingleFlight:
+  """Coalesces concurrent identical calls into one.
+
+  The first caller for a key starts the call as its own task; callers that
+  arrive while it is running wait for the same result or exception instead
+  of starting another. Running the call as a task means a caller that goes
+  away (e.g. a disconnected client) doesn't cancel it for the others. Every
+  caller waits at most `timeout` seconds.
+
+  Results are shared between callers and must be treated as read-only.
+  """
+
+  def __init__(self, timeout: float | None = None):
+    self.timeout = timeout
+    self._calls: dict[Hashable, asyncio.Task] = {}
+    self.stats = {"calls": 0, "coalesced": 0, "timeouts": 0}
+
+  @property
+  def in_flight(self) -> int:
+    return len(self._calls)
+
+  async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run `call()` unless an identical call is already in flight.
+
+    Raises:
+        HTTPException: 503 if the shared call doesn't finish within the
+            timeout. Exceptions raised by the call are re-raised as is.
+    """
+    task = self._calls.get(key)
+    if task is None:
+      self.stats["calls"] += 1
+      task = asyncio.ensure_future(call())
+      self._calls[key] = task
+      task.add_done_callback(lambda done: self._finish(key, done))
+    else:
+      self.stats["coalesced"] += 1
+
+    try:
+      return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+    except asyncio.TimeoutError:
+      if task.done():
+        # The call itself raised TimeoutError
+        raise
+      self.stats["timeouts"] += 1
+      raise HTTPException(status_code=503, detail="Timed out waiting for the database")
+
+  def _finish(self, key: Hashable, task: asyncio.Task):
+    if self._calls.get(key) is task:
+      del self._calls[key]
+    # Mark the exception as retrieved when every waiter has given up
+    if not task.cancelled():
+      task.exception()
+
+  def metrics(self) -> list[tuple[str, dict, float]]:
+    samples = [("singleflight_in_flight", {}, self.in_flight)]
+    samples += [
+      (f"singleflight_{name}_total", {}, value) for name, value in self.stats.items()
+    ]
+    return samples
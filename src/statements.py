@@ -0,0 +1,149 @@
+"""Registry of named SQL statements for the raw asyncpg query paths.
+
+Statements are declared once with `statement()`. While prepared statements
+are enabled every connection prepares all of them up front: connections of a
+dedicated asyncpg pool in its `init` hook, connections borrowed from the
+SQLAlchemy engine on their first use. Later executions only bind and run.
+
+Behind PgBouncer in transaction pooling mode consecutive transactions may
+land on different server connections, which don't have the statements
+prepared. With `DB_PGBOUNCER` (or `DB_STATEMENT_CACHE_SIZE=0`) statements are
+sent unprepared instead.
+"""
+
+import logging
+import time
+import weakref
+from typing import Any
+
+import asyncpg
+
+from src.config import settings
+from src.instrumentation import record_query
+
+logger = logging.getLogger(__name__)
+
+
+class Row(asyncpg.Record):
+  """Record whose columns can also be read as attributes.
+
+  Lets FastAPI validate rows against a response model directly, without
+  copying them into dicts first.
+  """
+
+  def __getattr__(self, name: str) -> Any:
+    try:
+      return self[name]
+    except KeyError:
+      raise AttributeError(name) from None
+
+
+STATEMENTS: dict[str, str] = {}
+stats = {"prepared": 0, "executions": 0, "reprepared": 0}
+
+# Connection -> its prepared statements by name
+_prepared: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# Connection -> when preparing on it last failed
+_failed: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# How long a connection sends statements unprepared after preparing failed
+PREPARE_RETRY_SECONDS = 60.0
+
+
+def _connection(conn: asyncpg.Connection) -> asyncpg.Connection:
+  # asyncpg.Pool hands out PoolConnectionProxy objects, which can't be weakly
+  # referenced; its `init` hook gets the connection itself
+  return getattr(conn, "_con", None) or conn
+
+
+def statement(name: str, sql: str) -> str:
+  """Register `sql` under `name` and return the name."""
+  if STATEMENTS.get(name, sql) != sql:
+    raise ValueError(f"Statement {name!r} is already registered")
+  STATEMENTS[name] = sql
+  return name
+
+
+def prepare_enabled() -> bool:
+  return settings.statement_cache_size > 0
+
+
+async def prepare_statements(conn: asyncpg.Connection):
+  """Prepare every registered statement on `conn`; usable as a pool `init`.
+
+  A schema that isn't migrated yet doesn't stop the connection from being
+  used: the statements are sent unprepared, and preparing is retried on it
+  every `PREPARE_RETRY_SECONDS`.
+  """
+  if not prepare_enabled():
+    return
+  conn = _connection(conn)
+  prepared = {}
+  try:
+    for name, sql in STATEMENTS.items():
+      prepared[name] = await conn.prepare(sql, record_class=Row)
+  except asyncpg.PostgresError as e:
+    logger.warning("Could not prepare statement %s: %s", name, e)
+    _failed[conn] = time.monotonic()
+    return
+  _failed.pop(conn, None)
+  _prepared[conn] = prepared
+  stats["prepared"] += len(prepared)
+
+
+async def ensure_prepared(conn: asyncpg.Connection):
+  """Prepare the statements on `conn` unless it has them or recently failed to."""
+  conn = _connection(conn)
+  if not prepare_enabled() or conn in _prepared:
+    return
+  failed_at = _failed.get(conn)
+  if failed_at is None or time.monotonic() - failed_at >= PREPARE_RETRY_SECONDS:
+    await prepare_statements(conn)
+
+
+async def _execute(conn: asyncpg.Connection, method: str, name: str, args: tuple):
+  await ensure_prepared(conn)
+  prepared = _prepared.get(_connection(conn))
+  if prepared is None:
+    if method == "fetchval":
+      return await conn.fetchval(STATEMENTS[name], *args)
+    return await getattr(conn, method)(STATEMENTS[name], *args, record_class=Row)
+
+  started = time.perf_counter()
+  try:
+    return await getattr(prepared[name], method)(*args)
+  except asyncpg.InvalidCachedStatementError:
+    # A migration changed a result type; prepare again and retry once, which
+    # is only possible outside a transaction.
+    del _prepared[_connection(conn)]
+    if conn.is_in_transaction():
+      raise
+    stats["reprepared"] += 1
+    await prepare_statements(conn)
+    prepared = _prepared.get(_connection(conn))
+    if prepared is None:
+      raise
+    return await getattr(prepared[name], method)(*args)
+  finally:
+    # Prepared executions bypass InstrumentedConnection, so count them here
+    stats["executions"] += 1
+    record_query(time.perf_counter() - started)
+
+
+async def fetch(conn: asyncpg.Connection, name: str, *args) -> list[Row]:
+  return await _execute(conn, "fetch", name, args)
+
+
+async def fetchrow(conn: asyncpg.Connection, name: str, *args) -> Row | None:
+  return await _execute(conn, "fetchrow", name, args)
+
+
+async def fetchval(conn: asyncpg.Connection, name: str, *args) -> Any:
+  return await _execute(conn, "fetchval", name, args)
+
+
+def metrics() -> list[tuple[str, dict, float]]:
+  return [
+    ("db_prepared_statements_total", {}, stats["prepared"]),
+    ("db_prepared_executions_total", {}, stats["executions"]),
+    ("db_prepared_reprepares_total", {}, stats["reprepared"]),
+  ]
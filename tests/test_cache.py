@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src import cache as cache_module
+from src.cache import Cache, MemoryCache, NullCache, RedisCache
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self) -> float:
+    return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+  clock = FakeClock()
+  monkeypatch.setattr(cache_module.time, "monotonic", clock)
+  return clock
+
+
+class FakeRedis:
+  """In-memory stand-in for `redis.asyncio.Redis`."""
+
+  def __init__(self):
+    self.data: dict[str, str] = {}
+    self.ttls: dict[str, int] = {}
+    self.closed = False
+
+  async def get(self, key: str) -> str | None:
+    return self.data.get(key)
+
+  async def set(self, key: str, value: str, px: int):
+    self.data[key] = value
+    self.ttls[key] = px
+
+  async def delete(self, *keys: str):
+    for key in keys:
+      self.data.pop(key, None)
+
+  async def aclose(self):
+    self.closed = True
+
+
+def test_cache_is_abstract():
+  with pytest.raises(TypeError):
+    Cache()
+
+
+async def test_memory_cache_hit_and_miss(clock):
+  cache = MemoryCache(ttl=10, max_entries=10)
+  assert await cache.get("a") is None
+  await cache.set("a", {"id": 1})
+  assert await cache.get("a") == {"id": 1}
+  assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+async def test_memory_cache_expires_entries(clock):
+  cache = MemoryCache(ttl=10, max_entries=10)
+  await cache.set("a", 1)
+  clock.now += 10
+  assert await cache.get("a") == 1
+  clock.now += 0.001
+  assert await cache.get("a") is None
+  assert cache.stats.misses == 1
+  # The expired entry was dropped, not just skipped
+  clock.now -= 5
+  assert await cache.get("a") is None
+
+
+async def test_memory_cache_evicts_least_recently_used(clock):
+  cache = MemoryCache(ttl=10, max_entries=2)
+  await cache.set("a", 1)
+  await cache.set("b", 2)
+  # Reading "a" makes "b" the least recently used entry
+  assert await cache.get("a") == 1
+  await cache.set("c", 3)
+  assert await cache.get("b") is None
+  assert await cache.get("a") == 1
+  assert await cache.get("c") == 3
+  assert cache.stats.evictions == 1
+
+
+async def test_memory_cache_overwrite_does_not_evict(clock):
+  cache = MemoryCache(ttl=10, max_entries=2)
+  await cache.set("a", 1)
+  await cache.set("b", 2)
+  await cache.set("a", 3)
+  assert cache.stats.evictions == 0
+  assert await cache.get("a") == 3
+
+
+async def test_memory_cache_delete_and_clear(clock):
+  cache = MemoryCache(ttl=10, max_entries=10)
+  await cache.set("a", 1)
+  await cache.set("b", 2)
+  await cache.delete("a", "missing")
+  assert await cache.get("a") is None
+  assert await cache.get("b") == 2
+  await cache.clear()
+  assert await cache.get("b") is None
+
+
+@pytest.mark.parametrize(
+  "backend",
+  [lambda: MemoryCache(10, 10), lambda: RedisCache(FakeRedis(), 10), NullCache],
+)
+async def test_delete_bumps_the_generation(backend):
+  cache = backend()
+  before = cache.generation("a")
+  other = cache.generation("b")
+  await cache.delete("a")
+  assert cache.generation("a") != before
+  assert cache.generation("b") == other
+
+
+async def test_clear_bumps_every_generation():
+  cache = MemoryCache(ttl=10, max_entries=10)
+  before = cache.generation("a")
+  await cache.clear()
+  assert cache.generation("a") != before
+
+
+async def test_redis_cache_round_trips_values():
+  client = FakeRedis()
+  cache = RedisCache(client, ttl=1.5, prefix="test:")
+  ts = datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+  await cache.set("chemical:1", {"id": 1, "updated_at": ts, "tags": ["a"]})
+  assert client.ttls == {"test:chemical:1": 1500}
+  assert await cache.get("chemical:1") == {"id": 1, "updated_at": ts, "tags": ["a"]}
+  assert await cache.get("chemical:2") is None
+  assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+async def test_redis_cache_delete_and_close():
+  client = FakeRedis()
+  cache = RedisCache(client, ttl=10, prefix="test:")
+  await cache.set("a", 1)
+  await cache.set("b", 2)
+  await cache.delete("a")
+  await cache.delete()
+  assert set(client.data) == {"test:b"}
+  await cache.close()
+  assert client.closed
+
+
+async def test_redis_cache_rejects_unserializable_values():
+  cache = RedisCache(FakeRedis(), ttl=10)
+  with pytest.raises(TypeError):
+    await cache.set("a", {"value": object()})
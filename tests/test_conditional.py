@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+from starlette.datastructures import Headers
+
+from src.conditional import (
+  digest_etag,
+  http_date,
+  if_match_versions,
+  not_modified,
+  parse_version_etag,
+  version_etag,
+)
+
+UPDATED_AT = datetime(2025, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+ETAG = version_etag(1, UPDATED_AT)
+
+
+def test_version_etag_round_trip():
+  assert parse_version_etag(ETAG) == ("1", UPDATED_AT)
+
+
+def test_parse_version_etag_rejects_foreign_tags():
+  assert parse_version_etag(f"W/{ETAG}") is None
+  assert parse_version_etag('"no-hex-zz"') is None
+  assert parse_version_etag("1-abc") is None
+  assert parse_version_etag('"') is None
+
+
+def test_digest_etag_is_weak_and_order_sensitive():
+  assert digest_etag([1, "a"]).startswith('W/"')
+  assert digest_etag([1, "a"]) == digest_etag([1, "a"])
+  assert digest_etag([1, "a"]) != digest_etag(["a", 1])
+
+
+def test_if_none_match():
+  assert not_modified(Headers({"if-none-match": ETAG}), ETAG)
+  assert not_modified(Headers({"if-none-match": f'"other", {ETAG}'}), ETAG)
+  assert not_modified(Headers({"if-none-match": "*"}), ETAG)
+  assert not not_modified(Headers({"if-none-match": '"other"'}), ETAG)
+
+
+def test_if_none_match_uses_weak_comparison():
+  assert not_modified(Headers({"if-none-match": f"W/{ETAG}"}), ETAG)
+  weak = digest_etag([1])
+  assert not_modified(Headers({"if-none-match": weak[2:]}), weak)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+  headers = Headers(
+    {"if-none-match": '"other"', "if-modified-since": http_date(UPDATED_AT)}
+  )
+  assert not not_modified(headers, ETAG, UPDATED_AT)
+
+
+def test_if_modified_since_has_one_second_resolution():
+  headers = Headers({"if-modified-since": http_date(UPDATED_AT)})
+  assert not_modified(headers, ETAG, UPDATED_AT)
+  later = UPDATED_AT.replace(second=UPDATED_AT.second + 1)
+  assert not not_modified(headers, ETAG, later)
+
+
+def test_if_modified_since_ignored_when_invalid_or_unversioned():
+  assert not not_modified(Headers({"if-modified-since": "yesterday"}), ETAG, UPDATED_AT)
+  assert not not_modified(Headers({"if-modified-since": http_date(UPDATED_AT)}), ETAG)
+  assert not not_modified(Headers({}), ETAG, UPDATED_AT)
+
+
+def test_if_match_versions():
+  assert if_match_versions("*", 1) is None
+  assert if_match_versions(ETAG, 1) == [UPDATED_AT]
+  other = version_etag(1, UPDATED_AT.replace(year=2024))
+  assert if_match_versions(f"{ETAG}, {other}", 1) == [
+    UPDATED_AT,
+    UPDATED_AT.replace(year=2024),
+  ]
+
+
+def test_if_match_versions_drops_tags_of_other_resources():
+  assert if_match_versions(ETAG, 2) == []
+  assert if_match_versions(f"W/{ETAG}", 1) == []
+  assert if_match_versions('"garbage"', 1) == []
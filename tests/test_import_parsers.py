@@ -0,0 +1,61 @@
+from src.chemical.service import _iter_csv, _iter_ndjson
+
+
+async def _lines(*lines: str):
+  for line in lines:
+    yield line
+
+
+async def _collect(rows) -> list:
+  return [
+    (row, str(item) if isinstance(item, Exception) else item)
+    async for row, item in rows
+  ]
+
+
+async def test_ndjson_rows():
+  rows = await _collect(
+    _iter_ndjson(_lines('{"name": "Water"}', "", "  ", '{"name": "Salt"}'))
+  )
+  assert rows == [(1, {"name": "Water"}), (2, {"name": "Salt"})]
+
+
+async def test_ndjson_errors_keep_row_numbers():
+  rows = await _collect(_iter_ndjson(_lines("{oops", "[1, 2]", '{"name": "Salt"}')))
+  assert rows[0][0] == 1 and rows[0][1].startswith("Invalid JSON")
+  assert rows[1] == (2, "Expected a JSON object")
+  assert rows[2] == (3, {"name": "Salt"})
+
+
+async def test_csv_rows():
+  rows = await _collect(_iter_csv(_lines(" name , quantity", "Water,10", "", "Salt,5")))
+  assert rows == [
+    (1, {"name": "Water", "quantity": "10"}),
+    (2, {"name": "Salt", "quantity": "5"}),
+  ]
+
+
+async def test_csv_quoted_fields_span_lines():
+  rows = await _collect(
+    _iter_csv(_lines("name,unit", '"Sodium', 'chloride, ""pure""",kg', "Water,L"))
+  )
+  assert rows == [
+    (1, {"name": 'Sodium\nchloride, "pure"', "unit": "kg"}),
+    (2, {"name": "Water", "unit": "L"}),
+  ]
+
+
+async def test_csv_column_count_mismatch():
+  rows = await _collect(_iter_csv(_lines("name,unit", "Water", "Salt,kg")))
+  assert rows == [
+    (1, "Expected 2 columns, got 1"),
+    (2, {"name": "Salt", "unit": "kg"}),
+  ]
+
+
+async def test_csv_unterminated_quote():
+  rows = await _collect(_iter_csv(_lines("name,unit", "Water,L", '"Salt,kg')))
+  assert rows == [
+    (1, {"name": "Water", "unit": "L"}),
+    (2, "Unterminated quoted field"),
+  ]
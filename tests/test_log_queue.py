@@ -0,0 +1,191 @@
+import contextlib
+import json
+
+import asyncpg
+import pytest
+
+from src.chemical.log_queue import DEAD_LETTER_FILE, LogQueue
+from src.chemical.models import InventoryLog, InventoryLogQueueCheckpoint
+
+
+class _NullTransaction:
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *exc):
+    return False
+
+
+class FakeDatabase:
+  """Stands in for the pool and the two model methods the queue uses."""
+
+  def __init__(self):
+    self.checkpoints: dict[int, int] = {}
+    self.logs: list[tuple[int, str, int]] = []
+    self.error: Exception | None = None
+    self.deleted_chemicals: set[int] = set()
+
+  @contextlib.asynccontextmanager
+  async def acquire(self):
+    yield self
+
+  def transaction(self):
+    return _NullTransaction()
+
+  async def get_checkpoint(self, conn, slot: int) -> int:
+    return self.checkpoints.get(slot, 0)
+
+  async def save_checkpoint(self, conn, slot: int, seq: int):
+    self.checkpoints[slot] = seq
+
+  async def create_logs(self, conn, logs) -> int:
+    if self.error is not None:
+      raise self.error
+    if any(quantity < 0 for _, _, quantity, _ in logs):
+      raise asyncpg.CheckViolationError("negative quantity")
+    rows = [
+      (chemical_id, action_type, quantity)
+      for chemical_id, action_type, quantity, _ in logs
+      if chemical_id not in self.deleted_chemicals
+    ]
+    self.logs.extend(rows)
+    return len(rows)
+
+
+@pytest.fixture
+def db(monkeypatch) -> FakeDatabase:
+  db = FakeDatabase()
+  monkeypatch.setattr(
+    InventoryLogQueueCheckpoint, "get_raw", staticmethod(db.get_checkpoint)
+  )
+  monkeypatch.setattr(
+    InventoryLogQueueCheckpoint, "save_raw", staticmethod(db.save_checkpoint)
+  )
+  monkeypatch.setattr(InventoryLog, "create_logs_raw", staticmethod(db.create_logs))
+  return db
+
+
+def _queue(tmp_path) -> LogQueue:
+  # Long interval: flushes only happen when the test asks for them
+  return LogQueue(tmp_path, batch_size=100, flush_interval=60, slots=1)
+
+
+async def _append(queue: LogQueue, *quantities: int):
+  for quantity in quantities:
+    await queue.append(1, "add", quantity)
+
+
+async def test_flush_writes_logs_and_checkpoint(tmp_path, db):
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  await _append(queue, 1, 2, 3)
+  await queue.close()
+  assert db.logs == [(1, "add", 1), (1, "add", 2), (1, "add", 3)]
+  assert db.checkpoints == {0: 3}
+  assert queue.stats["flushed"] == 3
+  assert queue.depth == 0
+
+
+async def test_replays_entries_after_the_checkpoint(tmp_path, db):
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  db.error = OSError("database down")
+  await _append(queue, 1, 2, 3, 4, 5)
+  await queue.close()
+  assert queue.stats["flush_errors"] > 0
+  assert db.logs == []
+
+  # Entries up to 3 were flushed before the crash, only 4 and 5 are left
+  db.error = None
+  db.checkpoints[0] = 3
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  assert queue.stats["replayed"] == 2
+  await queue.close()
+  assert db.logs == [(1, "add", 4), (1, "add", 5)]
+  assert db.checkpoints == {0: 5}
+
+  # Flushed segments are retired, so nothing is replayed again
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  assert queue.stats["replayed"] == 0
+  await _append(queue, 6)
+  await queue.close()
+  assert db.logs[-1] == (1, "add", 6)
+  assert db.checkpoints == {0: 6}
+
+
+async def test_replay_skips_a_torn_last_line(tmp_path, db):
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  db.error = OSError("database down")
+  await _append(queue, 1, 2)
+  await queue.close()
+  segment = next((tmp_path / "slot-0").glob("*.log"))
+  with segment.open("a") as f:
+    f.write('{"seq":3,"chemical_id":1,')
+
+  db.error = None
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  assert queue.stats["replayed"] == 2
+  await queue.close()
+  assert db.logs == [(1, "add", 1), (1, "add", 2)]
+
+
+async def test_logs_of_deleted_chemicals_are_dropped(tmp_path, db):
+  db.deleted_chemicals.add(2)
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  await queue.append(1, "add", 1)
+  await queue.append(2, "add", 2)
+  await queue.close()
+  assert db.logs == [(1, "add", 1)]
+  assert queue.stats["dropped"] == 1
+  assert db.checkpoints == {0: 2}
+
+
+async def test_rejected_entries_are_dead_lettered(tmp_path, db):
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  await _append(queue, 1, -5, 3)
+  await queue.close()
+  assert db.logs == [(1, "add", 1), (1, "add", 3)]
+  assert db.checkpoints == {0: 3}
+  assert queue.stats["dead_lettered"] == 1
+  assert queue.stats["dropped"] == 0
+  assert queue.stats["flush_errors"] == 0
+
+  lines = (tmp_path / "slot-0" / DEAD_LETTER_FILE).read_text().splitlines()
+  assert len(lines) == 1
+  entry = json.loads(lines[0])
+  assert (entry["seq"], entry["quantity"]) == (2, -5)
+  assert entry["error"] == "negative quantity"
+
+
+async def test_transient_errors_keep_the_batch(tmp_path, db):
+  queue = _queue(tmp_path)
+  await queue.start(db)
+  db.error = asyncpg.PostgresConnectionError("connection lost")
+  await _append(queue, 1)
+  await queue._flush()
+  assert queue.stats["flush_errors"] == 1
+  assert queue.stats["dead_lettered"] == 0
+  assert queue.depth == 1
+  db.error = None
+  await queue.close()
+  assert db.logs == [(1, "add", 1)]
+  assert not (tmp_path / "slot-0" / DEAD_LETTER_FILE).exists()
+
+
+async def test_second_process_takes_the_next_slot(tmp_path, db):
+  first = LogQueue(tmp_path, batch_size=100, flush_interval=60, slots=2)
+  second = LogQueue(tmp_path, batch_size=100, flush_interval=60, slots=2)
+  await first.start(db)
+  await second.start(db)
+  assert (first.slot, second.slot) == (0, 1)
+  third = LogQueue(tmp_path, batch_size=100, flush_interval=60, slots=2)
+  with pytest.raises(RuntimeError):
+    await third.start(db)
+  await first.close()
+  await second.close()
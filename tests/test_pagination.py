@@ -0,0 +1,51 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from src.pagination import INT4_MAX, INT4_MIN, decode_cursor, encode_cursor
+
+
+def _raw_cursor(payload: str) -> str:
+  return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+  ts = datetime(2025, 3, 4, 5, 6, 7, 890, tzinfo=timezone.utc)
+  cursor = encode_cursor(ts, 42)
+  assert "=" not in cursor
+  assert decode_cursor(cursor, datetime, int) == (ts, 42)
+
+
+def test_round_trip_float_and_int():
+  assert decode_cursor(encode_cursor(0.25, 7), float, int) == (0.25, 7)
+
+
+def test_int4_bounds_are_accepted():
+  assert decode_cursor(encode_cursor(INT4_MIN, INT4_MAX), int, int) == (
+    INT4_MIN,
+    INT4_MAX,
+  )
+
+
+@pytest.mark.parametrize(
+  "cursor, types",
+  [
+    ("not base64!", (int,)),
+    ("", (int,)),
+    (_raw_cursor("{not json"), (int,)),
+    (_raw_cursor('{"id": 1}'), (int,)),
+    (_raw_cursor("[1, 2]"), (int,)),
+    (_raw_cursor('["x"]'), (int,)),
+    (_raw_cursor("[null]"), (int,)),
+    (_raw_cursor('["yesterday", 1]'), (datetime, int)),
+    (encode_cursor(INT4_MAX + 1), (int,)),
+    (encode_cursor(INT4_MIN - 1), (int,)),
+    (encode_cursor(0.5, 2**40), (float, int)),
+  ],
+)
+def test_bad_cursors_are_rejected(cursor, types):
+  with pytest.raises(HTTPException) as e:
+    decode_cursor(cursor, *types)
+  assert e.value.status_code == 400
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced():
+  flight = SingleFlight()
+  release = asyncio.Event()
+  calls = 0
+
+  async def call():
+    nonlocal calls
+    calls += 1
+    await release.wait()
+    return {"id": 1}
+
+  waiters = [asyncio.create_task(flight.do("key", call)) for _ in range(5)]
+  await asyncio.sleep(0)
+  assert flight.in_flight == 1
+  release.set()
+  results = await asyncio.gather(*waiters)
+  assert calls == 1
+  assert all(result is results[0] for result in results)
+  assert flight.stats == {"calls": 1, "coalesced": 4, "timeouts": 0}
+  assert flight.in_flight == 0
+
+
+async def test_different_keys_run_separately():
+  flight = SingleFlight()
+
+  async def call(value):
+    await asyncio.sleep(0)
+    return value
+
+  assert await asyncio.gather(
+    flight.do("a", lambda: call(1)), flight.do("b", lambda: call(2))
+  ) == [1, 2]
+  assert flight.stats["calls"] == 2
+
+
+async def test_errors_reach_every_waiter():
+  flight = SingleFlight()
+  release = asyncio.Event()
+
+  async def call():
+    await release.wait()
+    raise HTTPException(status_code=404, detail="Chemical not found")
+
+  waiters = [asyncio.create_task(flight.do("key", call)) for _ in range(3)]
+  await asyncio.sleep(0)
+  release.set()
+  results = await asyncio.gather(*waiters, return_exceptions=True)
+  assert all(isinstance(e, HTTPException) and e.status_code == 404 for e in results)
+  # The failure isn't cached
+  assert flight.in_flight == 0
+
+
+async def test_timeout_raises_503_without_cancelling_the_call():
+  flight = SingleFlight(timeout=0.01)
+  release = asyncio.Event()
+
+  async def call():
+    await release.wait()
+    return "done"
+
+  with pytest.raises(HTTPException) as e:
+    await flight.do("key", call)
+  assert e.value.status_code == 503
+  assert flight.stats["timeouts"] == 1
+  # Still running for later callers
+  assert flight.in_flight == 1
+  release.set()
+  assert await flight.do("key", call) == "done"
+  assert flight.stats["calls"] == 1
+
+
+async def test_timeout_error_from_the_call_is_not_a_flight_timeout():
+  flight = SingleFlight(timeout=1)
+
+  async def call():
+    raise asyncio.TimeoutError()
+
+  with pytest.raises(asyncio.TimeoutError):
+    await flight.do("key", call)
+  assert flight.stats["timeouts"] == 0
+
+
+async def test_cancelled_caller_does_not_cancel_the_call():
+  flight = SingleFlight()
+  release = asyncio.Event()
+
+  async def call():
+    await release.wait()
+    return "done"
+
+  first = asyncio.create_task(flight.do("key", call))
+  second = asyncio.create_task(flight.do("key", call))
+  await asyncio.sleep(0)
+  first.cancel()
+  release.set()
+  assert await second == "done"
+  with pytest.raises(asyncio.CancelledError):
+    await first
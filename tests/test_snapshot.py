@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from src.chemical.snapshot import InventorySnapshot
+
+CREATED_AT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _row(chemical_id: int, cas_number: str, unit: str, **fields) -> dict:
+  return {
+    "id": chemical_id,
+    "name": f"Chemical {chemical_id}",
+    "cas_number": cas_number,
+    "quantity": 10,
+    "unit": unit,
+    "created_at": CREATED_AT,
+    "updated_at": CREATED_AT + timedelta(microseconds=chemical_id),
+    **fields,
+  }
+
+
+def _ids(rows: list[dict]) -> list[int]:
+  return [row["id"] for row in rows]
+
+
+@pytest.fixture
+def snapshot() -> InventorySnapshot:
+  snapshot = InventorySnapshot(max_staleness=1, poll_interval=1)
+  for row in (
+    _row(1, "7732-18-5", "L"),
+    _row(2, "124-38-9", "kg"),
+    _row(3, "7732-18-5", "kg"),
+    _row(5, "74-82-8", "L"),
+  ):
+    snapshot.upsert(row)
+  return snapshot
+
+
+def test_get(snapshot):
+  assert snapshot.get(3) == _row(3, "7732-18-5", "kg")
+  assert len(snapshot) == 4
+  for missing in (0, 4, 6, 10_000, -1):
+    with pytest.raises(HTTPException):
+      snapshot.get(missing)
+
+
+def test_lookup_by_cas_and_unit(snapshot):
+  assert _ids(snapshot.lookup("7732-18-5", None, 10)) == [1, 3]
+  assert _ids(snapshot.lookup("124-38-9", None, 10)) == [2]
+  assert _ids(snapshot.lookup(None, "kg", 10)) == [2, 3]
+  assert _ids(snapshot.lookup("7732-18-5", "L", 10)) == [1]
+  assert snapshot.lookup("0-00-0", None, 10) == []
+  assert snapshot.lookup(None, "m³", 10) == []
+
+
+def test_lookup_pages_by_id(snapshot):
+  assert _ids(snapshot.lookup(None, "L", 1)) == [1]
+  assert _ids(snapshot.lookup(None, "L", 1, after_id=1)) == [5]
+  assert _ids(snapshot.lookup(None, "L", 1, after_id=5)) == []
+
+
+def test_out_of_order_inserts_keep_indexes_sorted(snapshot):
+  snapshot.upsert(_row(4, "7732-18-5", "L"))
+  assert _ids(snapshot.lookup("7732-18-5", None, 10)) == [1, 3, 4]
+  assert _ids(snapshot.lookup(None, "L", 10)) == [1, 4, 5]
+
+
+def test_update_moves_indexes(snapshot):
+  snapshot.upsert(_row(1, "124-38-9", "kg", quantity=3, name="Renamed"))
+  assert _ids(snapshot.lookup("7732-18-5", None, 10)) == [3]
+  assert _ids(snapshot.lookup("124-38-9", None, 10)) == [1, 2]
+  assert _ids(snapshot.lookup(None, "L", 10)) == [5]
+  assert _ids(snapshot.lookup(None, "kg", 10)) == [1, 2, 3]
+  chemical = snapshot.get(1)
+  assert (chemical["quantity"], chemical["name"]) == (3, "Renamed")
+  assert len(snapshot) == 4
+
+
+def test_remove(snapshot):
+  snapshot.remove(1)
+  with pytest.raises(HTTPException):
+    snapshot.get(1)
+  # The last row was moved into the hole and is still found
+  assert snapshot.get(5) == _row(5, "74-82-8", "L")
+  assert _ids(snapshot.lookup("7732-18-5", None, 10)) == [3]
+  assert _ids(snapshot.lookup(None, "L", 10)) == [5]
+  assert len(snapshot) == 3
+  snapshot.remove(1)
+  assert snapshot.stats["deletes"] == 1
+
+
+def test_remove_then_reinsert(snapshot):
+  snapshot.remove(3)
+  snapshot.remove(2)
+  snapshot.upsert(_row(3, "124-38-9", "L"))
+  assert _ids(snapshot.lookup("124-38-9", None, 10)) == [3]
+  assert _ids(snapshot.lookup(None, "kg", 10)) == []
+  assert _ids(snapshot.lookup(None, "L", 10)) == [1, 3, 5]
+  assert [snapshot.get(i)["id"] for i in (1, 3, 5)] == [1, 3, 5]